@@ -27,7 +27,7 @@ type UploadResultItem = {
 export default function CsvUploadPage() {
   const [uploading, setUploading] = useState(false);
   const [file, setFile] = useState<File | null>(null);
-  const [result, setResult] = useState<{ count: number; results: UploadResultItem[] } | null>(null);
+  const [result, setResult] = useState<{ count: number; results: UploadResultItem[]; error?: string } | null>(null);
   const [error, setError] = useState<string | null>(null);
   const [showDetailed, setShowDetailed] = useState(true);
 
@@ -89,6 +89,10 @@ export default function CsvUploadPage() {
     try {
       const res = await uploadCompatibilityCsv(file);
       setResult(res);
+      if (res.error) {
+        // results are streamed as they are scored, so a failure can arrive after some of them
+        setError(`${res.error}. Upload incomplete: only the first ${res.count} rows were processed.`);
+      }
     } catch (err: any) {
       setError(err?.message || "Upload failed");
     } finally {
@@ -169,7 +173,7 @@ export default function CsvUploadPage() {
         <Card>
           <CardHeader>
             <CardTitle className="flex items-center gap-2">
-              <FileSpreadsheet className="w-5 h-5" /> Results ({result.count})
+              <FileSpreadsheet className="w-5 h-5" /> Results ({result.count}{result.error ? ", incomplete" : ""})
             </CardTitle>
           </CardHeader>
           <CardContent>
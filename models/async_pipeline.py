@@ -0,0 +1,149 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Asyncio Load/Score Pipeline
+===========================
+
+Overlaps database round-trips with CPU work for `data_loader.py --async` and
+`predict_player_positions.py --async`:
+
+  source (server-side cursor / CSV chunks) -> executor (convert, score, encode) -> sink (COPY)
+
+Stages are connected by bounded asyncio queues (PIPELINE_DEPTH batches), so a
+slow writer pauses the reader instead of buffering the whole table. While the
+event loop waits on the connection, the next batch is converted in a worker
+thread (pandas/NumPy release the GIL for most of that work).
+
+Writes use COPY ... FORMAT csv, one statement per batch, inside the caller's
+transaction: PostgreSQL parses the text exactly like the literals the
+synchronous psycopg2 path sends, so both modes store the same values.
+
+Needs asyncpg (pip install asyncpg); the default synchronous mode does not.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import csv
+import io
+from time import perf_counter
+from typing import AsyncIterable, Awaitable, Callable, Iterable
+
+import pandas as pd
+
+# ────────── Configuration ──────────
+PIPELINE_DEPTH = 4    # batches queued between two stages (backpressure)
+BATCH_ROWS = 5000     # rows per fetched / written batch
+NULL = r"\N"          # COPY NULL marker, so "" stays an empty string (scope_value of scope "all")
+
+_END = object()
+
+
+async def run_pipeline(source: AsyncIterable, work: Callable | None, sink: Callable[..., Awaitable],
+                       depth: int = PIPELINE_DEPTH, executor=None) -> dict:
+    """Drive source -> work -> sink concurrently; batches reach the sink in source order.
+
+    work(batch) runs in the executor (None = pass the batch through) and
+    sink(result) is awaited on the event loop. Returns the number of batches
+    and the busy time of each stage; busy times adding up to more than wall_s
+    is the overlap gained.
+    """
+    loop = asyncio.get_running_loop()
+    todo: asyncio.Queue = asyncio.Queue(depth)
+    done: asyncio.Queue = asyncio.Queue(depth)
+    stats = {"batches": 0, "source_s": 0.0, "work_s": 0.0, "sink_s": 0.0}
+
+    async def produce():
+        it = aiter(source)
+        while True:
+            t = perf_counter()
+            try:
+                batch = await anext(it)
+            except StopAsyncIteration:
+                break
+            stats["source_s"] += perf_counter() - t
+            await todo.put(batch)
+        await todo.put(_END)
+
+    async def compute():
+        while (batch := await todo.get()) is not _END:
+            t = perf_counter()
+            result = batch if work is None else await loop.run_in_executor(executor, work, batch)
+            stats["work_s"] += perf_counter() - t
+            await done.put(result)
+        await done.put(_END)
+
+    async def consume():
+        while (result := await done.get()) is not _END:
+            t = perf_counter()
+            await sink(result)
+            stats["sink_s"] += perf_counter() - t
+            stats["batches"] += 1
+
+    t0 = perf_counter()
+    tasks = [asyncio.create_task(stage()) for stage in (produce, compute, consume)]
+    try:
+        await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+    stats["wall_s"] = perf_counter() - t0
+    return {k: round(v, 4) if isinstance(v, float) else v for k, v in stats.items()}
+
+
+# ────────── Sources ──────────
+async def fetch_batches(conn, query: str, batch_rows: int = BATCH_ROWS):
+    """(columns, records) batches from a server-side cursor; needs an open transaction."""
+    cur = await conn.cursor(query)
+    while True:
+        records = await cur.fetch(batch_rows)
+        if not records:
+            return
+        yield list(records[0].keys()), records
+
+
+def records_to_frame(batch) -> pd.DataFrame:
+    """One fetch_batches batch as a DataFrame (NULL -> NaN like pd.read_sql)."""
+    columns, records = batch
+    return pd.DataFrame.from_records([tuple(r) for r in records], columns=columns, coerce_float=True)
+
+
+async def csv_chunks(path: str, batch_rows: int = BATCH_ROWS, executor=None):
+    """DataFrame chunks of a CSV file, parsed in the executor."""
+    loop = asyncio.get_running_loop()
+    reader = await loop.run_in_executor(executor, lambda: pd.read_csv(path, chunksize=batch_rows))
+    with reader:
+        while (chunk := await loop.run_in_executor(executor, next, reader, None)) is not None:
+            yield chunk
+
+
+async def frame_batches(df: pd.DataFrame, batch_rows: int = BATCH_ROWS):
+    """Row slices of an in-memory frame."""
+    for start in range(0, len(df), batch_rows):
+        yield df.iloc[start:start + batch_rows]
+
+
+# ────────── COPY payloads and sink ──────────
+def rows_to_csv(rows: Iterable[tuple]) -> bytes:
+    """COPY payload for tuples (None -> NULL)."""
+    buf = io.StringIO()
+    csv.writer(buf, lineterminator="\n").writerows(tuple(NULL if v is None else v for v in row) for row in rows)
+    return buf.getvalue().encode("utf-8")
+
+
+def frame_to_csv(df: pd.DataFrame, int_cols: Iterable[str] = ()) -> bytes:
+    """COPY payload for a frame; int_cols are written without a decimal point (NaN -> NULL)."""
+    df = df.astype({c: "Int64" for c in int_cols if c in df.columns})
+    return df.to_csv(header=False, index=False, na_rep=NULL, lineterminator="\n").encode("utf-8")
+
+
+def copy_sink(conn, table: str, columns: list[str]) -> Callable[[bytes], Awaitable[None]]:
+    """Sink that COPYs each CSV payload into table (rows are counted in sink.rows)."""
+    async def sink(payload: bytes) -> None:
+        status = await conn.copy_to_table(table, source=io.BytesIO(payload), columns=columns,
+                                           format="csv", null=NULL)
+        sink.rows += int(status.split()[-1])  # "COPY <n>"
+    sink.rows = 0
+    return sink
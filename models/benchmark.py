@@ -0,0 +1,398 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Scaling Benchmark for the models pipeline
+=========================================
+
+Times every pipeline stage on synthetic players (see synthetic_players.py)
+at increasing row counts and records wall time, rows/sec and peak RSS:
+- load   : data_loader players path (CSV read + row conversion, + INSERT with --db)
+- read   : SELECT * FROM players (only with --db)
+- train  : pos_models.py per-position XGBoost training (artifacts go to a temp dir)
+- stats  : predict_player_positions.py reference stats / feature metadata
+- score  : predict_player_positions.py combo scoring
+- leaderboards : per-position top-K leaderboards (leaderboards.py)
+- explanations : per-player top feature contributions (explanations.py)
+- upload : predict_from_csv.py end-to-end on the synthetic CSV
+- write  : result.csv (+ position_compatibility / position_leaderboards / player_explanations
+           INSERT with --db)
+
+Also measures CLI startup: `python -X importtime` cost of each script and the
+end-to-end wall time of a small predict_from_csv.py upload served from the
+reference stats cache, which must stay within STARTUP_BUDGET_S.
+
+Runs fully offline. Without --db nothing touches a database; with --db the
+tables are created in a scratch schema (reposition_bench) of the database in
+DATABASE_URL / DB_* and dropped afterwards.
+
+Usage:
+  python models/benchmark.py run --sizes 5000,50000 --out data/benchmark_results.json
+  python models/benchmark.py run --baseline data/benchmark_baseline.json
+  python models/benchmark.py compare data/benchmark_results.json data/benchmark_baseline.json
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+import argparse
+import contextlib
+import datetime
+import io
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from instrumentation import METRICS_ENV, PeakRSS
+
+# ────────── Configuration ──────────
+BASE = Path(__file__).resolve().parent
+DEFAULT_OUT = BASE.parent / "data" / "benchmark_results.json"
+DEFAULT_SIZES = [5_000, 50_000, 500_000, 2_000_000]
+STAGES = ["load", "read", "train", "stats", "score", "leaderboards", "explanations", "upload", "write"]
+BENCH_SCHEMA = "reposition_bench"
+TOLERANCE = 0.25        # allowed relative slowdown before flagging a regression
+MEM_TOLERANCE = 0.25    # allowed relative peak RSS growth
+MIN_ABS_SECONDS = 0.05  # ignore regressions smaller than timer noise
+STARTUP_SCRIPTS = ["predict_from_csv", "predict_player_positions", "pos_models", "data_loader"]
+STARTUP_BUDGET_S = 1.0  # cached-stats upload, process start to exit
+STARTUP_REPEATS = 5
+
+
+# ────────── DB scratch schema ──────────
+def _setup_bench_schema(conn) -> None:
+    cur = conn.cursor()
+    cur.execute(f"DROP SCHEMA IF EXISTS {BENCH_SCHEMA} CASCADE")
+    cur.execute(f"CREATE SCHEMA {BENCH_SCHEMA}")
+    for table in ("players", "position_compatibility", "position_leaderboards"):
+        # own identity column so the public sequences are left untouched
+        cur.execute(f"CREATE TABLE {BENCH_SCHEMA}.{table} (LIKE public.{table} INCLUDING ALL EXCLUDING DEFAULTS)")
+        cur.execute(f"ALTER TABLE {BENCH_SCHEMA}.{table} ALTER COLUMN id ADD GENERATED BY DEFAULT AS IDENTITY")
+    cur.execute(f"CREATE TABLE {BENCH_SCHEMA}.player_explanations (LIKE public.player_explanations INCLUDING ALL)")
+    conn.commit()
+    cur.close()
+
+
+def _drop_bench_schema(conn) -> None:
+    cur = conn.cursor()
+    cur.execute(f"DROP SCHEMA IF EXISTS {BENCH_SCHEMA} CASCADE")
+    conn.commit()
+    cur.close()
+
+
+# ────────── Stages ──────────
+def _stage_load(ctx):
+    import data_loader
+    if ctx["db"]:
+        if not data_loader.load_players(ctx["conn"], str(ctx["csv"])):
+            raise RuntimeError("data_loader.load_players failed")
+        return ctx["rows"]
+    df = data_loader.read_players_csv(str(ctx["csv"]))
+    data_loader._build_rows(df, data_loader.PLAYER_MAPPING)
+    ctx["dm"] = df
+    return len(df)
+
+
+def _stage_read(ctx):
+    import predict_player_positions as ppp
+    ctx["dm"] = ppp.read_players(ctx["engine"])
+    return len(ctx["dm"])
+
+
+def _stage_train(ctx):
+    import pos_models
+    df = ctx["dm"][ctx["dm"]["sub_position"].notna()].copy()
+    pos_models.train_all(df, out_dir=ctx["artifacts"])
+    return len(df)
+
+
+def _stage_stats(ctx):
+    import predict_player_positions as ppp
+    ctx["feat_info"] = ppp.build_feat_info(ctx["dm"], ctx["artifacts"])
+    return len(ctx["dm"])
+
+
+def _stage_score(ctx):
+    import predict_player_positions as ppp
+    ctx["scored"] = ppp.score_players(ctx["dm"], ctx["feat_info"])
+    return len(ctx["scored"])
+
+
+def _stage_leaderboards(ctx):
+    import leaderboards
+    ctx["leaderboards"] = leaderboards.build_leaderboards(ctx["scored"], ctx["dm"])
+    return len(ctx["scored"])
+
+
+def _stage_explanations(ctx):
+    import explanations
+    ctx["explanations"] = explanations.build_explanations(ctx["dm"], ctx["feat_info"])
+    return len(ctx["explanations"])
+
+
+def _stage_upload(ctx):
+    import predict_from_csv as pfc
+    de = pfc.read_input(ctx["csv"])
+    out = pfc.format_results(pfc.score_players(de, pfc.build_feat_info(ctx["dm"], ctx["artifacts"])))
+    out.to_csv(ctx["workdir"] / "upload_output.csv", index=False, float_format="%.1f", encoding="utf-8")
+    return len(out)
+
+
+def _stage_write(ctx):
+    import predict_player_positions as ppp
+    ppp.save_results(ctx["scored"], ctx["workdir"] / "result.csv")
+    compat_df = ppp.to_compat_frame(ctx["scored"])
+    if ctx["db"]:
+        # the scratch schema has no clubs / club_analytics of its own
+        ppp.load_to_db(compat_df, ctx["conn"], ctx.get("leaderboards"), ctx.get("explanations"), club_analytics=False)
+    return len(compat_df)
+
+
+STAGE_FUNCS = {
+    "load": _stage_load,
+    "read": _stage_read,
+    "train": _stage_train,
+    "stats": _stage_stats,
+    "score": _stage_score,
+    "leaderboards": _stage_leaderboards,
+    "explanations": _stage_explanations,
+    "upload": _stage_upload,
+    "write": _stage_write,
+}
+
+
+def run_stage(name: str, ctx: dict) -> dict:
+    """Run one stage with its output silenced and return its measurement record."""
+    with PeakRSS() as mem:
+        wall0, cpu0 = time.perf_counter(), time.process_time()
+        with contextlib.redirect_stdout(io.StringIO()):
+            rows = STAGE_FUNCS[name](ctx)
+        wall, cpu = time.perf_counter() - wall0, time.process_time() - cpu0
+    return {
+        "rows": ctx["rows"],
+        "stage": name,
+        "rows_processed": int(rows),
+        "seconds": round(wall, 4),
+        "cpu_seconds": round(cpu, 4),
+        "rows_per_sec": round(rows / wall, 1) if wall > 0 else None,
+        "peak_rss_mb": round(mem.peak_mb, 1),
+        "rss_delta_mb": round(mem.peak_mb - mem.start_mb, 1),
+    }
+
+
+def run_size(n: int, stages: list[str], db: bool, seed: int, profile: dict) -> list[dict]:
+    import synthetic_players
+
+    workdir = Path(tempfile.mkdtemp(prefix=f"reposition-bench-{n}-"))
+    ctx = {"rows": n, "db": db, "workdir": workdir, "csv": workdir / "players.csv",
+           "artifacts": workdir if "train" in stages else BASE}
+    try:
+        synthetic_players.generate_players(n, profile, seed=seed).to_csv(ctx["csv"], index=False, encoding="utf-8")
+        if db:
+            import data_loader
+            from database import create_db_engine
+            # every connection opened below (psycopg2 and SQLAlchemy) resolves tables in the scratch schema
+            ctx["pgoptions"] = os.environ.get("PGOPTIONS")
+            os.environ["PGOPTIONS"] = f"-c search_path={BENCH_SCHEMA},public"
+            ctx["conn"] = data_loader.connect_db()
+            _setup_bench_schema(ctx["conn"])
+            ctx["engine"] = create_db_engine()
+
+        results = []
+        for name in stages:
+            rec = run_stage(name, ctx)
+            print(f"{n:>10,} rows | {name:<12} | {rec['seconds']:>9.3f}s | "
+                  f"{rec['rows_per_sec'] or 0:>12,.0f} rows/s | peak {rec['peak_rss_mb']:>8.1f} MB")
+            results.append(rec)
+        return results
+    finally:
+        if db and "conn" in ctx:
+            _drop_bench_schema(ctx["conn"])
+            ctx["conn"].close()
+            if ctx["pgoptions"] is None:
+                os.environ.pop("PGOPTIONS", None)
+            else:
+                os.environ["PGOPTIONS"] = ctx["pgoptions"]
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+# ────────── CLI startup ──────────
+def import_seconds(module: str) -> float:
+    """Cumulative `python -X importtime` cost of importing one script as a module."""
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                          cwd=BASE, capture_output=True, text=True, check=True)
+    for line in proc.stderr.splitlines():
+        parts = line.split("|")
+        if len(parts) == 3 and parts[2].strip() == module:
+            return int(parts[1]) / 1e6
+    raise RuntimeError(f"no importtime entry for {module}")
+
+
+def measure_startup(profile: dict, seed: int) -> list[dict]:
+    """Import cost per script plus a cached-stats predict_from_csv.py run (median of several)."""
+    import synthetic_players
+    import position_fit
+    import result_cache
+
+    records = [{"name": f"import:{m}", "seconds": round(min(import_seconds(m) for _ in range(3)), 4)}
+               for m in STARTUP_SCRIPTS]
+
+    workdir = Path(tempfile.mkdtemp(prefix="reposition-bench-startup-"))
+    try:
+        reference = synthetic_players.generate_players(5_000, profile, seed=seed)
+        with contextlib.redirect_stdout(io.StringIO()):
+            position_fit.save_reference_stats(position_fit.build_feat_info(reference), workdir / "stats.json")
+        reference.head(20).to_csv(workdir / "upload.csv", index=False, encoding="utf-8")
+        cmd = [sys.executable, str(BASE / "predict_from_csv.py"), "--input", str(workdir / "upload.csv"),
+               "--out", str(workdir / "out.csv"), "--stats", str(workdir / "stats.json"),
+               "--cache", str(workdir / result_cache.DEFAULT_PATH.name)]
+        env = {**os.environ, METRICS_ENV: "off"}
+        # no DB settings: the run must be served from the cache
+        for key in ("DATABASE_URL", "DB_PASSWORD", "DB_PASS"):
+            env.pop(key, None)
+        walls = []
+        for _ in range(STARTUP_REPEATS):
+            t0 = time.perf_counter()
+            subprocess.run(cmd, env=env, capture_output=True, check=True)
+            walls.append(time.perf_counter() - t0)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    records.append({"name": "upload_cached", "seconds": round(statistics.median(walls), 4),
+                    "budget_s": STARTUP_BUDGET_S})
+    for r in records:
+        print(f"startup | {r['name']:<35} | {r['seconds']:>7.3f}s")
+    return records
+
+
+# ────────── Regression check ──────────
+def compare(results: dict, baseline: dict, tolerance: float = TOLERANCE,
+            mem_tolerance: float = MEM_TOLERANCE) -> list[str]:
+    """Return human-readable regressions of results against baseline."""
+    base = {(r["rows"], r["stage"]): r for r in baseline["results"]}
+    regressions = []
+    for r in results["results"]:
+        b = base.get((r["rows"], r["stage"]))
+        if b is None:
+            continue
+        slow = r["seconds"] - b["seconds"]
+        if r["seconds"] > b["seconds"] * (1 + tolerance) and slow > MIN_ABS_SECONDS:
+            regressions.append(f"{r['stage']} @ {r['rows']:,} rows: {b['seconds']:.3f}s -> {r['seconds']:.3f}s "
+                               f"(+{100 * slow / max(b['seconds'], 1e-9):.0f}%)")
+        if r["peak_rss_mb"] > b["peak_rss_mb"] * (1 + mem_tolerance):
+            regressions.append(f"{r['stage']} @ {r['rows']:,} rows: peak RSS {b['peak_rss_mb']:.1f} MB -> "
+                               f"{r['peak_rss_mb']:.1f} MB")
+
+    base_startup = {r["name"]: r for r in baseline.get("startup", [])}
+    for r in results.get("startup", []):
+        b = base_startup.get(r["name"])
+        if b and r["seconds"] > b["seconds"] * (1 + tolerance) and r["seconds"] - b["seconds"] > MIN_ABS_SECONDS:
+            regressions.append(f"startup {r['name']}: {b['seconds']:.3f}s -> {r['seconds']:.3f}s")
+    return regressions + startup_budget_violations(results)
+
+
+def startup_budget_violations(results: dict) -> list[str]:
+    return [f"startup {r['name']}: {r['seconds']:.3f}s exceeds budget {r['budget_s']:.3f}s"
+            for r in results.get("startup", []) if r.get("budget_s") and r["seconds"] > r["budget_s"]]
+
+
+def _report(regressions: list[str]) -> int:
+    if regressions:
+        print(f"✗ {len(regressions)} regression(s) against baseline:")
+        for line in regressions:
+            print(f"  • {line}")
+        return 1
+    print("OK - no regressions against baseline")
+    return 0
+
+
+# ────────── CLI ──────────
+def _csv_list(value: str) -> list[str]:
+    return [v.strip() for v in value.split(",") if v.strip()]
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    run = sub.add_parser("run", help="Run the benchmark and write a JSON results file")
+    run.add_argument("--sizes", type=_csv_list, default=[str(s) for s in DEFAULT_SIZES],
+                     help="Comma-separated row counts (default: 5000,50000,500000,2000000)")
+    run.add_argument("--stages", type=_csv_list, default=None,
+                     help=f"Comma-separated subset of {','.join(STAGES)} (default: all that apply)")
+    run.add_argument("--db", action="store_true", help="Use the local PostgreSQL in DATABASE_URL / DB_*")
+    run.add_argument("--seed", type=int, default=42)
+    run.add_argument("--out", default=str(DEFAULT_OUT))
+    run.add_argument("--baseline", help="Baseline results JSON to check for regressions")
+    run.add_argument("--tolerance", type=float, default=TOLERANCE)
+    run.add_argument("--mem-tolerance", type=float, default=MEM_TOLERANCE)
+    run.add_argument("--no-startup", action="store_true", help="Skip the CLI startup measurements")
+
+    cmp_ = sub.add_parser("compare", help="Compare a results file against a baseline")
+    cmp_.add_argument("results")
+    cmp_.add_argument("baseline")
+    cmp_.add_argument("--tolerance", type=float, default=TOLERANCE)
+    cmp_.add_argument("--mem-tolerance", type=float, default=MEM_TOLERANCE)
+
+    args = parser.parse_args(argv)
+    # the stages' own span lines would drown the table; opt back in with REPOSITION_METRICS
+    os.environ.setdefault(METRICS_ENV, "off")
+
+    if args.cmd == "compare":
+        results = json.loads(Path(args.results).read_text(encoding="utf-8"))
+        baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+        return _report(compare(results, baseline, args.tolerance, args.mem_tolerance))
+
+    stages = args.stages or [s for s in STAGES if args.db or s != "read"]
+    unknown = set(stages) - set(STAGES)
+    if unknown:
+        parser.error(f"unknown stage(s): {', '.join(sorted(unknown))}")
+    if "read" in stages and not args.db:
+        parser.error("stage 'read' requires --db")
+    if "load" not in stages or (args.db and "read" not in stages):
+        parser.error("stage 'load' (and 'read' with --db) is required: later stages use its output")
+    for stage, needs in (("score", "stats"), ("leaderboards", "score"), ("explanations", "stats"),
+                         ("write", "score")):
+        if stage in stages and needs not in stages:
+            parser.error(f"stage '{stage}' requires stage '{needs}'")
+    stages = [s for s in STAGES if s in stages]
+
+    import synthetic_players
+    profile = synthetic_players.fit_profile()
+
+    startup = [] if args.no_startup else measure_startup(profile, args.seed)
+
+    results = []
+    for n in sorted(int(s) for s in args.sizes):
+        results.extend(run_size(n, stages, args.db, args.seed, profile))
+
+    doc = {
+        "created_at": datetime.datetime.now().isoformat(timespec="seconds"),
+        "mode": "db" if args.db else "db-free",
+        "seed": args.seed,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "startup": startup,
+        "results": results,
+    }
+    out = Path(args.out)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(doc, indent=2), encoding="utf-8")
+    print(f"OK - benchmark results saved to {out}")
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+        return _report(compare(doc, baseline, args.tolerance, args.mem_tolerance))
+    over_budget = startup_budget_violations(doc)
+    for line in over_budget:
+        print(f"✗ {line}")
+    return 1 if over_budget else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,219 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Bulk Table Replacement
+======================
+
+data_loader.py --bulk (and predict_player_positions.py --bulk) replace a whole
+table instead of running DELETE + INSERT against the live one, which pays index
+and foreign-key maintenance per row and leaves every old row as a dead tuple:
+
+1. CREATE TABLE <t>_staging (LIKE <t>)   no constraints, no indexes
+2. COPY the rows in: no per-row index or constraint maintenance. The rows
+   are WAL-logged once (with wal_level = minimal not even that, as the table
+   was created in the same transaction); an UNLOGGED table would save nothing,
+   since SET LOGGED rewrites and WAL-logs it all again
+3. add the constraints and indexes of <t> (plus the READ_INDEXES the API
+   needs): each index is built once, sorted, over the finished data
+4. swap, on the same transaction: drop the foreign keys pointing at <t>, drop
+   <t>, rename <t>_staging to <t> (constraints and indexes get their names
+   back), re-own the serial sequences, re-add the foreign keys, ANALYZE
+
+Readers see the old table until the caller commits and the new one after, with
+no dead tuples and fresh planner statistics. Foreign keys into <t> apply their
+ON DELETE action to rows whose key is gone (player_favorites loses the
+favorites of players that were dropped, as DELETE FROM players did). Grants
+and triggers on <t> are not carried over, and views on <t> make the DROP
+fail; swap_in warns about both before it drops.
+"""
+
+from __future__ import annotations
+
+import io
+import re
+
+from async_pipeline import NULL
+
+# ────────── Configuration ──────────
+STAGING_SUFFIX = "_staging"
+TRIGRAM_EXTENSION = "pg_trgm"
+
+# Indexes behind the read paths in server/storage.ts (same names and definitions as shared/schema.ts)
+READ_INDEXES: dict[str, list[tuple[str, str]]] = {
+    "players": [
+        ("players_name_trgm_idx", "USING gin (name gin_trgm_ops)"),  # name search, ILIKE '%...%'
+        ("players_current_club_name_trgm_idx", "USING gin (current_club_name gin_trgm_ops)"),  # team filter, squads
+    ],
+    "clubs": [
+        ("clubs_name_idx", "(name)"),  # players.current_club_name = clubs.name joins
+        ("clubs_domestic_competition_id_idx", "(domestic_competition_id)"),  # clubs per league / country
+    ],
+    "position_compatibility": [
+        ("position_compatibility_player_id_idx", "(player_id)"),  # per-player lookups and joins
+    ],
+}
+
+_INDEXDEF = re.compile(r"^(CREATE (?:UNIQUE )?INDEX )(\S+)( ON (?:ONLY )?)(\S+)")
+
+
+def _temp_name(name: str) -> str:
+    return f"{name[:58]}_bulk"  # identifiers are cut at 63 bytes
+
+
+def ensure_trigram(cur) -> bool:
+    """Create pg_trgm if missing; False (trigram indexes are skipped) when this role may not."""
+    cur.execute("SELECT 1 FROM pg_extension WHERE extname = %s", (TRIGRAM_EXTENSION,))
+    if cur.fetchone():
+        return True
+    cur.execute("SAVEPOINT trigram")
+    try:
+        cur.execute(f"CREATE EXTENSION IF NOT EXISTS {TRIGRAM_EXTENSION}")
+    except Exception as e:
+        cur.execute("ROLLBACK TO SAVEPOINT trigram")
+        print(f"⚠️  {TRIGRAM_EXTENSION} not available ({str(e).splitlines()[0]}), trigram indexes skipped")
+        return False
+    cur.execute("RELEASE SAVEPOINT trigram")
+    return True
+
+
+def create_staging(cur, table: str) -> str:
+    """Empty copy of table's columns and defaults (no constraints, no indexes); returns its name."""
+    staging = table + STAGING_SUFFIX
+    cur.execute(f"DROP TABLE IF EXISTS {staging}")  # left over by an interrupted run
+    cur.execute(f"CREATE TABLE {staging} "
+                f"(LIKE {table} INCLUDING DEFAULTS INCLUDING IDENTITY INCLUDING GENERATED)")
+    return staging
+
+
+def copy_into(cur, table: str, columns: list[str], payload: bytes) -> int:
+    """COPY a CSV payload (async_pipeline.rows_to_csv / frame_to_csv) into table; returns the row count."""
+    cur.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv, NULL '{NULL}')",
+                    io.BytesIO(payload))
+    return cur.rowcount
+
+
+# ────────── Catalog ──────────
+def _constraints(cur, table: str) -> list[tuple[str, str, str]]:
+    """(name, type, definition) of table's own constraints; NOT NULL comes with LIKE."""
+    cur.execute("""
+        SELECT conname, contype, pg_get_constraintdef(oid) FROM pg_constraint
+        WHERE conrelid = %s::regclass AND contype IN ('p', 'u', 'x', 'c', 'f')
+        ORDER BY contype = 'f', conname""", (table,))
+    return cur.fetchall()
+
+
+def _plain_indexes(cur, table: str) -> list[tuple[str, str]]:
+    """(name, CREATE INDEX statement) of table's indexes that do not back a constraint."""
+    cur.execute("""
+        SELECT c.relname, pg_get_indexdef(i.indexrelid) FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid
+        WHERE i.indrelid = %s::regclass
+          AND NOT EXISTS (SELECT 1 FROM pg_constraint k WHERE k.conindid = i.indexrelid AND k.conrelid = i.indrelid)
+        ORDER BY c.relname""", (table,))
+    return cur.fetchall()
+
+
+def _inbound_foreign_keys(cur, table: str) -> list[tuple[str, str, str, str, list[str], list[str]]]:
+    """(child table, name, ON DELETE action, definition, child columns, referenced columns) of FKs into table."""
+    cur.execute("""
+        SELECT k.conrelid::regclass::text, k.conname, k.confdeltype, pg_get_constraintdef(k.oid),
+               ARRAY(SELECT a.attname::text FROM unnest(k.conkey) WITH ORDINALITY u(n, o)
+                     JOIN pg_attribute a ON a.attrelid = k.conrelid AND a.attnum = u.n ORDER BY u.o),
+               ARRAY(SELECT a.attname::text FROM unnest(k.confkey) WITH ORDINALITY u(n, o)
+                     JOIN pg_attribute a ON a.attrelid = k.confrelid AND a.attnum = u.n ORDER BY u.o)
+        FROM pg_constraint k
+        WHERE k.contype = 'f' AND k.confrelid = %s::regclass AND k.conrelid <> k.confrelid
+        ORDER BY 1, 2""", (table,))
+    return cur.fetchall()
+
+
+def _serial_sequences(cur, table: str) -> list[tuple[str, str]]:
+    """(column, sequence) for serial columns; dropping table would drop the sequences it owns."""
+    cur.execute("""
+        SELECT attname, pg_get_serial_sequence(%s, attname) FROM pg_attribute
+        WHERE attrelid = %s::regclass AND attnum > 0 AND NOT attisdropped AND attidentity = ''
+          AND pg_get_serial_sequence(%s, attname) IS NOT NULL""", (table, table, table))
+    return cur.fetchall()
+
+
+def _dependent_views(cur, table: str) -> list[str]:
+    """Views (and materialized views) whose rules read table; DROP TABLE fails while they exist."""
+    cur.execute("""
+        SELECT DISTINCT v.oid::regclass::text FROM pg_depend d
+        JOIN pg_rewrite r ON r.oid = d.objid JOIN pg_class v ON v.oid = r.ev_class
+        WHERE d.classid = 'pg_rewrite'::regclass AND d.refclassid = 'pg_class'::regclass
+          AND d.refobjid = %s::regclass AND v.oid <> d.refobjid
+        ORDER BY 1""", (table,))
+    return [name for name, in cur.fetchall()]
+
+
+def _has_grants(cur, table: str) -> bool:
+    """True when table carries privileges beyond its owner's defaults (lost with DROP TABLE)."""
+    cur.execute("SELECT relacl IS NOT NULL FROM pg_class WHERE oid = %s::regclass", (table,))
+    return cur.fetchone()[0]
+
+
+def _apply_delete_action(cur, table: str, child: str, action: str, cols: list[str], ref_cols: list[str]) -> None:
+    """What DELETE FROM table would have done to child rows whose referenced key is gone."""
+    gone = " AND ".join([f"c.{c} IS NOT NULL" for c in cols] + [
+        f"NOT EXISTS (SELECT 1 FROM {table} t WHERE {' AND '.join(f't.{r} = c.{c}' for c, r in zip(cols, ref_cols))})"])
+    if action == "c":
+        cur.execute(f"DELETE FROM {child} c WHERE {gone}")
+    elif action in ("n", "d"):
+        value = "NULL" if action == "n" else "DEFAULT"
+        cur.execute(f"UPDATE {child} c SET {', '.join(f'{c} = {value}' for c in cols)} WHERE {gone}")
+    # NO ACTION / RESTRICT: re-adding the constraint fails on orphans, as the DELETE would have
+
+
+# ────────── Swap ──────────
+def swap_in(cur, table: str, staging: str) -> dict:
+    """Index staging like table and put it in table's place (see module docstring); the caller commits."""
+    views = _dependent_views(cur, table)
+    if views:
+        print(f"⚠️  views on {table} ({', '.join(views)}) block DROP TABLE {table}: drop them before --bulk "
+              f"and re-create them after")
+    if _has_grants(cur, table):
+        print(f"⚠️  grants on {table} are dropped with it, re-apply them after --bulk")
+
+    constraints = _constraints(cur, table)
+    indexes = _plain_indexes(cur, table)
+    renames = []
+    for name, _, definition in constraints:
+        cur.execute(f'ALTER TABLE {staging} ADD CONSTRAINT "{_temp_name(name)}" {definition}')
+        renames.append(f'ALTER TABLE {table} RENAME CONSTRAINT "{_temp_name(name)}" TO "{name}"')
+    for name, indexdef in indexes:
+        cur.execute(_INDEXDEF.sub(lambda m: f'{m[1]}"{_temp_name(name)}"{m[3]}{staging}', indexdef, count=1))
+        renames.append(f'ALTER INDEX "{_temp_name(name)}" RENAME TO "{name}"')
+
+    existing = {name for name, _ in indexes} | {name for name, kind, _ in constraints if kind in "pux"}
+    missing = [(name, spec) for name, spec in READ_INDEXES.get(table, []) if name not in existing]
+    if any("gin_trgm_ops" in spec for _, spec in missing) and not ensure_trigram(cur):
+        missing = [(name, spec) for name, spec in missing if "gin_trgm_ops" not in spec]
+    for name, spec in missing:
+        cur.execute(f"CREATE INDEX {name} ON {staging} {spec}")
+
+    foreign_keys = _inbound_foreign_keys(cur, table)
+    sequences = _serial_sequences(cur, table)
+    cur.execute(f"LOCK TABLE {table} IN ACCESS EXCLUSIVE MODE")
+    for child, name, *_ in foreign_keys:
+        cur.execute(f'ALTER TABLE {child} DROP CONSTRAINT "{name}"')
+    for _, seq in sequences:
+        cur.execute(f"ALTER SEQUENCE {seq} OWNED BY NONE")
+    cur.execute(f"DROP TABLE {table}")
+    cur.execute(f"ALTER TABLE {staging} RENAME TO {table}")
+    for statement in renames:
+        cur.execute(statement)
+    for col, seq in sequences:
+        cur.execute(f"ALTER SEQUENCE {seq} OWNED BY {table}.{col}")
+    for child, name, action, definition, cols, ref_cols in foreign_keys:
+        _apply_delete_action(cur, table, child, action, cols, ref_cols)
+        cur.execute(f'ALTER TABLE {child} ADD CONSTRAINT "{name}" {definition}')
+    cur.execute(f"ANALYZE {table}")
+    return {"indexes": len(indexes) + len(missing) + sum(kind in "pux" for _, kind, _ in constraints),
+            "foreign_keys": len(foreign_keys)}
+
+
+def replace_table(cur, table: str, columns: list[str], payload: bytes) -> tuple[int, dict]:
+    """Stage, COPY and swap in one go on cur's transaction; returns (rows, swap_in summary)."""
+    staging = create_staging(cur, table)
+    rows = copy_into(cur, staging, columns, payload)
+    return rows, swap_in(cur, table, staging)
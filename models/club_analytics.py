@@ -0,0 +1,203 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Club / Squad Analytics
+======================
+
+Precomputes the team page (GET /api/teams/:clubName/analysis) for every club
+in one groupby pass over players joined with position_compatibility. One row
+per club goes to club_analytics (primary key club_name = clubs.name), so the
+API answers with a key lookup instead of an ILIKE scan plus aggregation.
+
+Squads are matched on players.club_id = clubs.club_id (club names in the two
+CSVs are spelled/encoded differently); players whose club_id is not in clubs
+are grouped under their current_club_name.
+
+Per club:
+- player_count, player_ids  the squad (players.player_id)
+- depth                     players per position by best_pos
+- avg_fit / top_fit         mean / best <pos>_fit of the squad
+- age                       mean, min, max and counts per age band (u21, 22-25, 26-29, 30+)
+- market_value              total, mean, median, max (EUR)
+- weakest_pos / weakest_fit position whose best fit is lowest (thinner depth breaks ties)
+
+Every scoring run (predict_player_positions.py, sharded_scoring.py merge,
+snapshots.py restore) rebuilds it on the transaction that writes the scores.
+Standalone, e.g. after clubs were reloaded:
+  python models/club_analytics.py
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+
+import numpy as np
+import pandas as pd
+
+from database import connect_db
+from instrumentation import profiled, span
+from leaderboards import AGE_BANDS, age_band
+from position_fit import POSITIONS
+
+# ────────── Configuration ──────────
+FIT_COLS = [f"{p.lower()}_fit" for p in POSITIONS]
+ANALYTICS_COLS = ["club_name", "club_id", "player_count", "player_ids", "depth", "avg_fit", "top_fit",
+                  "age", "market_value", "weakest_pos", "weakest_fit"]
+
+PLAYERS_SQL = "SELECT player_id, club_id, current_club_name, age, market_value_in_eur FROM players"
+COMPAT_SQL = f"SELECT player_id, best_pos, {', '.join(FIT_COLS)} FROM position_compatibility"
+CLUBS_SQL = "SELECT club_id, name FROM clubs"
+
+
+def _read(cur, query: str) -> pd.DataFrame:
+    cur.execute(query)
+    return pd.DataFrame(cur.fetchall(), columns=[d[0] for d in cur.description])
+
+
+def _round(v, digits: int = 1):
+    """JSON-ready number (None for NaN; int when digits == 0)."""
+    if pd.isna(v):
+        return None
+    return round(float(v)) if digits == 0 else round(float(v), digits)
+
+
+def build_club_analytics(players: pd.DataFrame, compat: pd.DataFrame, clubs: pd.DataFrame) -> pd.DataFrame:
+    """One ANALYTICS_COLS row per club (clubs without players included, with empty stats)."""
+    df = players.merge(compat[["player_id", "best_pos", *FIT_COLS]], on="player_id", how="left")
+    names = clubs.drop_duplicates("club_id").set_index("club_id")["name"]
+    df["club_name"] = df["club_id"].map(names).fillna(df["current_club_name"])
+    df = df[df["club_name"].notna()]
+    for col in ["age", "market_value_in_eur", *FIT_COLS]:
+        df[col] = pd.to_numeric(df[col], errors="coerce")
+
+    index = pd.Index(sorted(set(df["club_name"]) | set(names.dropna())), name="club_name")
+    g = df.groupby("club_name")
+    count = g.size().reindex(index, fill_value=0)
+    ids_by_name = pd.Series(names.index, index=names.to_numpy())
+    club_id = ids_by_name[~ids_by_name.index.duplicated()].reindex(index).fillna(g["club_id"].first().reindex(index))
+    player_ids = g["player_id"].agg(list).reindex(index)
+    depth = pd.crosstab(df["club_name"], df["best_pos"]).reindex(index=index, columns=POSITIONS, fill_value=0)
+    avg_fit = g[FIT_COLS].mean().reindex(index)
+    top_fit = g[FIT_COLS].max().reindex(index)
+    bands = pd.crosstab(df["club_name"], age_band(df["age"])).reindex(
+        index=index, columns=[label for label, _ in AGE_BANDS], fill_value=0)
+    age = g["age"].agg(["mean", "min", "max"]).reindex(index)
+    value = g["market_value_in_eur"].agg(["sum", "mean", "median", "max"]).reindex(index)
+
+    # weakest slot: lowest best fit, then fewest players; positions nobody can be scored for are skipped
+    top = top_fit.to_numpy(dtype=np.float64)
+    order = np.lexsort((depth.to_numpy(), np.where(np.isnan(top), np.inf, top)))  # per club (row)
+    weakest = order[:, 0]
+    weakest_fit = top[np.arange(len(top)), weakest]
+    has_fit = ~np.isnan(weakest_fit)
+
+    rows = []
+    for i, name in enumerate(index):
+        rows.append({
+            "club_name": name,
+            "club_id": None if pd.isna(club_id.iat[i]) else int(club_id.iat[i]),
+            "player_count": int(count.iat[i]),
+            "player_ids": [int(p) for p in player_ids.iat[i]] if count.iat[i] else [],
+            "depth": {pos: int(n) for pos, n in zip(POSITIONS, depth.iloc[i])},
+            "avg_fit": {pos: _round(v) for pos, v in zip(POSITIONS, avg_fit.iloc[i])},
+            "top_fit": {pos: _round(v) for pos, v in zip(POSITIONS, top_fit.iloc[i])},
+            "age": {"mean": _round(age["mean"].iat[i]), "min": _round(age["min"].iat[i], 0),
+                    "max": _round(age["max"].iat[i], 0), "bands": {b: int(n) for b, n in bands.iloc[i].items()}},
+            "market_value": {"total": _round(value["sum"].iat[i] if count.iat[i] else None, 0),
+                             "mean": _round(value["mean"].iat[i], 0), "median": _round(value["median"].iat[i], 0),
+                             "max": _round(value["max"].iat[i], 0)},
+            "weakest_pos": POSITIONS[weakest[i]] if has_fit[i] else None,
+            "weakest_fit": _round(weakest_fit[i]) if has_fit[i] else None,
+        })
+    return pd.DataFrame(rows, columns=ANALYTICS_COLS)
+
+
+def _rows(ca: pd.DataFrame, encode_json) -> list[tuple]:
+    """ANALYTICS_COLS tuples for an INSERT; JSON columns go through encode_json, NaN becomes NULL."""
+    json_cols = {"depth", "avg_fit", "top_fit", "age", "market_value"}
+    int_cols = {"club_id", "player_count"}
+    rows = []
+    for row in ca[ANALYTICS_COLS].astype(object).itertuples(index=False, name=None):
+        rows.append(tuple(encode_json(v) if c in json_cols else None if isinstance(v, float) and np.isnan(v)
+                          else int(v) if c in int_cols and v is not None else v
+                          for c, v in zip(ANALYTICS_COLS, row)))
+    return rows
+
+
+def load_club_analytics(ca: pd.DataFrame, cur) -> None:
+    """Replace club_analytics on cur's transaction (the caller commits)."""
+    from psycopg2.extras import Json, execute_values
+
+    cur.execute("DELETE FROM club_analytics;")
+    execute_values(cur, f"INSERT INTO club_analytics ({', '.join(ANALYTICS_COLS)}) VALUES %s", _rows(ca, Json),
+                   page_size=1000)
+
+
+def rebuild_club_analytics(cur) -> int:
+    """Read players/compatibility/clubs and rebuild club_analytics on cur's transaction (the caller commits).
+
+    predict_player_positions.load_to_db calls it on the transaction that writes
+    the scores, so club_analytics never describes an older position_compatibility.
+    Returns the number of clubs.
+    """
+    with span("read_club_inputs") as sp:
+        players, compat, clubs = _read(cur, PLAYERS_SQL), _read(cur, COMPAT_SQL), _read(cur, CLUBS_SQL)
+        sp.rows = len(players)
+    with span("club_analytics", rows=len(players)) as sp:
+        ca = build_club_analytics(players, compat, clubs)
+        sp.info["clubs"] = len(ca)
+    with span("write_club_analytics", rows=len(ca)):
+        load_club_analytics(ca, cur)
+    return len(ca)
+
+
+async def rebuild_club_analytics_async(conn) -> int:
+    """rebuild_club_analytics over an asyncpg connection (inside the caller's transaction)."""
+    async def read(query: str) -> pd.DataFrame:
+        stmt = await conn.prepare(query)
+        attrs = stmt.get_attributes()
+        df = pd.DataFrame([tuple(r) for r in await stmt.fetch()], columns=[a.name for a in attrs])
+        for a in attrs:
+            if a.type.name == "float4":  # real columns as psycopg2 reads them (shortest decimal text)
+                df[a.name] = df[a.name].astype(np.float32).astype(str).astype(np.float64)
+        return df
+
+    with span("read_club_inputs") as sp:
+        players, compat, clubs = await read(PLAYERS_SQL), await read(COMPAT_SQL), await read(CLUBS_SQL)
+        sp.rows = len(players)
+    with span("club_analytics", rows=len(players)) as sp:
+        ca = await asyncio.get_running_loop().run_in_executor(None, build_club_analytics, players, compat, clubs)
+        sp.info["clubs"] = len(ca)
+    with span("write_club_analytics", rows=len(ca)):
+        await conn.execute("DELETE FROM club_analytics;")
+        placeholders = ", ".join(f"${i}" for i in range(1, len(ANALYTICS_COLS) + 1))
+        await conn.executemany(f"INSERT INTO club_analytics ({', '.join(ANALYTICS_COLS)}) VALUES ({placeholders})",
+                               _rows(ca, json.dumps))
+    return len(ca)
+
+
+def refresh_club_analytics(conn) -> int:
+    """rebuild_club_analytics and commit (standalone runs, snapshot restores); returns the number of clubs."""
+    cur = conn.cursor()
+    try:
+        n = rebuild_club_analytics(cur)
+        conn.commit()
+    finally:
+        cur.close()
+    return n
+
+
+def main() -> int:
+    with profiled("club_analytics"):
+        conn = connect_db()
+        try:
+            n = refresh_club_analytics(conn)
+        finally:
+            conn.close()
+    print(f"OK - analytics for {n} clubs loaded to DB table 'club_analytics'")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -7,45 +7,39 @@ Loads all data files with correct schema mapping:
 - competitions.csv -> competitions table
 - clubs.csv -> clubs table
 - players.csv -> players table
-- results.csv -> position_compatibility table
+- results.csv -> position_compatibility table (and club_analytics, rebuilt with the scores)
 
 Connection: set DATABASE_URL in env, or DB_HOST, DB_PORT, DB_NAME, DB_USER, DB_PASSWORD (see .env.example).
+
+--async streams each CSV through async_pipeline.py instead: chunks are parsed
+and converted in a worker thread while the previous chunk is COPYed, and
+predict_player_positions.py runs with --async as well (needs asyncpg).
+
+--bulk COPYs each CSV into a fresh staging table, builds its indexes and
+constraints once the rows are in, swaps it into place and runs ANALYZE (see
+bulk_load.py), instead of DELETE + row-by-row INSERT into the live table; it
+also creates the indexes the API read paths need (bulk_load.READ_INDEXES).
 """
 
+import argparse
+import asyncio
 import pandas as pd
-import psycopg2
 from psycopg2.extras import execute_values
 import os
 from datetime import datetime
 import sys
 
-
-def _get_db_config():
-    """Build DB config from env (no hardcoded credentials)."""
-    dsn = os.environ.get('DATABASE_URL')
-    if dsn:
-        return None, dsn
-    pw = os.environ.get('DB_PASSWORD') or os.environ.get('DB_PASS')
-    if not pw:
-        raise SystemExit('Set DATABASE_URL or DB_PASSWORD (and DB_HOST, DB_USER, DB_NAME) in .env')
-    return {
-        'host': os.environ.get('DB_HOST', 'localhost'),
-        'port': int(os.environ.get('DB_PORT', '5432')),
-        'database': os.environ.get('DB_NAME', 'reposition_db'),
-        'user': os.environ.get('DB_USER', 'reposition_user'),
-        'password': pw,
-    }, None
+from async_pipeline import BATCH_ROWS, copy_sink, csv_chunks, rows_to_csv, run_pipeline
+from bulk_load import replace_table
+import database
+from database import connect_async, db_settings
+from instrumentation import METRICS_ENV, child_env, emit, profiled, read_events, span
 
 
 def connect_db():
     """Connect to PostgreSQL using DATABASE_URL or DB_* env vars."""
     try:
-        config, dsn = _get_db_config()
-        if dsn:
-            conn = psycopg2.connect(dsn)
-        else:
-            conn = psycopg2.connect(**config)
-        return conn
+        return database.connect_db()
     except Exception as e:
         print(f"✗ Database connection failed: {e}")
         sys.exit(1)
@@ -117,239 +111,270 @@ def _load_csv_with_mapping(conn, csv_file: str, table: str, mapping: list[tuple[
         return False
 
     try:
-        df = pd.read_csv(csv_file)
-        cur = conn.cursor()
+        with span(f"load_{table}") as sp:
+            df = pd.read_csv(csv_file)
+            cur = conn.cursor()
 
-        # Clear existing table for idempotent run
-        cur.execute(f"DELETE FROM {table}")
+            # Clear existing table for idempotent run
+            cur.execute(f"DELETE FROM {table}")
 
-        columns = ", ".join(db_col for db_col, _, _ in mapping)
-        rows = _build_rows(df, mapping)
+            columns = ", ".join(db_col for db_col, _, _ in mapping)
+            rows = _build_rows(df, mapping)
+            sp.rows = len(rows)
 
-        if not rows:
-            print(f"⚠️  No rows to insert for {table}")
-            cur.close()
-            return True
+            if not rows:
+                print(f"⚠️  No rows to insert for {table}")
+                cur.close()
+                return True
 
-        execute_values(
-            cur,
-            f"INSERT INTO {table} ({columns}) VALUES %s",
-            rows
-        )
+            execute_values(
+                cur,
+                f"INSERT INTO {table} ({columns}) VALUES %s",
+                rows
+            )
 
-        conn.commit()
-        cur.close()
+            conn.commit()
+            cur.close()
         print(f"✅ {table.capitalize()} loaded successfully ({len(rows)} records)")
         return True
     except Exception as e:
         print(f"✗ Error loading {table}: {e}")
         return False
 
-def load_competitions(conn):
+COMPETITION_MAPPING = [
+    ("competition_id", "competition_id", safe_str),
+    ("competition_code", "competition_code", safe_str),
+    ("name", "name", safe_str),
+    ("sub_type", "sub_type", safe_str),
+    ("type", "type", safe_str),
+    ("country_id", "country_id", safe_int),
+    ("country_name", "country_name", safe_str),
+    ("domestic_league_code", "domestic_league_code", safe_str),
+    ("confederation", "confederation", safe_str),
+    ("url", "url", safe_str),
+    ("is_major_national_league", "is_major_national_league", safe_str),
+]
+
+CLUB_MAPPING = [
+    ("club_id", "club_id", safe_int),
+    ("club_code", "club_code", safe_str),
+    ("name", "name", safe_str),
+    ("domestic_competition_id", "domestic_competition_id", safe_str),
+    ("total_market_value", "total_market_value", safe_int),
+    ("squad_size", "squad_size", safe_int),
+    ("average_age", "average_age", safe_float),
+    ("foreigners_number", "foreigners_number", safe_int),
+    ("foreigners_percentage", "foreigners_percentage", safe_float),
+    ("national_team_players", "national_team_players", safe_int),
+    ("stadium_name", "stadium_name", safe_str),
+    ("stadium_seats", "stadium_seats", safe_int),
+    ("net_transfer_record", "net_transfer_record", safe_str),
+    ("coach_name", "coach_name", safe_str),
+    ("last_season", "last_season", safe_int),
+]
+
+def load_competitions(conn, csv_file: str = 'data/competitions.csv'):
     """Load competitions data from competitions.csv (generic loader)."""
-    mapping = [
-        ("competition_id", "competition_id", safe_str),
-        ("competition_code", "competition_code", safe_str),
-        ("name", "name", safe_str),
-        ("sub_type", "sub_type", safe_str),
-        ("type", "type", safe_str),
-        ("country_id", "country_id", safe_int),
-        ("country_name", "country_name", safe_str),
-        ("domestic_league_code", "domestic_league_code", safe_str),
-        ("confederation", "confederation", safe_str),
-        ("url", "url", safe_str),
-        ("is_major_national_league", "is_major_national_league", safe_str),
-    ]
-    return _load_csv_with_mapping(conn, 'data/competitions.csv', 'competitions', mapping)
-
-def load_clubs(conn):
+    return _load_csv_with_mapping(conn, csv_file, 'competitions', COMPETITION_MAPPING)
+
+def load_clubs(conn, csv_file: str = 'data/clubs.csv'):
     """Load clubs data from clubs.csv (generic loader)."""
-    mapping = [
-        ("club_id", "club_id", safe_int),
-        ("club_code", "club_code", safe_str),
-        ("name", "name", safe_str),
-        ("domestic_competition_id", "domestic_competition_id", safe_str),
-        ("total_market_value", "total_market_value", safe_int),
-        ("squad_size", "squad_size", safe_int),
-        ("average_age", "average_age", safe_float),
-        ("foreigners_number", "foreigners_number", safe_int),
-        ("foreigners_percentage", "foreigners_percentage", safe_float),
-        ("national_team_players", "national_team_players", safe_int),
-        ("stadium_name", "stadium_name", safe_str),
-        ("stadium_seats", "stadium_seats", safe_int),
-        ("net_transfer_record", "net_transfer_record", safe_str),
-        ("coach_name", "coach_name", safe_str),
-        ("last_season", "last_season", safe_int),
-    ]
-    return _load_csv_with_mapping(conn, 'data/clubs.csv', 'clubs', mapping)
-
-def load_players(conn):
+    return _load_csv_with_mapping(conn, csv_file, 'clubs', CLUB_MAPPING)
+
+# Special converters that may depend on the whole row
+_age_conv = lambda v, r: safe_int(v) or compute_age(r.get('date_of_birth'))
+_created_at_conv = lambda v, r: safe_str(v) or datetime.now().isoformat()
+
+PLAYER_MAPPING = [
+    ("player_id", "player_id", safe_int),
+    ("name", "name", safe_str),
+    ("country_of_citizenship", "country_of_citizenship", safe_str),
+    ("date_of_birth", "date_of_birth", safe_str),
+    ("sub_position", "sub_position", safe_str),
+    ("position", "position", safe_str),
+    ("foot", "foot", safe_str),
+    ("height_in_cm", "height_in_cm", safe_int),
+    ("current_club_name", "current_club_name", safe_str),
+    ("market_value_in_eur", "market_value_in_eur", safe_int),
+    ("highest_market_value_in_eur", "highest_market_value_in_eur", safe_int),
+    ("club_id", "club_id", safe_int),
+    ("ovr", "ovr", safe_int),
+    ("pac", "pac", safe_int),
+    ("sho", "sho", safe_int),
+    ("pas", "pas", safe_int),
+    ("dri", "dri", safe_int),
+    ("def", "def", safe_int),
+    ("phy", "phy", safe_int),
+    ("acceleration", "acceleration", safe_int),
+    ("sprint_speed", "sprint_speed", safe_int),
+    ("positioning", "positioning", safe_int),
+    ("finishing", "finishing", safe_int),
+    ("shot_power", "shot_power", safe_int),
+    ("long_shots", "long_shots", safe_int),
+    ("volleys", "volleys", safe_int),
+    ("penalties", "penalties", safe_int),
+    ("vision", "vision", safe_int),
+    ("crossing", "crossing", safe_int),
+    ("free_kick_accuracy", "free_kick_accuracy", safe_int),
+    ("short_passing", "short_passing", safe_int),
+    ("long_passing", "long_passing", safe_int),
+    ("curve", "curve", safe_int),
+    ("dribbling", "dribbling", safe_int),
+    ("agility", "agility", safe_int),
+    ("balance", "balance", safe_int),
+    ("reactions", "reactions", safe_int),
+    ("ball_control", "ball_control", safe_int),
+    ("composure", "composure", safe_int),
+    ("interceptions", "interceptions", safe_int),
+    ("heading_accuracy", "heading_accuracy", safe_int),
+    ("def_awareness", "def_awareness", safe_int),
+    ("standing_tackle", "standing_tackle", safe_int),
+    ("sliding_tackle", "sliding_tackle", safe_int),
+    ("jumping", "jumping", safe_int),
+    ("stamina", "stamina", safe_int),
+    ("strength", "strength", safe_int),
+    ("aggression", "aggression", safe_int),
+    ("weak_foot", "weak_foot", safe_int),
+    ("skill_moves", "skill_moves", safe_int),
+    ("preferred_foot", "preferred_foot", safe_str),
+    ("league", "league", safe_str),
+    ("team", "team", safe_str),
+    ("weight_in_kg", "weight_in_kg", safe_float),
+    ("age", "age", _age_conv),
+    ("image_url", "image_url", safe_str),
+    ("created_at", "created_at", _created_at_conv),
+]
+
+
+def keep_valid_players(df: pd.DataFrame) -> pd.DataFrame:
+    """Only rows with the minimal required fields."""
+    return df[(df.get('player_id').notna()) & (df.get('name').notna())]
+
+def read_players_csv(csv_file: str = 'data/players.csv') -> pd.DataFrame:
+    """Read players.csv keeping only rows with the minimal required fields."""
+    return keep_valid_players(pd.read_csv(csv_file))
+
+def load_players(conn, csv_file: str = 'data/players.csv'):
     """Load players data from players.csv (generic loader with mapping)."""
-    # Special converters that may depend on the whole row
-    age_conv = lambda v, r: safe_int(v) or compute_age(r.get('date_of_birth'))
-    created_at_conv = lambda v, r: safe_str(v) or datetime.now().isoformat()
-
-    mapping = [
-        ("player_id", "player_id", safe_int),
-        ("name", "name", safe_str),
-        ("country_of_citizenship", "country_of_citizenship", safe_str),
-        ("date_of_birth", "date_of_birth", safe_str),
-        ("sub_position", "sub_position", safe_str),
-        ("position", "position", safe_str),
-        ("foot", "foot", safe_str),
-        ("height_in_cm", "height_in_cm", safe_int),
-        ("current_club_name", "current_club_name", safe_str),
-        ("market_value_in_eur", "market_value_in_eur", safe_int),
-        ("highest_market_value_in_eur", "highest_market_value_in_eur", safe_int),
-        ("club_id", "club_id", safe_int),
-        ("ovr", "ovr", safe_int),
-        ("pac", "pac", safe_int),
-        ("sho", "sho", safe_int),
-        ("pas", "pas", safe_int),
-        ("dri", "dri", safe_int),
-        ("def", "def", safe_int),
-        ("phy", "phy", safe_int),
-        ("acceleration", "acceleration", safe_int),
-        ("sprint_speed", "sprint_speed", safe_int),
-        ("positioning", "positioning", safe_int),
-        ("finishing", "finishing", safe_int),
-        ("shot_power", "shot_power", safe_int),
-        ("long_shots", "long_shots", safe_int),
-        ("volleys", "volleys", safe_int),
-        ("penalties", "penalties", safe_int),
-        ("vision", "vision", safe_int),
-        ("crossing", "crossing", safe_int),
-        ("free_kick_accuracy", "free_kick_accuracy", safe_int),
-        ("short_passing", "short_passing", safe_int),
-        ("long_passing", "long_passing", safe_int),
-        ("curve", "curve", safe_int),
-        ("dribbling", "dribbling", safe_int),
-        ("agility", "agility", safe_int),
-        ("balance", "balance", safe_int),
-        ("reactions", "reactions", safe_int),
-        ("ball_control", "ball_control", safe_int),
-        ("composure", "composure", safe_int),
-        ("interceptions", "interceptions", safe_int),
-        ("heading_accuracy", "heading_accuracy", safe_int),
-        ("def_awareness", "def_awareness", safe_int),
-        ("standing_tackle", "standing_tackle", safe_int),
-        ("sliding_tackle", "sliding_tackle", safe_int),
-        ("jumping", "jumping", safe_int),
-        ("stamina", "stamina", safe_int),
-        ("strength", "strength", safe_int),
-        ("aggression", "aggression", safe_int),
-        ("weak_foot", "weak_foot", safe_int),
-        ("skill_moves", "skill_moves", safe_int),
-        ("preferred_foot", "preferred_foot", safe_str),
-        ("league", "league", safe_str),
-        ("team", "team", safe_str),
-        ("weight_in_kg", "weight_in_kg", safe_float),
-        ("age", "age", age_conv),
-        ("image_url", "image_url", safe_str),
-        ("created_at", "created_at", created_at_conv),
-    ]
-
-    # Perform minimal validation by filtering out rows without minimal fields inside the generic path
-    csv_file = 'data/players.csv'
     if not os.path.exists(csv_file):
         print("✗ players.csv not found!")
         return False
 
     try:
-        df = pd.read_csv(csv_file)
-        # Keep only rows with required fields
-        df = df[(df.get('player_id').notna()) & (df.get('name').notna())]
+        with span("load_players") as sp:
+            df = read_players_csv(csv_file)
 
-        cur = conn.cursor()
-        cur.execute("DELETE FROM players")
+            cur = conn.cursor()
+            cur.execute("DELETE FROM players")
+
+            columns = ", ".join(db for db, _, _ in PLAYER_MAPPING)
+            rows = _build_rows(df, PLAYER_MAPPING)
+            sp.rows = len(rows)
+            if not rows:
+                print("⚠️  No rows to insert for players")
+                cur.close()
+                return True
+
+            # Insert in batches for large files
+            batch_size = 500
+            inserted_total = 0
+            for i in range(0, len(rows), batch_size):
+                batch = rows[i:i+batch_size]
+                execute_values(cur, f"INSERT INTO players ({columns}) VALUES %s", batch)
+                inserted_total += len(batch)
 
-        columns = ", ".join(db for db, _, _ in mapping)
-        rows = _build_rows(df, mapping)
-        if not rows:
-            print("⚠️  No rows to insert for players")
+            conn.commit()
             cur.close()
-            return True
-
-        # Insert in batches for large files
-        batch_size = 500
-        inserted_total = 0
-        for i in range(0, len(rows), batch_size):
-            batch = rows[i:i+batch_size]
-            execute_values(cur, f"INSERT INTO players ({columns}) VALUES %s", batch)
-            inserted_total += len(batch)
-
-        conn.commit()
-        cur.close()
         print(f"✅ Players loaded successfully ({inserted_total} records)")
         return True
     except Exception as e:
         print(f"✗ Error loading players: {e}")
         return False
 
-def load_position_compatibility(conn):
-    """Calculate and load position compatibility data using ML models"""
+def run_position_script(extra_args=()) -> bool:
+    """Run predict_player_positions.py; True once its write_db stage reported ok."""
     import subprocess
-    import sys
-    
+    import tempfile
+
+    # Get the path to the predict_player_positions.py script
+    script_path = os.path.join(os.path.dirname(__file__), 'predict_player_positions.py')
+
+    if not os.path.exists(script_path):
+        print("✗ predict_player_positions.py not found!")
+        return False
+
+    print("Calculating position compatibility using ML models...")
+
+    # The child reports its stages as JSON lines into a private file; they are
+    # relayed to our own metrics sink and used to confirm the DB write happened
+    fd, metrics_path = tempfile.mkstemp(prefix="reposition-metrics-", suffix=".jsonl")
+    os.close(fd)
     try:
-        # Get the path to the predict_player_positions.py script
-        script_path = os.path.join(os.path.dirname(__file__), 'predict_player_positions.py')
-        
-        if not os.path.exists(script_path):
-            print("✗ predict_player_positions.py not found!")
-            return False
-        
-        print("Calculating position compatibility using ML models...")
-        
-        # Run the Python script
-        result = subprocess.run([
-            sys.executable,  # Use the same Python interpreter
-            script_path
-        ], capture_output=True, text=True, cwd=os.path.dirname(script_path))
-        
-        if result.returncode != 0:
-            print(f"✗ Error running ML script: {result.stderr}")
-            return False
-        
-        # Check if the script was successful
-        if "OK - combo results also loaded to DB table 'position_compatibility'" in result.stdout:
-            # Count the records that were inserted
-            cur = conn.cursor()
-            
-            try:
-                cur.execute("SELECT COUNT(*) FROM position_compatibility")
-                count = cur.fetchone()[0]
-                print(f"✅ Position compatibility calculated and loaded successfully ({count} records)")
-            except Exception as e:
-                print(f"⚠️  Position compatibility calculated but couldn't verify count: {e}")
-            finally:
-                cur.close()
-            
-            return True
-        else:
-            print("✗ ML script didn't complete successfully")
+        with span("position_compatibility"):
+            # Run the Python script
+            result = subprocess.run([
+                sys.executable,  # Use the same Python interpreter
+                script_path,
+                *extra_args,
+            ], capture_output=True, text=True, cwd=os.path.dirname(script_path),
+                env=child_env(**{METRICS_ENV: metrics_path}))
+        events = read_events(metrics_path)
+    finally:
+        os.remove(metrics_path)
+    for event in events:
+        emit(event)
+
+    if result.returncode != 0:
+        print(f"✗ Error running ML script: {result.stderr}")
+        return False
+
+    # Check if the script was successful
+    if not any(e.get("stage") == "write_db" and e.get("status") == "ok" for e in events):
+        print("✗ ML script didn't complete successfully")
+        return False
+    return True
+
+def load_position_compatibility(conn, extra_args=()):
+    """Calculate and load position compatibility data using ML models"""
+    try:
+        if not run_position_script(extra_args):
             return False
-        
+
+        # Count the records that were inserted
+        cur = conn.cursor()
+
+        try:
+            cur.execute("SELECT COUNT(*) FROM position_compatibility")
+            count = cur.fetchone()[0]
+            print(f"✅ Position compatibility calculated and loaded successfully ({count} records)")
+        except Exception as e:
+            print(f"⚠️  Position compatibility calculated but couldn't verify count: {e}")
+        finally:
+            cur.close()
+
+        return True
+
     except Exception as e:
         print(f"✗ Error calculating position compatibility: {e}")
         return False
 
+# Count all main tables (excluding users as they register through the app)
+SUMMARY_TABLES = [
+    ('competitions', 'Competitions'),
+    ('clubs', 'Clubs'),
+    ('players', 'Players'),
+    ('position_compatibility', 'Position Compatibility'),
+    ('club_analytics', 'Club Analytics')
+]
+
 def show_final_summary(conn):
     """Show comprehensive database summary"""
     cur = conn.cursor()
     
     try:
-        # Count all main tables (excluding users as they register through the app)
-        tables_info = [
-            ('competitions', 'Competitions'),
-            ('clubs', 'Clubs'),
-            ('players', 'Players'),
-            ('position_compatibility', 'Position Compatibility')
-        ]
-        
         total_records = 0
         
-        for table, description in tables_info:
+        for table, description in SUMMARY_TABLES:
             try:
                 cur.execute(f"SELECT COUNT(*) FROM {table}")
                 count = cur.fetchone()[0]
@@ -365,35 +390,155 @@ def show_final_summary(conn):
     
     cur.close()
 
-def main():
+
+# ────────── Bulk mode (--bulk) ──────────
+def _load_csv_bulk(conn, csv_file: str, table: str, mapping: list[tuple[str, str, callable]], keep=None) -> bool:
+    """CSV -> staging table -> indexed and swapped in place of table, in one transaction."""
+    if not os.path.exists(csv_file):
+        print(f"✗ {os.path.basename(csv_file)} not found!")
+        return False
+
+    try:
+        with span(f"load_{table}") as sp:
+            df = pd.read_csv(csv_file)
+            if keep is not None:
+                df = keep(df)
+            payload = rows_to_csv(_build_rows(df, mapping))
+            cur = conn.cursor()
+            try:
+                sp.rows, info = replace_table(cur, table, [db_col for db_col, _, _ in mapping], payload)
+                conn.commit()
+            finally:
+                cur.close()
+            sp.info.update(info)
+        print(f"✅ {table.capitalize()} loaded successfully ({sp.rows} records, {info['indexes']} indexes built)")
+        return True
+    except Exception as e:
+        conn.rollback()
+        print(f"✗ Error loading {table}: {e}")
+        return False
+
+BULK_STEPS = [
+    ("Competitions", lambda conn: _load_csv_bulk(conn, 'data/competitions.csv', 'competitions', COMPETITION_MAPPING)),
+    ("Clubs", lambda conn: _load_csv_bulk(conn, 'data/clubs.csv', 'clubs', CLUB_MAPPING)),
+    ("Players", lambda conn: _load_csv_bulk(conn, 'data/players.csv', 'players', PLAYER_MAPPING,
+                                            keep=keep_valid_players)),
+    ("Position Compatibility", lambda conn: load_position_compatibility(conn, ["--bulk"])),
+]
+
+
+# ────────── Asyncio pipeline mode (--async) ──────────
+async def _load_csv_async(conn, csv_file: str, table: str, mapping: list[tuple[str, str, callable]],
+                          batch_rows: int = BATCH_ROWS, keep=None) -> bool:
+    """Streamed CSV -> table load: parse/convert chunk N+1 while chunk N is COPYed, in one transaction."""
+    if not os.path.exists(csv_file):
+        print(f"✗ {os.path.basename(csv_file)} not found!")
+        return False
+
+    def convert(chunk: pd.DataFrame) -> bytes:
+        if keep is not None:
+            chunk = keep(chunk)
+        return rows_to_csv(_build_rows(chunk, mapping))
+
+    try:
+        with span(f"load_{table}") as sp:
+            sink = copy_sink(conn, table, [db_col for db_col, _, _ in mapping])
+            async with conn.transaction():
+                # Clear existing table for idempotent run
+                await conn.execute(f"DELETE FROM {table}")
+                sp.info.update(await run_pipeline(csv_chunks(csv_file, batch_rows), convert, sink))
+            sp.rows = sink.rows
+        print(f"✅ {table.capitalize()} loaded successfully ({sink.rows} records)")
+        return True
+    except Exception as e:
+        print(f"✗ Error loading {table}: {e}")
+        return False
+
+async def main_async(batch_rows: int = BATCH_ROWS):
+    """Same loading sequence as main(), over one asyncpg connection."""
+    conn = await connect_async()
+    print("OK - Connected to database (async)")
+
+    try:
+        steps = [
+            ("Competitions", lambda: _load_csv_async(conn, 'data/competitions.csv', 'competitions',
+                                                     COMPETITION_MAPPING, batch_rows)),
+            ("Clubs", lambda: _load_csv_async(conn, 'data/clubs.csv', 'clubs', CLUB_MAPPING, batch_rows)),
+            ("Players", lambda: _load_csv_async(conn, 'data/players.csv', 'players', PLAYER_MAPPING,
+                                                batch_rows, keep=keep_valid_players)),
+        ]
+
+        with profiled("data_loader"):
+            for step_name, step in steps:
+                if not await step():
+                    print(f"❌ FAILED: {step_name} loading failed!")
+                    return
+            try:
+                ok = run_position_script(["--async", "--batch-rows", str(batch_rows)])
+            except Exception as e:
+                print(f"✗ Error calculating position compatibility: {e}")
+                ok = False
+            if not ok:
+                print("❌ FAILED: Position Compatibility loading failed!")
+                return
+            count = await conn.fetchval("SELECT COUNT(*) FROM position_compatibility")
+            print(f"✅ Position compatibility calculated and loaded successfully ({count} records)")
+
+        total_records = 0
+        for table, description in SUMMARY_TABLES:
+            count = await conn.fetchval(f"SELECT COUNT(*) FROM {table}")
+            total_records += count
+            print(f"  • {description}: {count:,} records")
+        print(f"✅ Database loaded successfully - {total_records:,} total records")
+
+    finally:
+        await conn.close()
+        print("Database connection closed")
+
+def main(argv=None):
     """Main execution function"""
+    parser = argparse.ArgumentParser(description="Load the CSV files in data/ into the database")
+    parser.add_argument("--async", dest="use_async", action="store_true",
+                        help="Overlap CSV parsing/conversion with COPY writes (asyncio + asyncpg)")
+    parser.add_argument("--batch-rows", type=int, default=BATCH_ROWS,
+                        help="Rows per streamed batch in --async mode")
+    parser.add_argument("--bulk", action="store_true",
+                        help="Load via staging tables, index after the load and swap into place")
+    args = parser.parse_args(argv)
+    if args.bulk and args.use_async:
+        parser.error("--bulk and --async are separate loading modes")
+
     print("Loading database...")
+    if args.use_async:
+        asyncio.run(main_async(args.batch_rows))
+        return
 
     # Connect to database once
     conn = connect_db()
-    config, _ = _get_db_config()
+    config, _ = db_settings()
     if config:
-        print(f"OK - Connected to {config['database']} on {config['host']}")
+        print(f"OK - Connected to {config['dbname']} on {config['host']}")
     else:
         print("OK - Connected to database")
     
     try:
         # Execute loading sequence (removed Users as they register through the app)
-        steps = [
+        steps = BULK_STEPS if args.bulk else [
             ("Competitions", load_competitions),
             ("Clubs", load_clubs),
             ("Players", load_players),
-            ("Position Compatibility", load_position_compatibility)
+            ("Position Compatibility", load_position_compatibility),
         ]
         
         success_count = 0
         
-        for step_name, step_function in steps:
-            if step_function(conn):
-                success_count += 1
-            else:
-                print(f"❌ FAILED: {step_name} loading failed!")
-                return
+        with profiled("data_loader"):
+            for step_name, step_function in steps:
+                if step_function(conn):
+                    success_count += 1
+                else:
+                    print(f"❌ FAILED: {step_name} loading failed!")
+                    return
         
         # Final results
         if success_count == len(steps):
@@ -0,0 +1,81 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Database Connection Settings
+============================
+
+The one place the Python tools read their PostgreSQL settings from the env
+(see .env.example): DATABASE_URL, or DB_HOST, DB_PORT, DB_NAME, DB_USER and
+DB_PASSWORD (DB_PASS). No credentials are hardcoded.
+
+- connect_db()        psycopg2 connection
+- create_db_engine()  SQLAlchemy engine (pandas.read_sql)
+- connect_async()     asyncpg connection (--async modes)
+
+Drivers are imported by the function that needs them, so importing this
+module (benchmark, sharded workers, cached upload scoring) stays cheap.
+"""
+
+from __future__ import annotations
+
+import os
+
+MISSING_SETTINGS = "Set DATABASE_URL or DB_PASSWORD (and DB_HOST, DB_USER, DB_NAME) in .env"
+
+
+def db_settings() -> tuple[dict | None, str | None]:
+    """(None, dsn) from DATABASE_URL, else (DB_* settings, None); SystemExit when neither is set."""
+    dsn = os.environ.get("DATABASE_URL")
+    if dsn:
+        return None, dsn
+    pw = os.environ.get("DB_PASSWORD") or os.environ.get("DB_PASS")
+    if not pw:
+        raise SystemExit(MISSING_SETTINGS)
+    return {
+        "host": os.environ.get("DB_HOST", "localhost"),
+        "port": int(os.environ.get("DB_PORT", "5432")),
+        "dbname": os.environ.get("DB_NAME", "reposition_db"),
+        "user": os.environ.get("DB_USER", "reposition_user"),
+        "password": pw,
+    }, None
+
+
+def connect_db():
+    """psycopg2 connection."""
+    import psycopg2
+
+    settings, dsn = db_settings()
+    return psycopg2.connect(dsn) if dsn else psycopg2.connect(**settings)
+
+
+def create_db_engine():
+    """SQLAlchemy engine (psycopg2 driver)."""
+    from sqlalchemy import create_engine
+    from sqlalchemy.engine import URL
+
+    settings, dsn = db_settings()
+    if dsn:
+        url = dsn.replace("postgresql://", "postgresql+psycopg2://", 1) if "postgresql://" in dsn else dsn
+        return create_engine(url)
+    return create_engine(URL.create(
+        "postgresql+psycopg2",
+        username=settings["user"],
+        password=settings["password"],
+        host=settings["host"],
+        port=settings["port"],
+        database=settings["dbname"],
+    ))
+
+
+async def connect_async():
+    """asyncpg connection."""
+    try:
+        import asyncpg
+    except ImportError:
+        raise SystemExit("--async needs asyncpg: pip install asyncpg")
+
+    settings, dsn = db_settings()
+    if dsn:
+        return await asyncpg.connect(dsn)
+    return await asyncpg.connect(host=settings["host"], port=settings["port"], database=settings["dbname"],
+                                 user=settings["user"], password=settings["password"])
@@ -0,0 +1,115 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Per-player Fit Explanations
+===========================
+
+Answers "why 75 at CM but 23 at CB?" without scoring anything per request.
+position_fit scores
+
+  fit = 50 + 10 * sum_j(gain_j * sign_j * z_j) / sum_j(gain_j)     (clipped to 0..100)
+
+so feature j adds  c_j = 10 * gain_j * sign_j * z_j / sum(gain)  fit points.
+build_explanations() computes c for all players and features of a position in
+one array operation (same z-scores as fit_matrix) and keeps the TOP_N largest
+|c_j|; the other features are summed into "rest", so 50 + sum(top) + rest is
+the fit before clipping.
+
+predict_player_positions.py stores one JSONB document per player in
+player_explanations (primary key player_id), replaced in the same transaction
+as position_compatibility:
+
+  {"CM": {"fit": 75.3, "top": [["short_passing", 6.2], ["interceptions", -1.4], ...], "rest": 3.1}, ...}
+
+GET /api/players/:id/explanation serves it with one primary-key read.
+"""
+
+from __future__ import annotations
+
+import json
+import math
+
+import numpy as np
+import pandas as pd
+
+from feature_matrix import FeatureMatrix
+from position_fit import POSITIONS, feature_columns, fit_matrix, position_arrays
+
+# ────────── Configuration ──────────
+TOP_N = 5  # contributors kept per player and position
+EXPLANATION_COLS = ["player_id", "contributions"]
+
+_TENTHS_LIMIT = 10_000  # |value| <= 1000 is formatted from the table below
+_NUMBERS = np.array([repr(k / 10) for k in range(-_TENTHS_LIMIT, _TENTHS_LIMIT + 1)], dtype=object)
+
+
+def position_contributions(fm: FeatureMatrix, meta: dict) -> np.ndarray:
+    """(n, len(meta["feats"])) fit points contributed by each feature of one position."""
+    gains, signs, mu, sigma = position_arrays(meta)
+    den = gains.sum()
+    if not den:
+        return np.zeros((len(fm), len(gains)))
+    return fm.zscore(meta["feats"], mu, sigma) * (10 * gains * signs / den)
+
+
+def top_contributors(contrib: np.ndarray, top_n: int = TOP_N) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(feature indices, contributions) of the top_n largest |contribution| per row, largest first, and the rest."""
+    n_top = min(top_n, contrib.shape[1])
+    if n_top == 0:
+        empty = np.empty((len(contrib), 0))
+        return empty.astype(np.intp), empty, np.zeros(len(contrib))
+    mag = np.abs(contrib)
+    idx = np.argpartition(-mag, n_top - 1, axis=1)[:, :n_top]
+    order = np.argsort(-np.take_along_axis(mag, idx, axis=1), axis=1, kind="stable")
+    idx = np.take_along_axis(idx, order, axis=1)
+    top = np.take_along_axis(contrib, idx, axis=1)
+    return idx, top, contrib.sum(axis=1) - top.sum(axis=1)
+
+
+def _json_numbers(x: np.ndarray) -> np.ndarray:
+    """Object array of JSON number literals rounded to 0.1 (NaN -> null), mostly via a lookup table."""
+    tenths = np.round(np.asarray(x, dtype=np.float64) * 10)
+    common = np.abs(tenths) <= _TENTHS_LIMIT  # False for NaN
+    out = np.empty(tenths.shape, dtype=object)
+    out[common] = _NUMBERS[(tenths[common] + _TENTHS_LIMIT).astype(np.intp)]
+    out[~common] = [repr(v / 10) if math.isfinite(v) else "null" for v in tenths[~common].tolist()]
+    return out
+
+
+def build_explanations(de: pd.DataFrame, feat_info: dict[str, dict], top_n: int = TOP_N) -> pd.DataFrame:
+    """EXPLANATION_COLS frame: player_id and the JSON document described above, values rounded to 0.1.
+
+    The JSON text is assembled from per-fragment columns (feature names and
+    numbers formatted once per position for all players) and joined once per
+    player; json.dumps per player would cost more than the contributions.
+    """
+    fm = FeatureMatrix.from_frame(de, feature_columns(feat_info))
+    fit = fit_matrix(fm, feat_info)
+
+    parts: list = []
+    for p, pos in enumerate(POSITIONS):
+        meta = feat_info.get(pos)
+        if not meta:
+            continue
+        idx, top, rest = top_contributors(position_contributions(fm, meta), top_n)
+        names = np.array([json.dumps(f) for f in meta["feats"]], dtype=object)
+        top_s = _json_numbers(top)
+        parts += [f'{"," if parts else ""}"{pos}":{{"fit":', _json_numbers(fit[:, p]), ',"top":[']
+        for k in range(idx.shape[1]):
+            parts += ["," if k else "", "[", names[idx[:, k]], ",", top_s[:, k], "]"]
+        parts += ['],"rest":', _json_numbers(rest), "}"]
+
+    n = len(fm)
+    columns = [np.full(n, part, dtype=object) if isinstance(part, str) else part for part in parts]
+    docs = ["{" + "".join(row) + "}" for row in zip(*columns)] if columns else ["{}"] * n
+    return pd.DataFrame({"player_id": de["player_id"].to_numpy(), "contributions": docs}, columns=EXPLANATION_COLS)
+
+
+def load_explanations(ex: pd.DataFrame, cur) -> None:
+    """Replace player_explanations on cur's transaction (the caller commits)."""
+    from psycopg2.extras import execute_values
+
+    cur.execute("DELETE FROM player_explanations;")
+    rows = list(ex[EXPLANATION_COLS].astype(object).itertuples(index=False, name=None))
+    execute_values(cur, f"INSERT INTO player_explanations ({', '.join(EXPLANATION_COLS)}) VALUES %s",
+                   rows, template="(%s, %s::jsonb)", page_size=5000)
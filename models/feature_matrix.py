@@ -0,0 +1,133 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Compact Feature Matrix for player attributes
+============================================
+
+FC attributes are ratings 1-99 but come out of pd.read_sql / pd.read_csv as
+int64/float64, i.e. 8 bytes per 1-byte value. FeatureMatrix keeps them as:
+- uint8   for integer columns within 0..255 (all FC ratings)
+- uint16  for integer columns within 0..65535 (height_in_cm, weight_in_kg)
+- float32 for everything else (fractional or out-of-range values)
+plus one boolean missing-value mask (only allocated when a NaN exists), a
+column-name index and an int32 player_id vector.
+
+Blocks are column-major so per-feature z-scoring walks contiguous memory.
+"""
+
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+_BLOCK_DTYPES = {"u8": np.uint8, "u16": np.uint16, "f32": np.float32}
+
+
+def _storage_kind(values: np.ndarray) -> str:
+    """Smallest block that holds every non-NaN value of a column exactly."""
+    finite = values[~np.isnan(values)]
+    if finite.size == 0 or np.any(finite != np.round(finite)):
+        return "f32" if finite.size else "u8"
+    lo, hi = finite.min(), finite.max()
+    if lo >= 0 and hi <= np.iinfo(np.uint8).max:
+        return "u8"
+    if lo >= 0 and hi <= np.iinfo(np.uint16).max:
+        return "u16"
+    return "f32"
+
+
+class FeatureMatrix:
+    """Player attributes stored in uint8/uint16/float32 blocks with a separate NaN mask."""
+
+    def __init__(self, player_id: np.ndarray, columns: list[str], blocks: dict[str, np.ndarray],
+                 index: dict[str, tuple[str, int]], missing: np.ndarray | None):
+        self.player_id = player_id
+        self.columns = list(columns)
+        self.blocks = blocks
+        self.index = index
+        self.missing = missing  # (n, len(columns)) bool, column order == self.columns
+        self._col_pos = {c: j for j, c in enumerate(self.columns)}
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, columns: list[str], id_col: str = "player_id") -> "FeatureMatrix":
+        """Build from a DataFrame; columns absent from df are stored as all-missing."""
+        n = len(df)
+        raw = {}
+        for c in columns:
+            if c in df.columns:
+                raw[c] = pd.to_numeric(df[c], errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+            else:
+                raw[c] = np.full(n, np.nan)
+
+        kinds = {c: _storage_kind(v) for c, v in raw.items()}
+        blocks, index = {}, {}
+        for kind, dtype in _BLOCK_DTYPES.items():
+            names = [c for c in columns if kinds[c] == kind]
+            if not names:
+                continue
+            block = np.empty((n, len(names)), dtype=dtype, order="F")
+            for j, c in enumerate(names):
+                block[:, j] = np.nan_to_num(raw[c], nan=0.0)
+                index[c] = (kind, j)
+            blocks[kind] = block
+
+        missing = None
+        if any(np.isnan(v).any() for v in raw.values()):
+            missing = np.empty((n, len(columns)), dtype=bool, order="F")
+            for j, c in enumerate(columns):
+                missing[:, j] = np.isnan(raw[c])
+
+        ids = pd.to_numeric(df[id_col], errors="coerce").to_numpy() if id_col in df.columns else np.arange(n)
+        id_dtype = np.int32 if n == 0 or np.nanmax(np.abs(ids)) <= np.iinfo(np.int32).max else np.int64
+        return cls(np.nan_to_num(ids).astype(id_dtype), columns, blocks, index, missing)
+
+    def take(self, rows: np.ndarray) -> "FeatureMatrix":
+        """Row subset (index array or boolean mask) with the same column layout."""
+        blocks = {kind: np.asfortranarray(b[rows]) for kind, b in self.blocks.items()}
+        missing = None if self.missing is None else np.asfortranarray(self.missing[rows])
+        return FeatureMatrix(self.player_id[rows], self.columns, blocks, dict(self.index), missing)
+
+    def __len__(self) -> int:
+        return len(self.player_id)
+
+    @property
+    def nbytes(self) -> int:
+        total = self.player_id.nbytes + sum(b.nbytes for b in self.blocks.values())
+        return total + (self.missing.nbytes if self.missing is not None else 0)
+
+    def is_missing(self, name: str) -> np.ndarray:
+        if self.missing is None:
+            return np.zeros(len(self), dtype=bool)
+        return self.missing[:, self._col_pos[name]]
+
+    def column(self, name: str, dtype=np.float64) -> np.ndarray:
+        """One column decoded to dtype with NaN where the value is missing."""
+        kind, j = self.index[name]
+        out = self.blocks[kind][:, j].astype(dtype)
+        if self.missing is not None:
+            out[self.is_missing(name)] = np.nan
+        return out
+
+    def dense(self, columns: list[str] | None = None, dtype=np.float32) -> np.ndarray:
+        """(n, k) matrix in the requested dtype with NaN for missing values (e.g. model input)."""
+        columns = self.columns if columns is None else columns
+        out = np.empty((len(self), len(columns)), dtype=dtype, order="F")
+        for j, c in enumerate(columns):
+            out[:, j] = self.column(c, dtype)
+        return out
+
+    def zscore(self, columns: list[str], mu: np.ndarray, sigma: np.ndarray) -> np.ndarray:
+        """(n, k) float64 z-scores; 0 where the value is missing or sigma == 0."""
+        mu = np.asarray(mu, dtype=np.float64)
+        sigma = np.asarray(sigma, dtype=np.float64)
+        out = np.empty((len(self), len(columns)), dtype=np.float64, order="F")
+        for j, c in enumerate(columns):
+            if sigma[j] == 0:
+                out[:, j] = 0.0
+                continue
+            kind, k = self.index[c]
+            z = (self.blocks[kind][:, k] - mu[j]) / sigma[j]
+            if self.missing is not None:
+                z[self.is_missing(c)] = 0.0
+            out[:, j] = z
+        return out
@@ -0,0 +1,233 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Stage Instrumentation for the Python tools
+==========================================
+
+Lightweight spans that emit one JSON line per pipeline stage:
+  {"event": "span", "script": "...", "stage": "score", "status": "ok",
+   "wall_s": 1.23, "cpu_s": 1.2, "rows": 5603, "rows_per_sec": 4555.3,
+   "peak_rss_mb": 212.4, "run_id": "...", "pid": 123, "ts": "..."}
+
+Usage:
+  with span("score") as sp:
+      df = score_players(...)
+      sp.rows = len(df)
+
+  @timed("stats", rows=len)
+  def build_feat_info(...): ...
+
+Environment:
+  REPOSITION_METRICS      stderr (default) | stdout | off | <path to append JSON lines to>
+  REPOSITION_RUN_ID       shared id for all scripts of one pipeline run (passed to the
+                          child scripts through child_env(); a new id otherwise)
+  REPOSITION_PROFILE      opt-in: cprofile | tracemalloc | all
+  REPOSITION_PROFILE_DIR  where profile dumps go (default: ./profiles)
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+import contextlib
+import datetime
+import functools
+import json
+import os
+import resource
+import sys
+import threading
+import time
+import uuid
+
+METRICS_ENV = "REPOSITION_METRICS"
+RUN_ID_ENV = "REPOSITION_RUN_ID"
+PROFILE_ENV = "REPOSITION_PROFILE"
+PROFILE_DIR_ENV = "REPOSITION_PROFILE_DIR"
+
+SCRIPT = Path(sys.argv[0]).stem if sys.argv and sys.argv[0] else "python"
+
+_emit_lock = threading.Lock()
+_run_id: str | None = None
+
+
+# ────────── Run id ──────────
+def run_id() -> str:
+    """Id of this pipeline run: REPOSITION_RUN_ID when a parent script passed one, else a new id (made once)."""
+    global _run_id
+    if _run_id is None:
+        _run_id = os.environ.get(RUN_ID_ENV) or uuid.uuid4().hex[:12]
+    return _run_id
+
+
+def child_env(**overrides: str) -> dict[str, str]:
+    """Environment for a child script of this run: os.environ plus REPOSITION_RUN_ID, so it shares run_id()."""
+    return {**os.environ, RUN_ID_ENV: run_id(), **overrides}
+
+
+# ────────── Memory sampling ──────────
+def current_rss_mb() -> float:
+    """Resident set size of this process in MB."""
+    try:
+        with open("/proc/self/statm") as fh:
+            return int(fh.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError):
+        # ru_maxrss is KB on Linux, bytes on macOS
+        scale = 2**20 if sys.platform == "darwin" else 2**10
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale
+
+
+class PeakRSS:
+    """Context manager sampling RSS in a background thread to get the peak of one stage."""
+
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self.start_mb = self.peak_mb = 0.0
+        self._stop = threading.Event()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.peak_mb = max(self.peak_mb, current_rss_mb())
+
+    def __enter__(self):
+        self.start_mb = self.peak_mb = current_rss_mb()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak_mb = max(self.peak_mb, current_rss_mb())
+        return False
+
+
+# ────────── Output ──────────
+def emit(record: dict) -> None:
+    """Write one JSON line to the sink selected by REPOSITION_METRICS."""
+    sink = os.environ.get(METRICS_ENV, "stderr")
+    if sink == "off":
+        return
+    record = {"ts": datetime.datetime.now().isoformat(timespec="milliseconds"),
+              "script": SCRIPT, "run_id": run_id(), "pid": os.getpid(), **record}
+    line = json.dumps(record, default=str)
+    with _emit_lock:
+        if sink in ("stderr", "stdout"):
+            stream = sys.stderr if sink == "stderr" else sys.stdout
+            print(line, file=stream, flush=True)
+        else:
+            with open(sink, "a", encoding="utf-8") as fh:
+                fh.write(line + "\n")
+
+
+def read_events(path) -> list[dict]:
+    """Parse a JSON-lines metrics file, skipping anything that is not a JSON object."""
+    events = []
+    try:
+        with open(path, encoding="utf-8") as fh:
+            for line in fh:
+                with contextlib.suppress(ValueError):
+                    obj = json.loads(line)
+                    if isinstance(obj, dict):
+                        events.append(obj)
+    except FileNotFoundError:
+        pass
+    return events
+
+
+# ────────── Spans ──────────
+class Span:
+    """Measures one stage; set .rows (and any extra fields via .info) inside the block."""
+
+    def __init__(self, stage: str, rows: int | None = None, **info):
+        self.stage = stage
+        self.rows = rows
+        self.info = info
+        self.record: dict = {}
+
+    def __enter__(self):
+        self._mem = PeakRSS().__enter__()
+        self._wall0, self._cpu0 = time.perf_counter(), time.process_time()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        wall = time.perf_counter() - self._wall0
+        cpu = time.process_time() - self._cpu0
+        self._mem.__exit__(exc_type, exc, tb)
+        self.record = {
+            "event": "span",
+            "stage": self.stage,
+            "status": "ok" if exc_type is None else "error",
+            "wall_s": round(wall, 4),
+            "cpu_s": round(cpu, 4),
+            "rows": self.rows,
+            "rows_per_sec": round(self.rows / wall, 1) if self.rows is not None and wall > 0 else None,
+            "peak_rss_mb": round(self._mem.peak_mb, 1),
+            **self.info,
+        }
+        if exc_type is not None:
+            self.record["error"] = f"{exc_type.__name__}: {exc}"
+        emit(self.record)
+        return False
+
+
+def span(stage: str, rows: int | None = None, **info) -> Span:
+    return Span(stage, rows, **info)
+
+
+def timed(stage: str, rows=None):
+    """Decorator form of span(); rows is an optional callable applied to the return value."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(stage) as sp:
+                result = fn(*args, **kwargs)
+                if rows is not None:
+                    sp.rows = rows(result)
+                return result
+        return wrapper
+    return decorator
+
+
+# ────────── Opt-in profiling ──────────
+@contextlib.contextmanager
+def profiled(name: str | None = None):
+    """Dump cProfile stats and/or a tracemalloc snapshot for the block when REPOSITION_PROFILE is set."""
+    mode = os.environ.get(PROFILE_ENV, "").lower()
+    if not mode:
+        yield
+        return
+
+    use_cprofile = mode in ("cprofile", "all")
+    use_tracemalloc = mode in ("tracemalloc", "all")
+    out_dir = Path(os.environ.get(PROFILE_DIR_ENV, "profiles"))
+    out_dir.mkdir(parents=True, exist_ok=True)
+    stem = out_dir / f"{name or SCRIPT}-{run_id()}-{os.getpid()}"
+
+    prof = None
+    if use_cprofile:
+        import cProfile
+        prof = cProfile.Profile()
+    if use_tracemalloc:
+        import tracemalloc
+        tracemalloc.start(25)
+    if prof:
+        prof.enable()
+    try:
+        yield
+    finally:
+        if prof:
+            prof.disable()
+            prof.dump_stats(f"{stem}.prof")
+            emit({"event": "profile", "kind": "cprofile", "path": f"{stem}.prof"})
+        if use_tracemalloc:
+            import tracemalloc
+            snapshot = tracemalloc.take_snapshot()
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            snapshot.dump(f"{stem}.tracemalloc")
+            with open(f"{stem}.tracemalloc.txt", "w", encoding="utf-8") as fh:
+                fh.write(f"traced peak: {peak / 2**20:.1f} MB\n")
+                for stat in snapshot.statistics("lineno")[:50]:
+                    fh.write(f"{stat}\n")
+            emit({"event": "profile", "kind": "tracemalloc", "path": f"{stem}.tracemalloc",
+                  "traced_peak_mb": round(peak / 2**20, 1)})
@@ -0,0 +1,134 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Per-position Top-K Leaderboards
+===============================
+
+"Best <POS> candidates" lists precomputed by predict_player_positions.py and
+stored in position_leaderboards, so the API answers them with an index lookup
+instead of sorting position_compatibility joined with players per request.
+
+Scopes (scope / scope_value):
+- all      / ""                               every scored player
+- league   / players.league
+- country  / players.country_of_citizenship
+- age_band / u21, 22-25, 26-29, 30+           from players.age
+
+Each group keeps its TOP_K players per position, ranked 1..K by combo score
+(descending, lower player_id first on ties). Selection uses np.argpartition,
+so only the K winners of a group are ever sorted.
+"""
+
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+from position_fit import POSITIONS
+
+# ────────── Configuration ──────────
+TOP_K = 50
+SCOPES = {"league": "league", "country": "country_of_citizenship"}  # scope -> players column
+AGE_BANDS = [("u21", 21), ("22-25", 25), ("26-29", 29), ("30+", None)]  # label, max age (inclusive)
+LEADERBOARD_COLS = ["position", "scope", "scope_value", "rank", "player_id", "score",
+                    "ovr", "age", "market_value_in_eur"]
+INFO_COLS = ["ovr", "age", "market_value_in_eur"]
+
+
+def top_k(scores: np.ndarray, ids: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k highest finite scores, best first; ties go to the lower id."""
+    valid = np.flatnonzero(np.isfinite(scores))
+    if len(valid) > k:
+        s = scores[valid]
+        cut = np.partition(s, len(s) - k)[len(s) - k]  # k-th highest score
+        above = valid[s > cut]
+        tied = valid[s == cut]
+        tied = tied[np.argsort(ids[tied], kind="stable")][:k - len(above)]
+        valid = np.concatenate([above, tied])
+    return valid[np.lexsort((ids[valid], -scores[valid]))]
+
+
+def age_band(age: pd.Series) -> pd.Series:
+    """AGE_BANDS label per player (None when the age is unknown)."""
+    age = pd.to_numeric(age, errors="coerce")
+    out = pd.Series(None, index=age.index, dtype=object)
+    lower = -np.inf
+    for label, upper in AGE_BANDS:
+        hi = np.inf if upper is None else upper
+        out[(age > lower) & (age <= hi)] = label
+        lower = hi
+    return out
+
+
+def _groups(keys: pd.Series) -> tuple[np.ndarray, list[tuple[str, int, int]]]:
+    """Row order that makes every non-null key contiguous, plus (value, start, stop) per key."""
+    codes, uniques = pd.factorize(keys)
+    if len(uniques) < np.iinfo(np.int16).max:
+        codes = codes.astype(np.int16)  # stable argsort of 16-bit ints is a radix sort
+    order = np.argsort(codes, kind="stable")
+    order = order[codes[order] >= 0]
+    starts = np.r_[0, np.flatnonzero(np.diff(codes[order])) + 1]
+    stops = np.r_[starts[1:], len(order)]
+    groups = [(str(uniques[codes[order[a]]]), a, b) for a, b in zip(starts, stops) if b > a]
+    return order, groups
+
+
+def build_leaderboards(scored: pd.DataFrame, players: pd.DataFrame, k: int = TOP_K) -> pd.DataFrame:
+    """Top-k rows per position for every scope group (LEADERBOARD_COLS layout).
+
+    scored: player_id + <POS>_combo (as written to position_compatibility);
+    players: the players table rows the scores were computed from.
+    """
+    info = players.drop_duplicates("player_id").set_index("player_id")
+    info = info.reindex(scored["player_id"].to_numpy())
+    ids = scored["player_id"].to_numpy(dtype=np.int64)
+    # float32 like the real columns of the DB; F-order so each position is contiguous
+    combo = np.asfortranarray(scored[[f"{p}_combo" for p in POSITIONS]].to_numpy(dtype=np.float32))
+
+    scopes = {"all": pd.Series("", index=info.index)}
+    for scope, col in SCOPES.items():
+        scopes[scope] = info[col] if col in info.columns else pd.Series(None, index=info.index, dtype=object)
+    scopes["age_band"] = age_band(info["age"]) if "age" in info.columns else pd.Series(None, index=info.index)
+
+    parts = []
+    for scope, keys in scopes.items():
+        order, groups = _groups(keys.reset_index(drop=True))
+        sorted_ids = ids[order]
+        for p, pos in enumerate(POSITIONS):
+            col = combo[order, p]  # one gather per scope and position; groups are slices of it
+            for value, a, b in groups:
+                best = top_k(col[a:b], sorted_ids[a:b], k)
+                if len(best):
+                    parts.append((pos, scope, value, order[a:b][best], col[a:b][best]))
+
+    if not parts:
+        return pd.DataFrame(columns=LEADERBOARD_COLS)
+    sizes = [len(w) for *_, w, _ in parts]
+    rows = np.concatenate([w for *_, w, _ in parts])
+    out = pd.DataFrame({
+        "position": np.repeat([pos for pos, *_ in parts], sizes),
+        "scope": np.repeat([scope for _, scope, *_ in parts], sizes),
+        "scope_value": np.repeat([value for _, _, value, *_ in parts], sizes),
+        "rank": np.concatenate([np.arange(1, n + 1) for n in sizes]),
+        "player_id": ids[rows],
+        "score": np.concatenate([s for *_, s in parts]),
+    })
+    for col in INFO_COLS:
+        vals = pd.to_numeric(info[col], errors="coerce").to_numpy() if col in info.columns else np.full(len(info), np.nan)
+        out[col] = pd.array(np.round(vals[rows]), dtype="Int64")
+    return out[LEADERBOARD_COLS]
+
+
+def load_leaderboards(lb: pd.DataFrame, cur) -> None:
+    """Replace position_leaderboards on cur's transaction (the caller commits).
+
+    DELETE rather than TRUNCATE: readers keep seeing the previous run's rows
+    until the commit instead of blocking on an exclusive lock.
+    """
+    from psycopg2.extras import execute_values
+
+    cur.execute("DELETE FROM position_leaderboards;")
+    rows = [tuple(None if pd.isna(v) else v for v in row)
+            for row in lb[LEADERBOARD_COLS].astype(object).itertuples(index=False, name=None)]
+    execute_values(cur, f"INSERT INTO position_leaderboards ({', '.join(LEADERBOARD_COLS)}) VALUES %s",
+                   rows, page_size=5000)
@@ -2,22 +2,36 @@
 Train an XGBoost one-vs-rest model for MULTIPLE football positions
 directly from the database.
 For each POS: save correlations and top feature importances.
+
+--out-of-core streams the labelled players in batches (server-side cursor, or
+--source CSV / Parquet snapshot) instead of loading the table:
+- one pass feeds streaming accumulators (streaming_stats.py): correlations,
+  per-position feature mean/std and the class counts, over every non-meta
+  column; the features are then the columns that are numeric and have values
+  over the whole stream, as select_features picks them in memory
+- XGBoost builds an external-memory ExtMemQuantileDMatrix from a DataIter
+  over the training rows (pages are cached on disk); the nine models share
+  it and only swap labels
+- one pass evaluates all models on the holdout rows (20% by player_id hash,
+  so every pass picks the same rows)
+Peak memory is a few batches plus the training labels, which do grow with
+the row count: 1 byte per training row for the position codes, 4 bytes for
+the float32 labels XGBoost keeps and 4 more while a position's labels are
+swapped in (about 9 bytes per row; the feature values are never all in memory).
+The per-position mean/std also go to reference_stats.json, so scoring never
+needs the full table.
 """
 
 from pathlib import Path
+import argparse
 import os
+import tempfile
 import pandas as pd, numpy as np
-from sqlalchemy import create_engine
-from sqlalchemy.engine import URL
-from sklearn.model_selection import train_test_split
-from sklearn.metrics import (
-    roc_auc_score,
-    accuracy_score,
-    precision_recall_fscore_support,
-    confusion_matrix,
-    classification_report,
-)
-from xgboost import XGBClassifier
+
+from database import create_db_engine
+from feature_matrix import FeatureMatrix
+from instrumentation import profiled, span
+from streaming_stats import BinaryMetrics, RunningCorrelation, RunningMoments
 
 # ========= positions to train =========
 POSITIONS = ["ST", "LW", "RW", "CAM", "CM", "CDM", "LB", "RB", "CB"]
@@ -27,68 +41,61 @@ BASE = Path(__file__).resolve().parent
 TOP_N_IMP = 35
 SEED = 42
 MIN_POS = 20  # minimal #positives required to train a model
+OOC_BATCH_ROWS = 50_000  # rows per streamed batch in --out-of-core mode
+HOLDOUT_PCT = 20  # --out-of-core test share (by player_id hash)
 
-# ====== DB connection from env only (no hardcoded credentials) ======
-_dsn = os.environ.get("DATABASE_URL")
-if _dsn:
-    _url = _dsn.replace("postgresql://", "postgresql+psycopg2://", 1) if "postgresql://" in _dsn else _dsn
-    engine = create_engine(_url)
-else:
-    _pw = os.environ.get("DB_PASSWORD") or os.environ.get("DB_PASS")
-    if not _pw:
-        raise SystemExit("Set DATABASE_URL or DB_PASSWORD (and DB_HOST, DB_USER, DB_NAME) in .env")
-    db_url = URL.create(
-        "postgresql+psycopg2",
-        username=os.environ.get("DB_USER", "reposition_user"),
-        password=_pw,
-        host=os.environ.get("DB_HOST", "localhost"),
-        port=int(os.environ.get("DB_PORT", "5432")),
-        database=os.environ.get("DB_NAME", "reposition_db"),
-    )
-    engine = create_engine(db_url)
-df = pd.read_sql("SELECT * FROM players", engine)
-
-# keep only rows with sub_position
-df = df[~df["sub_position"].isna()].copy()
-
-# ===== choose numeric features =====
-meta = {
+# ===== non-feature columns =====
+META_COLS = {
     "id", "player_id", "name", "country_of_citizenship", "date_of_birth",
     "current_club_name", "position", "sub_position", "foot", "club_id",
     "created_at", "image_url", "weak_foot", "skill_moves", "preferred_foot",
     "ovr", "sho", "pas", "dri", "def", "phy", "age","pac",
     "market_value_in_eur", "highest_market_value_in_eur", "league", "team",
 }
-num_all = [c for c in df.select_dtypes(include=["int64", "float64"]).columns if c not in meta]
 
-print(f"Total rows: {len(df):,} | Numeric features used: {len(num_all)}")
 
-summary = []
+def load_training_frame(engine) -> pd.DataFrame:
+    """Read all players and keep only rows with a sub_position label."""
+    df = pd.read_sql("SELECT * FROM players", engine)
+    return df[~df["sub_position"].isna()].copy()
+
+
+def select_features(df: pd.DataFrame) -> list[str]:
+    """Numeric columns used as model features."""
+    return [c for c in df.select_dtypes(include=["int64", "float64"]).columns if c not in META_COLS]
+
+
+def train_position(X: np.ndarray, sub_position: np.ndarray, num_all: list[str], POS: str,
+                   corr_lbl: pd.DataFrame, out_dir: Path = BASE) -> dict:
+    """Train one position model and write corr_<POS>/feat_<POS> artifacts to out_dir."""
+    # scikit-learn / xgboost take ~2s to import; only pay for it when training
+    from sklearn.model_selection import train_test_split
+    from sklearn.metrics import (
+        roc_auc_score,
+        accuracy_score,
+        precision_recall_fscore_support,
+        confusion_matrix,
+    )
+    from xgboost import XGBClassifier
 
-for POS in POSITIONS:
     print("\n" + "=" * 70)
     print(f">>> Training position: {POS}")
 
     # ----- label & correlations -----
-    label = f"is_{POS}"
-    df[label] = (df["sub_position"] == POS).astype(int)
+    y = (sub_position == POS).astype(int)
 
-    pos_count = int(df[label].sum())
-    neg_count = int((1 - df[label]).sum())
+    pos_count = int(y.sum())
+    neg_count = int((1 - y).sum())
     print(f"Class counts -> pos={pos_count} | neg={neg_count}")
 
     if pos_count < MIN_POS:
         print(f"Skipping {POS}: not enough positive samples (< {MIN_POS}).")
-        summary.append({"pos": POS, "status": "skipped (too few positives)", "auc": None, "n_pos": pos_count})
-        continue
+        return {"pos": POS, "status": "skipped (too few positives)", "auc": None, "n_pos": pos_count}
 
     # correlation matrix (numeric features + label)
-    corr_lbl = df[num_all + [label]].corr()
-    corr_lbl.to_csv(BASE / f"corr_{POS}_with_target.csv")
+    corr_lbl.to_csv(out_dir / f"corr_{POS}_with_target.csv")
 
     # ----- split: 80% train / 20% test -----
-    X = df[num_all]
-    y = df[label].values
     X_tr, X_te, y_tr, y_te = train_test_split(
         X, y, test_size=0.20, random_state=SEED, stratify=y
     )
@@ -123,12 +130,309 @@ for POS in POSITIONS:
     top = np.argsort(gains)[::-1][:TOP_N_IMP]
     top_feats = np.array(num_all)[top]
     top_gains = gains[top]
-    pd.DataFrame({"feature": top_feats, "gain": top_gains}).to_csv(BASE / f"feat_{POS}_full.csv", index=False)
+    pd.DataFrame({"feature": top_feats, "gain": top_gains}).to_csv(out_dir / f"feat_{POS}_full.csv", index=False)
+
+    return {"pos": POS, "status": "ok", "auc": float(auc), "n_pos": pos_count}
+
+
+def compact_training_data(df: pd.DataFrame) -> tuple[FeatureMatrix, np.ndarray]:
+    """Features as a compact FeatureMatrix plus the sub_position labels; df can be dropped afterwards."""
+    return FeatureMatrix.from_frame(df, select_features(df)), df["sub_position"].to_numpy()
+
+
+def _label_correlations(fm: FeatureMatrix, sub_position: np.ndarray) -> dict[str, pd.DataFrame]:
+    """Feature + is_<POS> correlation matrix per position.
+
+    The feature/feature block is the same for every position, so it is computed
+    once; only the label row/column is added per position.
+    """
+    X64 = pd.DataFrame(fm.dense(dtype=np.float64), columns=fm.columns)
+    feat_corr = X64.corr()
+    out = {}
+    for POS in POSITIONS:
+        label = f"is_{POS}"
+        lbl = X64.corrwith(pd.Series((sub_position == POS).astype(float)))
+        corr_lbl = feat_corr.copy()
+        corr_lbl[label] = lbl
+        corr_lbl.loc[label] = list(lbl) + [1.0]
+        out[POS] = corr_lbl
+    return out
+
+
+def train_matrix(fm: FeatureMatrix, sub_position: np.ndarray, out_dir: Path = BASE) -> list[dict]:
+    """Train every position in POSITIONS and return the per-position summary."""
+    num_all = fm.columns
+    print(f"Total rows: {len(fm):,} | Numeric features used: {len(num_all)}")
+    corr = _label_correlations(fm, sub_position)
+    X = fm.dense(dtype=np.float32)  # XGBoost works in float32 anyway
+
+    summary = []
+    for POS in POSITIONS:
+        with span("train_position", rows=len(fm), position=POS):
+            summary.append(train_position(X, sub_position, num_all, POS, corr[POS], out_dir))
+    return summary
+
+
+def train_all(df: pd.DataFrame, out_dir: Path = BASE) -> list[dict]:
+    fm, sub_position = compact_training_data(df)
+    return train_matrix(fm, sub_position, out_dir)
+
+
+# ========= out-of-core training (--out-of-core) =========
+def stream_players(source: str | None = None, batch_rows: int = OOC_BATCH_ROWS, engine=None):
+    """Labelled player batches, in the same order on every pass: players table (source None, via engine), CSV or Parquet."""
+    if source is None:
+        query = "SELECT * FROM players WHERE sub_position IS NOT NULL ORDER BY player_id"
+        with engine.connect().execution_options(stream_results=True, max_row_buffer=batch_rows) as con:
+            for batch in pd.read_sql(query, con, chunksize=batch_rows):
+                yield batch
+        return
+    if str(source).endswith(".parquet"):
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise SystemExit("Parquet snapshots need pyarrow: pip install -r requirements.txt")
+        batches = (b.to_pandas() for b in pq.ParquetFile(source).iter_batches(batch_size=batch_rows))
+    else:
+        batches = pd.read_csv(source, chunksize=batch_rows)
+    for batch in batches:
+        batch = batch[batch["sub_position"].notna()]
+        if len(batch):
+            yield batch
+
+
+def holdout_mask(player_id: np.ndarray, pct: int = HOLDOUT_PCT) -> np.ndarray:
+    """Deterministic test-set membership from a multiplicative hash of player_id (and SEED)."""
+    h = (np.asarray(player_id, dtype=np.int64).astype(np.uint64) + np.uint64(SEED)) * np.uint64(0x9E3779B97F4A7C15)
+    return (h >> np.uint64(32)) % np.uint64(100) < np.uint64(pct)
+
+
+def _batch_features(batch: pd.DataFrame, features: list[str]):
+    """(features as FeatureMatrix, position codes, holdout mask, raw float64 features) of one batch."""
+    codes_of = {pos: i for i, pos in enumerate(POSITIONS)}
+    fm = FeatureMatrix.from_frame(batch, features)
+    codes = batch["sub_position"].map(codes_of).fillna(len(POSITIONS)).to_numpy(dtype=np.uint8)
+    raw = np.column_stack([pd.to_numeric(batch[c], errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+                           if c in batch.columns else np.full(len(batch), np.nan) for c in features])
+    return fm, codes, holdout_mask(batch["player_id"].to_numpy()), raw
+
+
+def _feature_batches(batches, features: list[str]):
+    """_batch_features of every batch of batches() (a fresh pass over the stream)."""
+    for batch in batches():
+        yield _batch_features(batch, features)
+
+
+def _training_iter(batches, features: list[str], cache_prefix: str):
+    """xgboost.DataIter over the training rows of the stream (re-read on every reset)."""
+    import xgboost as xgb
+
+    class TrainingBatches(xgb.DataIter):
+        def __init__(self):
+            self._it = None
+            super().__init__(cache_prefix=cache_prefix)
+
+        def next(self, input_data) -> bool:
+            if self._it is None:
+                self._it = _feature_batches(batches, features)
+            for fm, _, test, _ in self._it:
+                if (~test).any():
+                    input_data(data=fm.take(~test).dense(dtype=np.float32))
+                    return True
+            return False
+
+        def reset(self) -> None:
+            if self._it is not None:
+                self._it.close()
+            self._it = None
+
+    return TrainingBatches()
+
+
+def _print_metrics(m: BinaryMetrics) -> None:
+    prec, rec, f1, supp = m.precision_recall_f1()
+    print(f"Holdout metrics ({HOLDOUT_PCT}% test): AUC={m.auc:.3f} | ACC={m.accuracy:.3f}")
+    print(f"Class 1 (POS) -> Precision={prec[1]:.3f} Recall={rec[1]:.3f} F1={f1[1]:.3f} Support={supp[1]}")
+    print(f"Class 0 (NEG) -> Precision={prec[0]:.3f} Recall={rec[0]:.3f} F1={f1[0]:.3f} Support={supp[0]}")
+    print("Confusion matrix [rows=true, cols=pred] (0,1):")
+    print(m.confusion)
+
+
+def _candidate_columns(batches) -> list[str]:
+    """Column names of the stream (from its first batch) that select_features could pick."""
+    stream = batches()
+    first = next(stream, None)
+    stream.close()  # releases the server-side cursor
+    if first is None:
+        raise SystemExit("No labelled players to train on")
+    return [c for c in first.columns if c not in META_COLS]
+
+
+def train_out_of_core(source: str | None = None, out_dir: Path = BASE, batch_rows: int = OOC_BATCH_ROWS,
+                      cache_dir: str | None = None) -> list[dict]:
+    """Stream, train and write the same artifacts as train_matrix, plus reference_stats.json in out_dir.
+
+    All passes over the players table share one engine, disposed at the end.
+    """
+    engine = create_db_engine() if source is None else None
+    try:
+        return _train_streamed(lambda: stream_players(source, batch_rows, engine), out_dir, batch_rows, cache_dir)
+    finally:
+        if engine is not None:
+            engine.dispose()
+
+
+def _stream_stats(batches) -> dict:
+    """Pass 1 over the stream: features, correlations (features + is_<POS>), per-position mu/sigma and labels.
+
+    Accumulated over every candidate column; the features are then picked with
+    the in-memory rule (int64/float64 dtype, some values) applied to the whole
+    stream. The training labels (1 byte per training row) are the only part
+    that grows with the row count.
+    """
+    candidates = _candidate_columns(batches)
+    c = len(candidates)
+    corr = RunningCorrelation(c + len(POSITIONS))
+    moments = {pos: RunningMoments(c) for pos in POSITIONS}
+    has_values, non_numeric = np.zeros(c, dtype=bool), np.zeros(c, dtype=bool)
+    train_codes, n_pos, n_rows = [], np.zeros(len(POSITIONS), dtype=np.int64), 0
+    for batch in batches():
+        fm, codes, test, raw = _batch_features(batch, candidates)
+        numeric = set(select_features(batch[candidates]))
+        present = batch[candidates].notna().any().to_numpy()
+        has_values |= present
+        non_numeric |= present & np.array([col not in numeric for col in candidates])
+        onehot = (codes[:, None] == np.arange(len(POSITIONS))).astype(np.float64)
+        corr.update(np.hstack([fm.dense(dtype=np.float64), onehot]))
+        for p, pos in enumerate(POSITIONS):
+            moments[pos].update(raw[codes == p])
+        n_pos += onehot.sum(axis=0).astype(np.int64)
+        train_codes.append(codes[~test])
+        n_rows += len(codes)
+
+    keep = np.flatnonzero(has_values & ~non_numeric)
+    features = [candidates[j] for j in keep]
+    rows = np.r_[keep, c + np.arange(len(POSITIONS))]  # the features plus the is_<POS> labels
+    return {
+        "features": features,
+        "corr": corr.corr()[np.ix_(rows, rows)],
+        "stats": {pos: pd.DataFrame({"mu": m.mean[keep], "sigma": m.std[keep]}, index=pd.Index(features))
+                  for pos, m in moments.items()},
+        "train_codes": np.concatenate(train_codes),
+        "n_pos": n_pos,
+        "n_rows": n_rows,
+    }
+
+
+def _train_streamed(batches, out_dir: Path, batch_rows: int, cache_dir: str | None) -> list[dict]:
+    import xgboost as xgb
+    from position_fit import feat_info_from_stats, save_reference_stats
+
+    # ----- pass 1: correlations, per-position stats, labels of the training rows -----
+    with span("stream_stats") as sp:
+        streamed = _stream_stats(batches)
+        sp.rows = n_rows = streamed["n_rows"]
+    features, corr_all, train_codes, n_pos = (streamed[key] for key in ("features", "corr", "train_codes", "n_pos"))
+    k = len(features)
+    print(f"Total rows: {n_rows:,} | Numeric features used: {k} | streamed in batches of {batch_rows:,}")
+
+    # ----- external-memory training matrix, shared by all positions -----
+    with tempfile.TemporaryDirectory(dir=cache_dir) as tmp, span("build_dmatrix", rows=len(train_codes)):
+        it = _training_iter(batches, features, os.path.join(tmp, "train"))
+        # xgboost < 3.0 has no ExtMemQuantileDMatrix; its DMatrix(iter) is the external-memory variant there
+        ext_mem = getattr(xgb, "ExtMemQuantileDMatrix", None)
+        dtrain = ext_mem(it, max_bin=256) if ext_mem is not None else xgb.DMatrix(it)
+
+        boosters, summary = {}, []
+        for p, POS in enumerate(POSITIONS):
+            print("\n" + "=" * 70)
+            print(f">>> Training position: {POS} (out-of-core)")
+            pos_count = int(n_pos[p])
+            print(f"Class counts -> pos={pos_count} | neg={n_rows - pos_count}")
+            if pos_count < MIN_POS:
+                print(f"Skipping {POS}: not enough positive samples (< {MIN_POS}).")
+                summary.append({"pos": POS, "status": "skipped (too few positives)", "auc": None, "n_pos": pos_count})
+                continue
+
+            idx = [*range(k), k + p]
+            names = [*features, f"is_{POS}"]
+            pd.DataFrame(corr_all[np.ix_(idx, idx)], index=names, columns=names).to_csv(
+                out_dir / f"corr_{POS}_with_target.csv")
+
+            y = (train_codes == p).astype(np.float32)
+            dtrain.set_label(y)
+            params = {
+                "max_depth": 6, "eta": 0.08, "subsample": 0.9, "colsample_bytree": 0.9,
+                "objective": "binary:logistic", "eval_metric": "auc", "tree_method": "hist",
+                "scale_pos_weight": (y == 0).sum() / max(1, (y == 1).sum()), "seed": SEED,
+            }
+            with span("train_position", rows=len(y), position=POS):
+                booster = xgb.train(params, dtrain, num_boost_round=500)
+            boosters[POS] = booster
+
+            # same normalised average gain as XGBClassifier.feature_importances_
+            score = booster.get_score(importance_type="gain")
+            gains = np.array([score.get(f"f{j}", 0.0) for j in range(k)], dtype=np.float32)
+            gains = gains / gains.sum() if gains.sum() else gains
+            top = np.argsort(gains)[::-1][:TOP_N_IMP]
+            pd.DataFrame({"feature": np.array(features)[top], "gain": gains[top]}).to_csv(
+                out_dir / f"feat_{POS}_full.csv", index=False)
+            summary.append({"pos": POS, "status": "ok", "auc": None, "n_pos": pos_count})
+        del dtrain
+
+    # ----- pass 2: holdout metrics of every model -----
+    with span("evaluate", rows=n_rows):
+        metrics = {POS: BinaryMetrics() for POS in boosters}
+        codes_of = {pos: i for i, pos in enumerate(POSITIONS)}
+        for fm, codes, test, _ in _feature_batches(batches, features):
+            if not test.any():
+                continue
+            X_te = fm.take(test).dense(dtype=np.float32)
+            for POS, booster in boosters.items():
+                metrics[POS].update(codes[test] == codes_of[POS], booster.inplace_predict(X_te))
+    for row in summary:
+        if row["pos"] in metrics:
+            print(f"\n>>> {row['pos']}")
+            _print_metrics(metrics[row["pos"]])
+            row["auc"] = metrics[row["pos"]].auc
+        row["n_rows"] = n_rows
+
+    # ----- reference stats from the streamed moments (scoring then skips the full table) -----
+    with span("reference_stats"):
+        save_reference_stats(feat_info_from_stats(streamed["stats"], out_dir), out_dir / "reference_stats.json",
+                             out_dir)
+    return summary
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Train the per-position XGBoost models")
+    parser.add_argument("--out-of-core", action="store_true",
+                        help="Stream batches into an external-memory DMatrix instead of loading all players")
+    parser.add_argument("--source", default=None,
+                        help="CSV or Parquet snapshot to train on instead of the players table (--out-of-core)")
+    parser.add_argument("--batch-rows", type=int, default=OOC_BATCH_ROWS, help="Rows per streamed batch")
+    parser.add_argument("--cache-dir", default=None,
+                        help="Directory for the external-memory pages (default: a temporary directory)")
+    args = parser.parse_args(argv)
+
+    with profiled("pos_models"):
+        if args.out_of_core:
+            with span("train_out_of_core") as sp:
+                summary = train_out_of_core(args.source, batch_rows=args.batch_rows, cache_dir=args.cache_dir)
+                sp.rows = summary[0]["n_rows"] if summary else 0
+        else:
+            with span("read_players") as sp:
+                fm, sub_position = compact_training_data(load_training_frame(create_db_engine()))
+                sp.rows = len(fm)
+            with span("train", rows=len(fm)):
+                summary = train_matrix(fm, sub_position)
+
+    # ===== print final summary =====
+    print("\n" + "#" * 70)
+    print("Summary:")
+    for row in summary:
+        print(f"{row['pos']:>4}: {row['status']:<28} | AUC={row['auc']} | positives={row['n_pos']}")
 
-    summary.append({"pos": POS, "status": "ok", "auc": float(auc), "n_pos": pos_count})
 
-# ===== print final summary =====
-print("\n" + "#" * 70)
-print("Summary:")
-for row in summary:
-    print(f"{row['pos']:>4}: {row['status']:<28} | AUC={row['auc']} | positives={row['n_pos']}")
\ No newline at end of file
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Position Fit Scoring (shared by predict_player_positions.py and predict_from_csv.py)
+===================================================================================
+
+For every position:
+  fit   = z2score( sum(gain * sign * z) / sum(gain) ),  z = (value - mu) / sigma
+  rel   = 100 * (fit - min_fit) / (max_fit - min_fit)    (per player, over all positions)
+  combo = FIT_W * fit + REL_W * rel
+
+mu/sigma are the reference stats of players whose sub_position is that
+position; gains come from feat_<POS>_full.csv and signs from the correlation
+with is_<POS> in corr_<POS>_with_target.csv. Missing values and sigma == 0
+contribute z = 0. Scoring runs column-wise over a FeatureMatrix.
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+import datetime
+import hashlib
+import json
+import os
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from feature_matrix import FeatureMatrix
+
+# ────────── Configuration ──────────
+BASE = Path(__file__).resolve().parent
+POSITIONS = ["ST","LW","RW","CM","CDM","CAM","LB","RB","CB"]
+FIT_W, REL_W = 0.5, 0.5  # Combination weights
+REFERENCE_STATS = BASE / "reference_stats.json"  # written by each scoring run
+
+
+# ────────── Feature Metadata ──────────
+def build_feat_info(dm: pd.DataFrame, base: Path = BASE) -> dict[str, dict]:
+    """Per-position features, gains, correlation signs and reference stats from dm."""
+    feat_info: dict[str, dict] = {}
+    for pos in POSITIONS:
+        feats, gains, signs = _artifact_meta(pos, base)
+        stats = (
+            dm[dm.sub_position == pos][feats]
+            .agg(["mean","std"]).T.rename(columns={"mean":"mu","std":"sigma"})
+        )
+        feat_info[pos] = {"feats": feats, "gains": gains, "signs": signs, "stats": stats}
+    return feat_info
+
+
+def feat_info_from_stats(stats: dict[str, pd.DataFrame], base: Path = BASE) -> dict[str, dict]:
+    """build_feat_info for reference stats computed elsewhere (mu/sigma per feature, keyed by position)."""
+    feat_info: dict[str, dict] = {}
+    for pos in POSITIONS:
+        feats, gains, signs = _artifact_meta(pos, base)
+        feat_info[pos] = {"feats": feats, "gains": gains, "signs": signs, "stats": stats[pos].reindex(feats)}
+    return feat_info
+
+
+def _artifact_meta(pos: str, base: Path) -> tuple[list[str], dict, dict]:
+    """Features, gains and correlation signs of one position from feat_<POS>/corr_<POS> artifacts."""
+    gtab = pd.read_csv(base / f"feat_{pos}_full.csv")  # features + gains
+    corr = pd.read_csv(base / f"corr_{pos}_with_target.csv", index_col=0)[f"is_{pos}"]
+
+    feats, gains, signs = [], {}, {}
+    for _, row in gtab.iterrows():
+        feat_name = row.feature
+        sign_val = np.sign(corr.get(feat_name, 1.0))
+        feats.append(feat_name)
+        gains[feat_name] = row.gain
+        signs[feat_name] = sign_val
+
+    if not feats:
+        warnings.warn(f"{pos}: no features - fallback to zeros")
+    return feats, gains, signs
+
+
+# ────────── Reference stats cache ──────────
+def artifacts_version(base: Path = BASE) -> str:
+    """Hash of the feat_*/corr_* files the scores depend on."""
+    h = hashlib.sha256()
+    for pos in POSITIONS:
+        for name in (f"feat_{pos}_full.csv", f"corr_{pos}_with_target.csv"):
+            h.update(name.encode())
+            h.update((base / name).read_bytes())
+    return h.hexdigest()[:16]
+
+
+def save_reference_stats(feat_info: dict[str, dict], path: Path = REFERENCE_STATS, base: Path = BASE) -> str:
+    """Persist feat_info (features, gains, signs, mu, sigma) so scoring can skip the DB; returns its version."""
+    positions = {}
+    for pos, meta in feat_info.items():
+        gains, signs, mu, sigma = position_arrays(meta)
+        positions[pos] = {"feats": list(meta["feats"]), "gains": gains.tolist(), "signs": signs.tolist(),
+                          "mu": mu.tolist(), "sigma": sigma.tolist()}
+    artifacts = artifacts_version(base)
+    payload = json.dumps(positions, sort_keys=True)
+    doc = {
+        "artifacts": artifacts,
+        "version": hashlib.sha256((artifacts + payload).encode()).hexdigest()[:16],
+        "created_at": datetime.datetime.now().isoformat(timespec="seconds"),
+        "positions": positions,
+    }
+    path = Path(path)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmp.write_text(json.dumps(doc), encoding="utf-8")
+    os.replace(tmp, path)  # readers never see a half-written file
+    return doc["version"]
+
+
+def load_reference_stats(path: Path = REFERENCE_STATS, base: Path = BASE) -> tuple[dict[str, dict], str] | None:
+    """(feat_info, version) from the cache, or None if it is missing or was built from other model artifacts."""
+    try:
+        doc = json.loads(Path(path).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    if doc.get("artifacts") != artifacts_version(base):
+        return None
+    feat_info = {}
+    for pos, p in doc["positions"].items():
+        feats = p["feats"]
+        feat_info[pos] = {
+            "feats": feats,
+            "gains": dict(zip(feats, p["gains"])),
+            "signs": dict(zip(feats, p["signs"])),
+            "stats": pd.DataFrame({"mu": p["mu"], "sigma": p["sigma"]}, index=pd.Index(feats), dtype=np.float64),
+        }
+    return feat_info, doc["version"]
+
+
+def feature_columns(feat_info: dict[str, dict]) -> list[str]:
+    """Union of all features used by any position, in first-seen order."""
+    return list(dict.fromkeys(f for meta in feat_info.values() for f in meta["feats"]))
+
+
+def position_arrays(meta: dict) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """(gains, signs, mu, sigma) of one position, aligned with meta["feats"]."""
+    feats, stats = meta["feats"], meta["stats"]
+    gains = np.array([meta["gains"].get(f, 0.0) for f in feats], dtype=np.float64)
+    signs = np.array([meta["signs"].get(f, 1.0) for f in feats], dtype=np.float64)
+    mu = np.array([stats.at[f, "mu"] if f in stats.index else 0.0 for f in feats], dtype=np.float64)
+    sigma = np.array([stats.at[f, "sigma"] if f in stats.index else 0.0 for f in feats], dtype=np.float64)
+    return gains, signs, mu, sigma
+
+
+# ────────── Scoring ──────────
+def fit_matrix(fm: FeatureMatrix, feat_info: dict[str, dict]) -> np.ndarray:
+    """(n, len(POSITIONS)) fit scores (0-100) in POSITIONS order."""
+    fit = np.full((len(fm), len(POSITIONS)), 50.0)
+    for p, pos in enumerate(POSITIONS):
+        meta = feat_info.get(pos)
+        if not meta or not meta["feats"]:
+            continue
+        gains, signs, mu, sigma = position_arrays(meta)
+        z = fm.zscore(meta["feats"], mu, sigma)
+        # accumulate feature by feature to keep the summation order of the scalar formula
+        num = np.zeros(len(fm))
+        den = 0.0
+        for j in range(len(gains)):
+            num += gains[j] * (z[:, j] * signs[j])
+            den += gains[j]
+        if den:
+            fit[:, p] = np.clip(50 + 10 * (num / den), 0, 100)
+    return fit
+
+
+def combo_matrix(fit: np.ndarray) -> np.ndarray:
+    """Combine absolute fit with the player's relative fit across positions."""
+    f_min = fit.min(axis=1, keepdims=True)
+    f_max = fit.max(axis=1, keepdims=True)
+    spread = f_max - f_min
+    with np.errstate(invalid="ignore", divide="ignore"):
+        rel = np.where(spread > 0, 100 * (fit - f_min) / np.where(spread > 0, spread, 1.0), 50.0)
+    return FIT_W * fit + REL_W * rel
+
+
+def best_positions(combo: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Best position label (None if no finite combo) and its unrounded combo score per row."""
+    safe = np.where(np.isnan(combo), -np.inf, combo)
+    idx = safe.argmax(axis=1)
+    score = safe[np.arange(len(safe)), idx]
+    labels = np.array(POSITIONS, dtype=object)[idx]
+    labels[~np.isfinite(score)] = None
+    return labels, score
+
+
+def combo_frame(fm: FeatureMatrix, feat_info: dict[str, dict]) -> pd.DataFrame:
+    """<POS>_combo columns plus best_combo_pos / best_combo_score, rounded to 0.1."""
+    return format_combo(combo_matrix(fit_matrix(fm, feat_info)))
+
+
+def format_combo(combo: np.ndarray) -> pd.DataFrame:
+    """combo_frame layout for an already computed (n, len(POSITIONS)) combo matrix."""
+    best_pos, best_score = best_positions(combo)
+    out = pd.DataFrame(np.round(combo, 1), columns=[f"{p}_combo" for p in POSITIONS])
+    out["best_combo_pos"] = best_pos
+    out["best_combo_score"] = np.where(np.isfinite(best_score), np.round(best_score, 1), np.nan)
+    return out
@@ -11,136 +11,122 @@ The script computes z-scored feature aggregates using statistics derived
 from the existing players table in the database (same approach as
 predict_player_positions.py), then returns combo scores per position and
 the best position/score for each provided player.
+
+Reference statistics are read from models/reference_stats.json when it was
+built from the current feat_*/corr_* artifacts; only then is the database
+skipped (and SQLAlchemy never imported). Otherwise they are recomputed from
+the players table and the cache is refreshed.
+
+Rows already scored against the same reference stats are served from the
+per-row result cache (result_cache.py); only unseen rows are scored.
+
+Streaming: `--input - --out - --format ndjson` reads the CSV from stdin and
+writes one JSON object per player to stdout, chunk by chunk, so a caller
+(the upload route) can forward results before the last row is scored.
 """
 
 from __future__ import annotations
 
 from pathlib import Path
 import argparse
-import os
-import warnings
-import pandas as pd
+import sys
 import numpy as np
-from sqlalchemy import create_engine
-from sqlalchemy.engine import URL
+import pandas as pd
 import datetime
 
+from database import create_db_engine
+from feature_matrix import FeatureMatrix
+from instrumentation import profiled, span
+from position_fit import (
+    REFERENCE_STATS, build_feat_info, combo_frame, combo_matrix, feature_columns, fit_matrix, format_combo,
+    load_reference_stats, save_reference_stats,
+)
+from result_cache import DEFAULT_MAX_ROWS, ResultCache, cache_path, row_keys
+
 
 # ────────── Configuration ──────────
 BASE = Path(__file__).resolve().parent
-POSITIONS = ["ST","LW","RW","CM","CDM","CAM","LB","RB","CB"]
+STREAM_CHUNK_ROWS = 2000  # rows per scored/flushed chunk when reading stdin
 
-FIT_W, REL_W = 0.5, 0.5  # Combination weights
 
+def reference_feat_info(stats_path: Path, refresh: bool = False) -> tuple[dict[str, dict], str]:
+    """(feat_info, version) from the cache file, falling back to the players table (and refreshing the cache)."""
+    cached = None if refresh else load_reference_stats(stats_path)
+    if cached is not None:
+        with span("load_stats"):
+            return cached
 
-def z2score(z: float) -> float:
-    return float(np.clip(50 + 10*z, 0, 100))
+    with span("read_reference") as sp:
+        engine = create_db_engine()
+        with engine.connect() as con:
+            dm = pd.read_sql("SELECT * FROM players", con)
+        sp.rows = len(dm)
 
+    with span("stats", rows=len(dm)):
+        feat_info = build_feat_info(dm)
+        version = save_reference_stats(feat_info, stats_path)
+    return feat_info, version
 
-def main() -> int:
-    parser = argparse.ArgumentParser()
-    parser.add_argument("--input", required=True, help="Path to input CSV with players and features")
-    parser.add_argument("--out", required=True, help="Path to output CSV")
-    args = parser.parse_args()
-
-    input_csv = Path(args.input)
-    out_csv = Path(args.out)
 
-    # ────────── Database connection from env (see .env.example) ──────────
-    dsn = os.environ.get("DATABASE_URL")
-    if dsn:
-        url = dsn.replace("postgresql://", "postgresql+psycopg2://", 1) if "postgresql://" in dsn else dsn
-        engine = create_engine(url)
-    else:
-        pw = os.environ.get("DB_PASSWORD") or os.environ.get("DB_PASS")
-        if not pw:
-            raise SystemExit("Set DATABASE_URL or DB_PASSWORD (and DB_HOST, DB_USER, DB_NAME) in .env")
-        db_url = URL.create(
-            "postgresql+psycopg2",
-            username=os.environ.get("DB_USER", "reposition_user"),
-            password=pw,
-            host=os.environ.get("DB_HOST", "localhost"),
-            port=int(os.environ.get("DB_PORT", "5432")),
-            database=os.environ.get("DB_NAME", "reposition_db"),
-        )
-        engine = create_engine(db_url)
-
-    with engine.connect() as con:
-        dm = pd.read_sql("SELECT * FROM players", con)
-
-    # Load external input
+def read_input(input_csv: Path) -> pd.DataFrame:
     if not input_csv.exists():
         raise FileNotFoundError(f"Input CSV not found: {input_csv}")
     de = pd.read_csv(input_csv)
     if "player_id" not in de.columns:
         raise ValueError("Input CSV must include a 'player_id' column")
+    return de
+
+
+def read_input_chunks(source: str, chunk_rows: int | None = None):
+    """Yield the input CSV ('-' = stdin) in frames of at most chunk_rows rows (one frame if None)."""
+    if not chunk_rows:
+        with span("read_input") as sp:
+            de = read_input(Path(source)) if source != "-" else _check_input(pd.read_csv(sys.stdin))
+            sp.rows = len(de)
+        yield de
+        return
+
+    if source != "-" and not Path(source).exists():
+        raise FileNotFoundError(f"Input CSV not found: {source}")
+    reader = pd.read_csv(sys.stdin if source == "-" else source, chunksize=chunk_rows)
+    while True:
+        with span("read_input") as sp:
+            de = next(reader, None)
+            sp.rows = 0 if de is None else len(de)
+        if de is None:
+            return
+        yield _check_input(de)
+
+
+def _check_input(de: pd.DataFrame) -> pd.DataFrame:
+    if "player_id" not in de.columns:
+        raise ValueError("Input CSV must include a 'player_id' column")
+    return de
 
-    # ────────── Feature Metadata ──────────
-    feat_info: dict[str, dict] = {}
-    for pos in POSITIONS:
-        gtab = pd.read_csv(BASE / f"feat_{pos}_full.csv")  # features + gains
-        corr = pd.read_csv(BASE / f"corr_{pos}_with_target.csv", index_col=0)[f"is_{pos}"]
-
-        feats, gains, signs = [], {}, {}
-        for _, row in gtab.iterrows():
-            feat_name = row.feature
-            sign_val = np.sign(corr.get(feat_name, 1.0))
-            feats.append(feat_name)
-            gains[feat_name] = row.gain
-            signs[feat_name] = sign_val
-
-        if not feats:
-            warnings.warn(f"{pos}: no features - fallback to zeros")
-
-        stats = (
-            dm[dm.sub_position == pos][feats]
-            .agg(["mean","std"]).T.rename(columns={"mean":"mu","std":"sigma"})
-        )
-        feat_info[pos] = {"feats": feats, "gains": gains, "signs": signs, "stats": stats}
-
-    # ────────── Player Calculations ──────────
-    rows = []
-    for _, pl in de.iterrows():
-        rec = {
-            "player_id": pl.get("player_id"),
-            "name": pl.get("name") if "name" in de.columns else None,
-            "natural_pos": pl.get("sub_position") if "sub_position" in de.columns else None,
-            "OVR": pl.get("ovr") if "ovr" in de.columns else pl.get("OVR"),
-        }
-        best_combo_val, best_combo_pos = -np.inf, None
-
-        fit_vals: dict[str, float] = {}
-        for pos, meta in feat_info.items():
-            num = 0.0
-            den = 0.0
-            for f in meta["feats"]:
-                val = pl.get(f, np.nan)
-                mu = meta["stats"].at[f, "mu"] if f in meta["stats"].index else 0.0
-                sd = meta["stats"].at[f, "sigma"] if f in meta["stats"].index else 0.0
-                sign = meta["signs"].get(f, 1.0)
-                z = 0.0 if pd.isna(val) or sd == 0 else (val - mu) / sd
-                z = z * sign
-                gain = meta["gains"].get(f, 0.0)
-                num += gain * z
-                den += gain
-            fit_vals[pos] = z2score(num / den) if den else 50.0
-
-        fit_array = np.array([fit_vals[p] for p in POSITIONS])
-        f_min, f_max = fit_array.min(), fit_array.max()
-        rel_array = 100 * (fit_array - f_min) / (f_max - f_min) if f_max > f_min else np.full_like(fit_array, 50.0)
-
-        for pos, rel in zip(POSITIONS, rel_array):
-            combo = FIT_W * fit_vals[pos] + REL_W * rel
-            rec[f"{pos}_combo"] = round(float(combo), 1)
-            if combo > best_combo_val:
-                best_combo_val, best_combo_pos = combo, pos
-
-        rec["best_combo_pos"] = best_combo_pos
-        rec["best_combo_score"] = round(float(best_combo_val), 1) if np.isfinite(best_combo_val) else None
-        rows.append(rec)
-
-    df = pd.DataFrame(rows)
 
+def score_players(de: pd.DataFrame, feat_info: dict[str, dict], cache: ResultCache | None = None) -> pd.DataFrame:
+    fm = FeatureMatrix.from_frame(de, feature_columns(feat_info))
+    ovr = de["ovr"] if "ovr" in de.columns else de.get("OVR")
+    df = pd.DataFrame({
+        "player_id": de["player_id"].to_numpy(),
+        "name": de["name"].to_numpy() if "name" in de.columns else None,
+        "natural_pos": de["sub_position"].to_numpy() if "sub_position" in de.columns else None,
+        "OVR": ovr.to_numpy() if ovr is not None else None,
+    })
+    if cache is None:
+        return pd.concat([df, combo_frame(fm, feat_info)], axis=1)
+
+    keys = row_keys(fm.dense(dtype=np.float64))
+    combo, hit = cache.get_many(keys)
+    if not hit.all():
+        miss = np.flatnonzero(~hit)
+        combo[miss] = combo_matrix(fit_matrix(fm.take(miss), feat_info))
+        cache.put_many(keys[miss], combo[miss])
+    return pd.concat([df, format_combo(combo)], axis=1)
+
+
+def format_results(df: pd.DataFrame) -> pd.DataFrame:
+    """Rename combo columns to the position_compatibility layout used by the API."""
     compat_cols = [
         "player_id", "name", "natural_pos", "OVR",
         "ST_combo", "LW_combo", "RW_combo", "CM_combo", "CDM_combo", "CAM_combo",
@@ -162,10 +148,71 @@ def main() -> int:
     })
     df["best_fit_pct"] = df["best_fit_score"]
     df["created_at"] = datetime.datetime.now().isoformat()
+    return df
+
+
+def write_results(df: pd.DataFrame, out, fmt: str, header: bool = True) -> None:
+    """Append one chunk of results to an open text stream as CSV or newline-delimited JSON."""
+    if fmt == "ndjson":
+        out.write(df.to_json(orient="records", lines=True, force_ascii=False))
+    else:
+        df.to_csv(out, header=header, index=False, float_format="%.1f")
+    out.flush()  # hand each chunk to the reader (e.g. the upload route) as soon as it is scored
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--input", required=True, help="Path to input CSV with players and features ('-' = stdin)")
+    parser.add_argument("--out", required=True, help="Path to output file ('-' = stdout)")
+    parser.add_argument("--format", choices=["csv", "ndjson"], default="csv",
+                        help="Output format; ndjson writes one JSON object per player")
+    parser.add_argument("--chunk-rows", type=int, default=None,
+                        help=f"Score and write the input in chunks of this many rows "
+                             f"(default: {STREAM_CHUNK_ROWS} for stdin, whole file otherwise)")
+    parser.add_argument("--stats", default=str(REFERENCE_STATS),
+                        help="Reference stats cache (written by predict_player_positions.py)")
+    parser.add_argument("--refresh-stats", action="store_true",
+                        help="Recompute reference stats from the players table even if the cache is valid")
+    parser.add_argument("--cache", default=str(cache_path() or ""),
+                        help="Per-row result cache file (default models/result_cache.npy, "
+                             "REPOSITION_RESULT_CACHE=off disables it)")
+    parser.add_argument("--no-cache", action="store_true", help="Score every row without the result cache")
+    parser.add_argument("--cache-max-rows", type=int, default=DEFAULT_MAX_ROWS,
+                        help="Result cache size cap (least recently used rows are evicted)")
+    args = parser.parse_args()
 
-    out_csv.parent.mkdir(parents=True, exist_ok=True)
-    df.to_csv(out_csv, index=False, float_format="%.1f", encoding="utf-8")
-    print(f"OK - custom results saved to {out_csv}")
+    chunk_rows = args.chunk_rows if args.chunk_rows is not None else (STREAM_CHUNK_ROWS if args.input == "-" else None)
+    to_stdout = args.out == "-"
+    log = sys.stderr if to_stdout else sys.stdout  # stdout carries the results
+
+    with profiled("predict_from_csv"):
+        feat_info, version = reference_feat_info(Path(args.stats), args.refresh_stats)
+        cache = None if args.no_cache or not args.cache else ResultCache(Path(args.cache), version, args.cache_max_rows)
+
+        if to_stdout:
+            out = sys.stdout
+        else:
+            Path(args.out).parent.mkdir(parents=True, exist_ok=True)
+            out = open(args.out, "w", encoding="utf-8", newline="")
+        rows = 0
+        try:
+            for de in read_input_chunks(args.input, chunk_rows):
+                with span("score", rows=len(de)) as sp:
+                    df = format_results(score_players(de, feat_info, cache))
+                    if cache is not None:
+                        sp.info.update(cache_hits=cache.hits, cache_misses=cache.misses)
+                with span(f"write_{args.format}", rows=len(df)):
+                    write_results(df, out, args.format, header=rows == 0)
+                rows += len(df)
+        finally:
+            if cache is not None:
+                cache.close()
+            if not to_stdout:
+                out.close()
+
+        print(f"OK - custom results for {rows} players saved to {args.out}", file=log)
+        if cache is not None:
+            print(f"OK - result cache: {cache.hits} hits, {cache.misses} misses", file=log)
     return 0
 
 
@@ -9,169 +9,407 @@ Calculates position compatibility scores for all players using ML models.
 - Uses all features from feat_<POS>_full.csv for each position
 - Combined score: combo = FIT_W * <POS>_fit + REL_W * <POS>_rel
 - Output: player_id | natural_pos | OVR | <POS>_combo | best_combo_pos | best_combo_score
+- Top-K leaderboards per position (overall, league, country, age band) are
+  replaced in the same transaction as position_compatibility (see leaderboards.py)
+- So are the per-player top feature contributions behind every fit score
+  (player_explanations, see explanations.py)
+
+Each run is recorded as a snapshot tagged with its reference stats version;
+only the rows whose scores changed are stored (see snapshots.py).
+
+--bulk replaces position_compatibility through a staging table that
+is indexed after the COPY and swapped in (see bulk_load.py).
+
+--shards N scores N player shards in parallel worker processes against frozen
+reference stats and merges them (see sharded_scoring.py).
+
+--out-of-core trains with pos_models.py --out-of-core, then scores the players
+table batch by batch against the reference stats that training streamed. Each
+batch is appended to result.csv and COPYed into position_compatibility and
+player_explanations before the next one is read; only the players still on a
+leaderboard are kept, so memory depends on --batch-rows and the number of
+leaderboard groups, not on the row count.
+
+--async (asyncpg, see async_pipeline.py) streams the players table in batches
+and converts each batch while the next one is fetched, trains on that frame
+instead of letting pos_models.py read the table again, and COPYs each scored
+chunk while the next chunk is scored.
 """
 
 from pathlib import Path
-import argparse, os, warnings
-import runpy
-import pandas as pd, numpy as np
-import psycopg2
+import argparse, asyncio
+import pandas as pd
 import datetime
-from sqlalchemy import create_engine
-from sqlalchemy.engine import URL
+
+from async_pipeline import (
+    BATCH_ROWS, copy_sink, fetch_batches, frame_batches, frame_to_csv, records_to_frame,
+    run_pipeline,
+)
+from bulk_load import copy_into, create_staging, replace_table, swap_in
+from club_analytics import rebuild_club_analytics, rebuild_club_analytics_async
+from database import connect_async, connect_db, create_db_engine
+from feature_matrix import FeatureMatrix
+from explanations import EXPLANATION_COLS, TOP_N, build_explanations, load_explanations
+from instrumentation import profiled, span
+from leaderboards import INFO_COLS, SCOPES, TOP_K, build_leaderboards, load_leaderboards
+from position_fit import (
+    POSITIONS, REFERENCE_STATS, build_feat_info, combo_frame, feature_columns, load_reference_stats,
+    save_reference_stats,
+)
+from snapshots import record_snapshot, record_snapshot_async
 
 # ────────── Configuration ──────────
 BASE         = Path(__file__).resolve().parent
-POSITIONS    = ["ST","LW","RW","CM","CDM","CAM","LB","RB","CB"]
 DEFAULT_OUT  = Path(__file__).resolve().parent.parent / "data" / "result.csv"
-FIT_W, REL_W = 0.5, 0.5   # Combination weights
-
-# ────────── Helper Functions ──────────
-z2score = lambda z: float(np.clip(50 + 10*z, 0, 100))
-
-# ────────── CLI ──────────
-parser = argparse.ArgumentParser()
-parser.add_argument("--out", default=str(DEFAULT_OUT))
-args = parser.parse_args()
-
-# ────────── Refresh/Train Models First ──────────
-print("Refreshing position models via pos_models.py ...")
-runpy.run_path(str(BASE / "pos_models.py"), run_name="__main__")
-
-# ────────── Database connection from env only ──────────
-_dsn = os.environ.get("DATABASE_URL")
-if _dsn:
-    _url = _dsn.replace("postgresql://", "postgresql+psycopg2://", 1) if "postgresql://" in _dsn else _dsn
-    engine = create_engine(_url)
-else:
-    _pw = os.environ.get("DB_PASSWORD") or os.environ.get("DB_PASS")
-    if not _pw:
-        raise SystemExit("Set DATABASE_URL or DB_PASSWORD (and DB_HOST, DB_USER, DB_NAME) in .env")
-    db_url = URL.create(
-        "postgresql+psycopg2",
-        username=os.environ.get("DB_USER", "reposition_user"),
-        password=_pw,
-        host=os.environ.get("DB_HOST", "localhost"),
-        port=int(os.environ.get("DB_PORT", "5432")),
-        database=os.environ.get("DB_NAME", "reposition_db"),
-    )
-    engine = create_engine(db_url)
-with engine.connect() as con:
-    dm = pd.read_sql("SELECT * FROM players", con)
-
-de = dm.copy()  # All players
-
-# ────────── Feature Metadata ──────────
-feat_info = {}
-for pos in POSITIONS:
-    gtab = pd.read_csv(BASE / f"feat_{pos}_full.csv")          # All features
-    corr = pd.read_csv(BASE / f"corr_{pos}_with_target.csv", index_col=0)[f"is_{pos}"]
-
-    feats, gains, signs = [], {}, {}
-    for _, row in gtab.iterrows():
-        feat_name = row.feature
-        sign_val = np.sign(corr.get(feat_name, 1.0))
-        feats.append(feat_name)
-        gains[feat_name] = row.gain
-        signs[feat_name] = sign_val
-
-    if not feats:
-        warnings.warn(f"{pos}: no features - fallback to zeros")
-
-    stats = (dm[dm.sub_position == pos][feats]
-             .agg(["mean","std"]).T.rename(columns={"mean":"mu","std":"sigma"}))
-    feat_info[pos] = {"feats": feats, "gains": gains, "signs": signs, "stats": stats}
+
+KEEP_COLS = ["player_id","natural_pos","OVR"] + [f"{p}_combo" for p in POSITIONS] + ["best_combo_pos","best_combo_score"]
+
+
+def read_players(engine) -> pd.DataFrame:
+    with engine.connect() as con:
+        return pd.read_sql("SELECT * FROM players", con)
+
+
+def read_players_batches(engine, batch_rows: int = BATCH_ROWS):
+    """SELECT * FROM players in player_id order, batch by batch over a server-side cursor."""
+    with engine.connect().execution_options(stream_results=True, max_row_buffer=batch_rows) as con:
+        yield from pd.read_sql("SELECT * FROM players ORDER BY player_id", con, chunksize=batch_rows)
+
 
 # ────────── Player Calculations ──────────
-rows = []
-for _, pl in de.iterrows():
-    rec = {"player_id": pl.player_id,
-           "natural_pos": pl.get("sub_position"),
-           "OVR": pl.get("ovr") or pl.get("OVR")}
-    best_combo_val, best_combo_pos = -np.inf, None
-
-    fit_vals = {}
-    for pos, meta in feat_info.items():
-        num = den = 0.0
-        for f in meta["feats"]:
-            val = pl.get(f, np.nan)
-            mu  = meta["stats"].at[f, "mu"]
-            sd  = meta["stats"].at[f, "sigma"]
-            sign = meta["signs"][f]
-            z = 0.0 if pd.isna(val) or sd == 0 else (val - mu)/sd
-            z = z * sign  # Consider correlation sign
-            num += meta["gains"][f] * z
-            den += meta["gains"][f]
-        fit_vals[pos] = z2score(num/den) if den else 50.0
-
-    # ---- Internal REL ----
-    fit_array = np.array([fit_vals[p] for p in POSITIONS])
-    f_min, f_max = fit_array.min(), fit_array.max()
-    rel_array = 100*(fit_array - f_min)/(f_max - f_min) if f_max>f_min else np.full_like(fit_array, 50.0)
-
-    # ---- COMBO ----
-    for pos, rel in zip(POSITIONS, rel_array):
-        combo = FIT_W*fit_vals[pos] + REL_W*rel
-        rec[f"{pos}_combo"] = round(combo,1)
-        if combo > best_combo_val:
-            best_combo_val, best_combo_pos = combo, pos
-
-    rec["best_combo_pos"]   = best_combo_pos
-    rec["best_combo_score"] = round(best_combo_val,1)
-    rows.append(rec)
+def score_players(de: pd.DataFrame, feat_info: dict) -> pd.DataFrame:
+    fm = FeatureMatrix.from_frame(de, feature_columns(feat_info))
+    ovr = de["ovr"] if "ovr" in de.columns else de.get("OVR")
+    df = pd.DataFrame({
+        "player_id": de["player_id"].to_numpy(),
+        "natural_pos": de["sub_position"].to_numpy() if "sub_position" in de.columns else None,
+        "OVR": ovr.to_numpy() if ovr is not None else None,
+    })
+    return pd.concat([df, combo_frame(fm, feat_info)], axis=1)
+
 
 # ────────── Reduced Output ──────────
-df = pd.DataFrame(rows)
-keep_cols = ["player_id","natural_pos","OVR"] + [f"{p}_combo" for p in POSITIONS] + ["best_combo_pos","best_combo_score"]
+def save_results(df: pd.DataFrame, out, header: bool = True) -> None:
+    # player_id order: the file does not depend on table scan order or on how the run was sharded
+    df = df[KEEP_COLS].sort_values("player_id", kind="stable")
+    df.to_csv(out, index=False, header=header, float_format="%.1f", encoding="utf-8")
 
-df[keep_cols].to_csv(args.out, index=False, float_format="%.1f", encoding="utf-8")
-print(f"OK - combo (positive-only) results saved to {args.out}")
 
 # --- Column mapping to position_compatibility ---
-compat_cols = [
-    "player_id", "natural_pos", "OVR", "ST_combo", "LW_combo", "RW_combo", "CM_combo", "CDM_combo", "CAM_combo",
-    "LB_combo", "RB_combo", "CB_combo", "best_combo_pos", "best_combo_score"
-]
-compat_df = df[compat_cols].copy()
-compat_df = compat_df.rename(columns={
-    "ST_combo": "st_fit",
-    "LW_combo": "lw_fit",
-    "RW_combo": "rw_fit",
-    "CM_combo": "cm_fit",
-    "CDM_combo": "cdm_fit",
-    "CAM_combo": "cam_fit",
-    "LB_combo": "lb_fit",
-    "RB_combo": "rb_fit",
-    "CB_combo": "cb_fit",
-    "best_combo_pos": "best_pos",
-    "best_combo_score": "best_fit_score",
-    "OVR": "ovr"
-})
-compat_df["best_fit_pct"] = compat_df["best_fit_score"]
-compat_df["created_at"] = datetime.datetime.now().isoformat()
-
-# --- Load results to position_compatibility table in database ---
-if _dsn:
-    conn2 = psycopg2.connect(_dsn)
-else:
-    conn2 = psycopg2.connect(
-        host=os.environ.get("DB_HOST", "localhost"),
-        port=int(os.environ.get("DB_PORT", "5432")),
-        dbname=os.environ.get("DB_NAME", "reposition_db"),
-        user=os.environ.get("DB_USER", "reposition_user"),
-        password=_pw,
-    )
-cur = conn2.cursor()
-cur.execute("TRUNCATE TABLE position_compatibility;")
-columns = list(compat_df.columns)
-columns_str = ', '.join(columns)
-placeholders = ', '.join(['%s'] * len(columns))
-for _, row in compat_df.iterrows():
-    cur.execute(
-        f"INSERT INTO position_compatibility ({columns_str}) VALUES ({placeholders})",
-        tuple(row)
-    )
-conn2.commit()
-cur.close()
-conn2.close()
-print(f"OK - combo results also loaded to DB table 'position_compatibility'")
\ No newline at end of file
+def to_compat_frame(df: pd.DataFrame) -> pd.DataFrame:
+    compat_cols = [
+        "player_id", "natural_pos", "OVR", "ST_combo", "LW_combo", "RW_combo", "CM_combo", "CDM_combo", "CAM_combo",
+        "LB_combo", "RB_combo", "CB_combo", "best_combo_pos", "best_combo_score"
+    ]
+    compat_df = df[compat_cols].copy()
+    compat_df = compat_df.rename(columns={
+        "ST_combo": "st_fit",
+        "LW_combo": "lw_fit",
+        "RW_combo": "rw_fit",
+        "CM_combo": "cm_fit",
+        "CDM_combo": "cdm_fit",
+        "CAM_combo": "cam_fit",
+        "LB_combo": "lb_fit",
+        "RB_combo": "rb_fit",
+        "CB_combo": "cb_fit",
+        "best_combo_pos": "best_pos",
+        "best_combo_score": "best_fit_score",
+        "OVR": "ovr"
+    })
+    compat_df["best_fit_pct"] = compat_df["best_fit_score"]
+    compat_df["created_at"] = datetime.datetime.now().isoformat()
+    return compat_df
+
+
+# --- Load results to position_compatibility (and position_leaderboards, player_explanations) in one transaction ---
+# With snapshot_version the run is also recorded as a snapshot (see snapshots.py); returns its summary
+def load_to_db(compat_df: pd.DataFrame, conn, leaderboards: pd.DataFrame | None = None,
+               explanations: pd.DataFrame | None = None, bulk: bool = False,
+               snapshot_version: str | None = None, club_analytics: bool = True) -> dict | None:
+    """Replace the score tables, club_analytics and the snapshot in one transaction; returns the snapshot summary."""
+    cur = conn.cursor()
+    if leaderboards is not None:
+        load_leaderboards(leaderboards, cur)
+    if explanations is not None:
+        load_explanations(explanations, cur)
+    if bulk:
+        replace_table(cur, "position_compatibility", list(compat_df.columns),
+                      frame_to_csv(compat_df, int_cols=["player_id", "ovr"]))
+    else:
+        cur.execute("TRUNCATE TABLE position_compatibility;")
+        columns = list(compat_df.columns)
+        columns_str = ', '.join(columns)
+        placeholders = ', '.join(['%s'] * len(columns))
+        for _, row in compat_df.iterrows():
+            cur.execute(
+                f"INSERT INTO position_compatibility ({columns_str}) VALUES ({placeholders})",
+                tuple(row)
+            )
+    snapshot = record_snapshot(cur, snapshot_version) if snapshot_version else None
+    if club_analytics:
+        rebuild_club_analytics(cur)  # readers never see club_analytics from older scores
+    conn.commit()
+    cur.close()
+    return snapshot
+
+
+def print_snapshot(snapshot: dict) -> None:
+    print(f"OK - snapshot {snapshot['snapshot']} recorded: {snapshot['changed']} of {snapshot['players']} "
+          f"players changed, {snapshot['removed']} removed")
+
+
+# ────────── Out-of-core scoring (--out-of-core) ──────────
+LEADERBOARD_INFO_COLS = ["player_id", *dict.fromkeys([*SCOPES.values(), *INFO_COLS])]
+
+
+def merge_leaderboards(candidates: tuple[pd.DataFrame, pd.DataFrame] | None, scored: pd.DataFrame,
+                       players: pd.DataFrame, k: int = TOP_K) -> tuple[pd.DataFrame, tuple[pd.DataFrame, pd.DataFrame]]:
+    """Leaderboards of the candidates plus one more batch, and the new candidates (players on some leaderboard).
+
+    Every global top-k entry is in the top-k of its own batch, so folding the
+    batches in one at a time gives build_leaderboards of the whole stream while
+    holding only the current leaderboard players.
+    """
+    players = players.reindex(columns=LEADERBOARD_INFO_COLS)
+    if candidates is not None:
+        scored = pd.concat([candidates[0], scored], ignore_index=True)
+        players = pd.concat([candidates[1], players], ignore_index=True)
+    lb = build_leaderboards(scored, players, k)
+    ranked = lb["player_id"].unique()
+    return lb, (scored[scored["player_id"].isin(ranked)].reset_index(drop=True),
+                players[players["player_id"].isin(ranked)].reset_index(drop=True))
+
+
+def score_and_load_batches(batches, feat_info: dict, conn, out, top_k: int = TOP_K, top_n: int = TOP_N,
+                           bulk: bool = False,
+                           snapshot_version: str | None = None) -> tuple[int, pd.DataFrame, dict | None]:
+    """Score player batches, writing each before the next is read; returns (rows, leaderboards, snapshot).
+
+    Every batch goes to out and is COPYed into position_compatibility (its
+    staging table with bulk) and player_explanations; leaderboards, snapshot and
+    club_analytics follow. All tables are replaced in one transaction, like load_to_db.
+    """
+    cur = conn.cursor()
+    try:
+        cur.execute("DELETE FROM player_explanations;")
+        if bulk:
+            target = create_staging(cur, "position_compatibility")
+        else:
+            cur.execute("TRUNCATE TABLE position_compatibility;")
+            target = "position_compatibility"
+        rows, lb, candidates = 0, None, None
+        with open(out, "w", encoding="utf-8", newline="") as fh:
+            for batch in batches:
+                batch = batch.reset_index(drop=True)
+                df = score_players(batch, feat_info)
+                save_results(df, fh, header=not rows)  # batches arrive in player_id order
+                compat = to_compat_frame(df)
+                copy_into(cur, target, list(compat.columns), frame_to_csv(compat, int_cols=["player_id", "ovr"]))
+                copy_into(cur, "player_explanations", EXPLANATION_COLS,
+                          frame_to_csv(build_explanations(batch, feat_info, top_n), int_cols=["player_id"]))
+                lb, candidates = merge_leaderboards(candidates, df, batch, top_k)
+                rows += len(df)
+        if not rows:
+            raise SystemExit("No players to score")
+        if bulk:
+            swap_in(cur, "position_compatibility", target)
+        load_leaderboards(lb, cur)
+        snapshot = record_snapshot(cur, snapshot_version) if snapshot_version else None
+        rebuild_club_analytics(cur)
+        conn.commit()
+    finally:
+        cur.close()
+    return rows, lb, snapshot
+
+
+# ────────── Asyncio pipeline mode (--async) ──────────
+async def read_players_async(conn, batch_rows: int = BATCH_ROWS) -> tuple[pd.DataFrame, dict]:
+    """SELECT * FROM players as a stream of batches, each converted while the next is fetched."""
+    frames = []
+
+    async def collect(frame: pd.DataFrame) -> None:
+        frames.append(frame)
+
+    async with conn.transaction():  # server-side cursors live in a transaction
+        stats = await run_pipeline(fetch_batches(conn, "SELECT * FROM players", batch_rows), records_to_frame, collect)
+    if not frames:
+        return pd.DataFrame(), stats
+    # a batch whose column is all NULL comes back as object dtype
+    return pd.concat(frames, ignore_index=True).infer_objects(), stats
+
+
+async def score_and_load_async(conn, de: pd.DataFrame, dm: pd.DataFrame, feat_info: dict, top_k: int,
+                               batch_rows: int = BATCH_ROWS, top_n: int = TOP_N,
+                               snapshot_version: str | None = None) -> tuple[pd.DataFrame, pd.DataFrame, dict]:
+    """Score de chunk by chunk, COPYing each chunk (scores and explanations) while the next is scored.
+
+    Leaderboards are built from all scores and written last, then the snapshot
+    (with snapshot_version, summary under stats["snapshot"]) and club_analytics;
+    all tables are replaced in one transaction, like load_to_db.
+    """
+    scored = []
+    compat_cols = list(to_compat_frame(pd.DataFrame(columns=KEEP_COLS)).columns)
+    compat_sink = copy_sink(conn, "position_compatibility", compat_cols)
+    explain_sink = copy_sink(conn, "player_explanations", EXPLANATION_COLS)
+
+    def score_chunk(chunk: pd.DataFrame) -> tuple[pd.DataFrame, bytes, bytes]:
+        chunk = chunk.reset_index(drop=True)
+        df = score_players(chunk, feat_info)
+        return (df, frame_to_csv(to_compat_frame(df), int_cols=["player_id", "ovr"]),
+                frame_to_csv(build_explanations(chunk, feat_info, top_n), int_cols=["player_id"]))
+
+    async def write_chunk(result) -> None:
+        df, payload, explain_payload = result
+        scored.append(df)
+        await compat_sink(payload)
+        await explain_sink(explain_payload)
+
+    loop = asyncio.get_running_loop()
+    async with conn.transaction():
+        await conn.execute("DELETE FROM position_leaderboards;")
+        await conn.execute("DELETE FROM player_explanations;")
+        await conn.execute("TRUNCATE TABLE position_compatibility;")
+        stats = await run_pipeline(frame_batches(de, batch_rows), score_chunk, write_chunk)
+        df = pd.concat(scored, ignore_index=True)
+
+        lb = await loop.run_in_executor(None, build_leaderboards, df, dm, top_k)
+        lb_payload = await loop.run_in_executor(None, frame_to_csv, lb)
+        await copy_sink(conn, "position_leaderboards", list(lb.columns))(lb_payload)
+        if snapshot_version:
+            stats["snapshot"] = await record_snapshot_async(conn, snapshot_version)
+        await rebuild_club_analytics_async(conn)
+    return df, lb, stats
+
+
+async def main_async(args) -> int:
+    conn = await connect_async()
+    try:
+        with span("read_players") as sp:
+            dm, stats = await read_players_async(conn, args.batch_rows)
+            sp.rows = len(dm)
+            sp.info.update(stats)
+        de = dm.copy()  # All players
+
+        # ────────── Refresh/Train Models First (on the frame just read) ──────────
+        print("Refreshing position models via pos_models.py ...")
+        with span("train_models"):
+            from pos_models import train_all
+            train_all(dm[~dm["sub_position"].isna()].copy())
+
+        with span("stats", rows=len(dm)):
+            feat_info = build_feat_info(dm)
+            version = save_reference_stats(feat_info)
+
+        with span("write_db", rows=len(de)) as sp:
+            df, lb, stats = await score_and_load_async(conn, de, dm, feat_info, args.top_k, args.batch_rows,
+                                                       args.top_contributors, snapshot_version=version)
+            snapshot = stats.pop("snapshot")
+            sp.info.update(stats, leaderboard_entries=len(lb), snapshot=snapshot["snapshot"],
+                           changed=snapshot["changed"])
+
+        with span("write_csv", rows=len(df)):
+            save_results(df, args.out)
+        print(f"OK - combo (positive-only) results saved to {args.out}")
+        print(f"OK - combo results also loaded to DB tables 'position_compatibility', 'position_leaderboards' and 'player_explanations' (club_analytics rebuilt)")
+        print_snapshot(snapshot)
+    finally:
+        await conn.close()
+    return 0
+
+
+def main(argv=None) -> int:
+    # ────────── CLI ──────────
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--out", default=str(DEFAULT_OUT))
+    parser.add_argument("--top-k", type=int, default=TOP_K, help="Leaderboard size per position and scope")
+    parser.add_argument("--top-contributors", type=int, default=TOP_N,
+                        help="Feature contributions kept per player and position (player_explanations)")
+    parser.add_argument("--async", dest="use_async", action="store_true",
+                        help="Overlap DB reads/writes with conversion and scoring (asyncio + asyncpg)")
+    parser.add_argument("--batch-rows", type=int, default=BATCH_ROWS, help="Rows per batch in --async / --out-of-core mode")
+    parser.add_argument("--shards", type=int, default=None,
+                        help="Score in this many worker processes and merge (see sharded_scoring.py)")
+    parser.add_argument("--out-of-core", action="store_true",
+                        help="Train with pos_models.py --out-of-core (streamed batches, external-memory DMatrix)")
+    parser.add_argument("--bulk", action="store_true",
+                        help="Load position_compatibility via a staging table swapped into place (see bulk_load.py)")
+    args = parser.parse_args(argv)
+    if args.bulk and (args.use_async or args.shards):
+        parser.error("--bulk applies to the default (synchronous, unsharded) run")
+    if args.out_of_core and args.use_async:
+        # --async trains on the players frame it has already streamed into memory
+        parser.error("--out-of-core and --async are separate modes")
+
+    if args.shards:
+        import sharded_scoring
+        return sharded_scoring.main(["run", "--shards", str(args.shards), "--out", args.out,
+                                     "--top-k", str(args.top_k), "--top-contributors", str(args.top_contributors),
+                                     *(["--out-of-core"] if args.out_of_core else [])])
+
+    with profiled("predict_player_positions"):
+        if args.use_async:
+            return asyncio.run(main_async(args))
+
+        # ────────── Refresh/Train Models First ──────────
+        print("Refreshing position models via pos_models.py ...")
+        with span("train_models"):
+            import pos_models
+            pos_models.main(["--out-of-core"] if args.out_of_core else [])
+
+        if args.out_of_core:
+            with span("load_stats"):
+                cached = load_reference_stats()  # streamed by pos_models.py --out-of-core
+                if cached is None:
+                    raise SystemExit(f"pos_models.py --out-of-core left no current {REFERENCE_STATS.name}")
+                feat_info, version = cached
+            engine, conn2 = create_db_engine(), connect_db()
+            try:
+                with span("score_and_load") as sp:
+                    sp.rows, lb, snapshot = score_and_load_batches(
+                        read_players_batches(engine, args.batch_rows), feat_info, conn2, args.out, args.top_k,
+                        args.top_contributors, bulk=args.bulk, snapshot_version=version)
+                    sp.info.update(entries=len(lb), snapshot=snapshot["snapshot"], changed=snapshot["changed"])
+            finally:
+                conn2.close()
+                engine.dispose()
+            print(f"OK - combo (positive-only) results saved to {args.out}")
+            print(f"OK - combo results also loaded to DB tables 'position_compatibility', 'position_leaderboards' and 'player_explanations' (club_analytics rebuilt)")
+            print_snapshot(snapshot)
+            return 0
+
+        with span("read_players") as sp:
+            dm = read_players(create_db_engine())
+            sp.rows = len(dm)
+        de = dm.copy()  # All players
+
+        with span("stats", rows=len(dm)):
+            feat_info = build_feat_info(dm)
+            # lets predict_from_csv.py score uploads without querying the players table
+            version = save_reference_stats(feat_info)
+        with span("score", rows=len(de)):
+            df = score_players(de, feat_info)
+        with span("explanations", rows=len(de)):
+            ex = build_explanations(de, feat_info, args.top_contributors)
+
+        with span("write_csv", rows=len(df)):
+            save_results(df, args.out)
+        print(f"OK - combo (positive-only) results saved to {args.out}")
+
+        with span("leaderboards", rows=len(df)) as sp:
+            lb = build_leaderboards(df, dm, args.top_k)
+            sp.info["entries"] = len(lb)
+
+        with span("write_db", rows=len(df)) as sp:
+            conn2 = connect_db()
+            try:
+                snapshot = load_to_db(to_compat_frame(df), conn2, lb, ex, bulk=args.bulk, snapshot_version=version)
+            finally:
+                conn2.close()
+            sp.info.update(snapshot=snapshot["snapshot"], changed=snapshot["changed"])
+        print(f"OK - combo results also loaded to DB tables 'position_compatibility', 'position_leaderboards' and 'player_explanations' (club_analytics rebuilt)")
+        print_snapshot(snapshot)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
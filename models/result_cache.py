@@ -0,0 +1,217 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Per-row Result Cache for CSV uploads
+====================================
+
+Content-addressed cache of combo scores used by predict_from_csv.py:
+- key   = 64-bit hash of the row's feature values (float64 bits, NaN =
+          missing) in feature_columns() order, so player_id/name do not matter
+- value = the 9 unrounded combo scores (POSITIONS order)
+
+Scoring a row costs a few microseconds (position_fit), so the cache has to be
+cheaper than that: keys are hashed column-wise in NumPy and the table is one
+memory-mapped .npy of records sorted by key, looked up with searchsorted.
+Hits get their last-used tick written in place; new rows are queued and merged
+in by close(), which replaces the file atomically and keeps the max_rows most
+recently used rows.
+Concurrent uploads never see a torn file (the last writer wins).
+
+The table is tagged with the reference stats version plus CACHE_FORMAT, written
+after the .npy payload of the same file, so one os.replace swaps rows and tag
+together and a reader gets both from one open file. Any other version is
+treated as an empty cache, so new models or reference stats never serve stale
+scores.
+
+Hit/miss counters and the LRU tick are kept per instance (this upload) and
+cumulatively in a meta JSON next to the table (advisory: a reader pairing them
+with a newer table only skews LRU order):
+  python models/result_cache.py [--path ...] [--clear]
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+import argparse
+import json
+import os
+
+import numpy as np
+
+from position_fit import POSITIONS
+
+# ────────── Configuration ──────────
+BASE = Path(__file__).resolve().parent
+CACHE_ENV = "REPOSITION_RESULT_CACHE"  # cache file path, or "off"
+DEFAULT_PATH = BASE / "result_cache.npy"
+DEFAULT_MAX_ROWS = 500_000  # 84 bytes per row -> ~42 MB
+CACHE_FORMAT = "1"  # bump when the scoring formula (position_fit) changes
+
+RECORD = np.dtype([("key", np.uint64), ("last_used", np.uint32), ("combo", np.float64, (len(POSITIONS),))])
+_GOLDEN = np.uint64(0x9E3779B97F4A7C15)
+
+
+def cache_path() -> Path | None:
+    """Cache file from REPOSITION_RESULT_CACHE (None when set to "off")."""
+    value = os.environ.get(CACHE_ENV, "")
+    if value.lower() == "off":
+        return None
+    return Path(value) if value else DEFAULT_PATH
+
+
+def _mix(h: np.ndarray) -> np.ndarray:
+    """splitmix64 finalizer (uint64 arithmetic wraps)."""
+    h = (h ^ (h >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    h = (h ^ (h >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return h ^ (h >> np.uint64(31))
+
+
+def row_keys(X: np.ndarray) -> np.ndarray:
+    """One uint64 content hash per row of a float64 feature matrix."""
+    bits = np.asarray(X, dtype=np.float64).view(np.uint64)
+    salt = np.arange(1, bits.shape[1] + 1, dtype=np.uint64) * _GOLDEN  # per-column, so swapped values differ
+    h = np.full(len(bits), np.uint64(bits.shape[1]), dtype=np.uint64)
+    for j in range(bits.shape[1]):
+        h = _mix(h ^ _mix(bits[:, j] + salt[j]))
+    return h
+
+
+class ResultCache:
+    """Memory-mapped LRU table from row key to the unrounded combo scores."""
+
+    def __init__(self, path: Path, version: str, max_rows: int = DEFAULT_MAX_ROWS):
+        self.path = Path(path)
+        self.meta_path = self.path.with_name(self.path.name + ".json")
+        self.version = f"{version}:{CACHE_FORMAT}"
+        self.max_rows = max_rows
+        self.hits = 0
+        self.misses = 0
+        self.pending: list[np.ndarray] = []
+
+        table, version = _open_table(self.path, "r+")
+        meta = _read_meta(self.meta_path)
+        if version != self.version:
+            # models or reference stats changed (or no cache yet): every cached score is stale
+            table, meta = np.empty(0, dtype=RECORD), {}
+        self.table = table
+        self.meta = meta
+        self.tick = int(meta.get("tick", 0)) + 1
+
+    def get_many(self, keys: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """(combo (n, 9) with NaN rows for misses, hit mask); hits become most recently used."""
+        combo = np.full((len(keys), len(POSITIONS)), np.nan)
+        hit = np.zeros(len(keys), dtype=bool)
+        if len(self.table):
+            idx = np.searchsorted(self.table["key"], keys)
+            idx[idx == len(self.table)] = 0
+            hit = self.table["key"][idx] == keys
+            rows = idx[hit]
+            combo[hit] = self.table["combo"][rows]
+            self.table["last_used"][rows] = self.tick  # in place, only touched pages are written
+        n_hit = int(hit.sum())
+        self.hits += n_hit
+        self.misses += len(keys) - n_hit
+        return combo, hit
+
+    def put_many(self, keys: np.ndarray, combo: np.ndarray) -> None:
+        """Queue freshly scored rows; close() merges them into the table in one write."""
+        new = np.empty(len(keys), dtype=RECORD)
+        new["key"], new["last_used"], new["combo"] = keys, self.tick, combo
+        self.pending.append(new)
+
+    def close(self) -> None:
+        """Write queued rows and last-used ticks, and add this instance's hits/misses to the counters."""
+        if self.pending:
+            self._merge(np.concatenate(self.pending))
+            self.pending = []
+        elif isinstance(self.table, np.memmap):
+            self.table.flush()
+        self.meta["hits"] = int(self.meta.get("hits", 0)) + self.hits
+        self.meta["misses"] = int(self.meta.get("misses", 0)) + self.misses
+        self._write_meta()
+
+    def _merge(self, new: np.ndarray) -> None:
+        """Keep the max_rows most recently used of table + new (sorted by key) and replace the file."""
+        merged = np.concatenate([new[::-1], np.asarray(self.table)])
+        _, first = np.unique(merged["key"], return_index=True)  # sorted by key; newest rows win
+        merged = merged[first]
+        if len(merged) > self.max_rows:
+            keep = np.argpartition(-merged["last_used"].astype(np.int64), self.max_rows - 1)[:self.max_rows]
+            merged = merged[np.sort(keep)]
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(f".{self.path.name}.{os.getpid()}.tmp")
+        with open(tmp, "wb") as f:
+            np.save(f, merged)
+            f.write(self.version.encode())  # the tag travels with the rows
+        os.replace(tmp, self.path)  # readers never see a half-written table
+        self.table = merged
+
+    def _write_meta(self) -> None:
+        self.meta["tick"] = self.tick
+        tmp = self.meta_path.with_name(f".{self.meta_path.name}.{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(self.meta), encoding="utf-8")
+        os.replace(tmp, self.meta_path)
+
+
+def _open_table(path: Path, mode: str = "r") -> tuple[np.ndarray, str | None]:
+    """(memory-mapped table, version tag) read through one file handle; (empty, None) if unreadable."""
+    empty = np.empty(0, dtype=RECORD)
+    try:
+        with open(path, "r+b" if mode == "r+" else "rb") as f:
+            major, _ = np.lib.format.read_magic(f)
+            read_header = np.lib.format.read_array_header_1_0 if major == 1 else np.lib.format.read_array_header_2_0
+            shape, _, dtype = read_header(f)
+            offset = f.tell()
+            if dtype != RECORD or len(shape) != 1:
+                return empty, None
+            f.seek(offset + shape[0] * RECORD.itemsize)
+            version = f.read().decode() or None  # no tag: written by an older format
+            table = np.memmap(f, dtype=RECORD, mode=mode, offset=offset, shape=shape) if shape[0] else empty
+    except (OSError, ValueError):
+        return empty, None
+    return table, version
+
+
+def _read_meta(path: Path) -> dict:
+    try:
+        return json.loads(Path(path).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+
+def cache_stats(path: Path) -> dict:
+    """Cumulative counters, entry count and size of a cache file."""
+    path = Path(path)
+    meta = _read_meta(path.with_name(path.name + ".json"))
+    table, version = _open_table(path)
+    hits, misses = int(meta.get("hits", 0)), int(meta.get("misses", 0))
+    return {
+        "path": str(path),
+        "version": version,
+        "entries": len(table),
+        "bytes": path.stat().st_size if path.exists() else 0,
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": round(hits / (hits + misses), 4) if hits + misses else None,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--path", default=str(cache_path() or DEFAULT_PATH), help="Cache file")
+    parser.add_argument("--clear", action="store_true", help="Delete the cache file")
+    args = parser.parse_args()
+
+    path = Path(args.path)
+    if args.clear:
+        for p in (path, path.with_name(path.name + ".json")):
+            p.unlink(missing_ok=True)
+        print(f"OK - result cache cleared ({path})")
+        return 0
+    print(json.dumps(cache_stats(path), indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
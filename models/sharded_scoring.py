@@ -0,0 +1,331 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Sharded Scoring
+===============
+
+Splits predict_player_positions.py scoring across N worker processes (on one
+machine or several), then merges their partial outputs into the same
+result.csv and DB tables a single run produces.
+
+  run     train, freeze reference stats, start N local workers, merge
+  worker  score one shard against frozen reference stats (no training)
+  merge   validate and combine the partial outputs; write result.csv and
+          position_compatibility / position_leaderboards / player_explanations
+
+Shards (--partition):
+- hash   player_id * 2654435761 mod 2^32, mod N (Knuth multiplicative hash,
+         evaluated in SQL, so every node computes the same split)
+- range  ntile(N) over player_id order (contiguous id ranges; the players
+         table must not change while the workers run)
+
+Workers only read their shard and the frozen reference stats
+(models/reference_stats.json, see position_fit.save_reference_stats). The
+stats file records the feat_*/corr_* artifacts it was built from; a worker
+refuses to start when its local artifacts differ, so workers on other nodes
+need the same model artifacts plus a copy of the stats file.
+
+Each worker writes to --shard-dir:
+  scores-<i>-of-<N>.csv        KEEP_COLS rows (the result.csv layout)
+  explanations-<i>-of-<N>.csv  player_explanations rows
+  manifest-<i>-of-<N>.json     shard, partition, stats version, rows, file hashes
+The manifest is written last, so it marks a completed shard. Scores of a row
+depend only on that row and the stats, and merge sorts by player_id, so the
+result does not depend on N or on which node scored which shard.
+
+Usage:
+  python models/sharded_scoring.py run --shards 4
+  python models/sharded_scoring.py worker --shard 2/4 --shard-dir /mnt/shared/shards   # on each node
+  python models/sharded_scoring.py merge --shard-dir /mnt/shared/shards
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+import argparse
+import datetime
+import hashlib
+import json
+import os
+import subprocess
+import sys
+
+import pandas as pd
+
+from database import connect_db, create_db_engine
+from explanations import EXPLANATION_COLS, TOP_N, build_explanations
+from instrumentation import child_env, profiled, span
+from leaderboards import INFO_COLS, SCOPES, TOP_K, build_leaderboards
+from position_fit import REFERENCE_STATS, build_feat_info, load_reference_stats, save_reference_stats
+import predict_player_positions as ppp
+
+# ────────── Configuration ──────────
+BASE = Path(__file__).resolve().parent
+DEFAULT_SHARD_DIR = BASE.parent / "data" / "shards"
+PARTITIONS = ("hash", "range")
+HASH_MULTIPLIER = 2654435761  # Knuth: floor(2^32 / golden ratio)
+
+
+# ────────── Partitioning ──────────
+def parse_shard(value: str) -> tuple[int, int]:
+    """'2/4' -> (2, 4); shards are numbered 0..N-1."""
+    try:
+        index, shards = (int(v) for v in value.split("/"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected <index>/<shards>, got {value!r}")
+    if shards < 1 or not 0 <= index < shards:
+        raise argparse.ArgumentTypeError(f"shard index must be in 0..{shards - 1}, got {value!r}")
+    return index, shards
+
+
+def shard_query(index: int, shards: int, partition: str = "hash") -> str:
+    """SELECT for the players of one shard (index, shards and partition are validated ints/names)."""
+    if partition == "hash":
+        return (f"SELECT * FROM players "
+                f"WHERE mod(mod(player_id::bigint * {HASH_MULTIPLIER}, 4294967296), {int(shards)}) = {int(index)}")
+    if partition == "range":
+        return (f"SELECT * FROM (SELECT p.*, ntile({int(shards)}) OVER (ORDER BY player_id) AS shard_ "
+                f"FROM players p) s WHERE shard_ = {int(index) + 1}")
+    raise ValueError(f"unknown partition {partition!r} (expected one of {', '.join(PARTITIONS)})")
+
+
+def read_shard(engine, index: int, shards: int, partition: str = "hash") -> pd.DataFrame:
+    with engine.connect() as con:
+        de = pd.read_sql(shard_query(index, shards, partition), con)
+    return de.drop(columns="shard_", errors="ignore")
+
+
+def _shard_files(shard_dir: Path, index: int, shards: int) -> dict[str, Path]:
+    tag = f"{index:02d}-of-{shards:02d}"
+    return {kind: Path(shard_dir) / f"{kind}-{tag}.{ext}"
+            for kind, ext in (("scores", "csv"), ("explanations", "csv"), ("manifest", "json"))}
+
+
+def _sha256(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def frozen_feat_info(stats_path: Path) -> tuple[dict[str, dict], str]:
+    """(feat_info, version) from the frozen stats file; workers never recompute them."""
+    cached = load_reference_stats(stats_path)
+    if cached is None:
+        raise SystemExit(f"Frozen reference stats {stats_path} are missing or were built from other "
+                         f"feat_*/corr_* artifacts; run predict_player_positions.py or "
+                         f"'sharded_scoring.py run' first and copy the file with the artifacts")
+    return cached
+
+
+# ────────── Worker ──────────
+def score_shard(index: int, shards: int, partition: str, shard_dir: Path, stats_path: Path = REFERENCE_STATS,
+                top_n: int = TOP_N) -> dict:
+    """Score one shard and write its partial output; returns the manifest."""
+    with span("load_stats"):
+        feat_info, version = frozen_feat_info(stats_path)
+    with span("read_players", shard=index, shards=shards) as sp:
+        de = read_shard(create_db_engine(), index, shards, partition)
+        sp.rows = len(de)
+    with span("score", rows=len(de)):
+        df = ppp.score_players(de, feat_info)
+    with span("explanations", rows=len(de)):
+        ex = build_explanations(de, feat_info, top_n)
+
+    files = _shard_files(shard_dir, index, shards)
+    Path(shard_dir).mkdir(parents=True, exist_ok=True)
+    files["manifest"].unlink(missing_ok=True)  # an interrupted rerun must not look complete
+    with span("write_shard", rows=len(df)):
+        ppp.save_results(df, files["scores"])
+        ex.to_csv(files["explanations"], index=False, encoding="utf-8")
+        manifest = {
+            "shard": index,
+            "shards": shards,
+            "partition": partition,
+            "stats_version": version,
+            "rows": len(df),
+            "files": {kind: {"name": p.name, "sha256": _sha256(p)} for kind, p in files.items() if kind != "manifest"},
+            "created_at": datetime.datetime.now().isoformat(timespec="seconds"),
+        }
+        tmp = files["manifest"].with_name(f".{files['manifest'].name}.{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+        os.replace(tmp, files["manifest"])
+    return manifest
+
+
+# ────────── Merge ──────────
+def read_manifests(shard_dir: Path) -> list[dict]:
+    """Manifests of a complete, consistent shard set (0..N-1, one partition and stats version)."""
+    manifests = [json.loads(p.read_text(encoding="utf-8")) for p in sorted(Path(shard_dir).glob("manifest-*.json"))]
+    if not manifests:
+        raise SystemExit(f"No shard manifests in {shard_dir}")
+    for key in ("shards", "partition", "stats_version"):
+        values = {m[key] for m in manifests}
+        if len(values) > 1:
+            raise SystemExit(f"Shards in {shard_dir} disagree on {key}: {sorted(map(str, values))}")
+    shards = manifests[0]["shards"]
+    found = sorted(m["shard"] for m in manifests)
+    if found != list(range(shards)):
+        missing = sorted(set(range(shards)) - set(found))
+        raise SystemExit(f"Incomplete shard set in {shard_dir}: missing {missing} of {shards}")
+    for m in manifests:
+        for kind, f in m["files"].items():
+            if _sha256(Path(shard_dir) / f["name"]) != f["sha256"]:
+                raise SystemExit(f"Shard {m['shard']}: {f['name']} does not match its manifest")
+    return sorted(manifests, key=lambda m: m["shard"])
+
+
+def _none_for_nan(df: pd.DataFrame, cols: list[str]) -> pd.DataFrame:
+    for col in cols:
+        df[col] = df[col].astype(object).where(df[col].notna(), None)
+    return df
+
+
+def merge_shards(shard_dir: Path) -> tuple[pd.DataFrame, pd.DataFrame, dict]:
+    """(scores, explanations) of all shards in player_id order, plus the merge summary."""
+    manifests = read_manifests(shard_dir)
+    scores, explained = [], []
+    for m in manifests:
+        scores.append(pd.read_csv(Path(shard_dir) / m["files"]["scores"]["name"]))
+        explained.append(pd.read_csv(Path(shard_dir) / m["files"]["explanations"]["name"], dtype={"contributions": str}))
+    df = pd.concat(scores, ignore_index=True).sort_values("player_id", kind="stable", ignore_index=True)
+    ex = pd.concat(explained, ignore_index=True).sort_values("player_id", kind="stable", ignore_index=True)
+    if df["player_id"].duplicated().any():
+        raise SystemExit("Shards overlap: a player_id was scored by more than one shard")
+    if len(df) != sum(m["rows"] for m in manifests) or len(ex) != len(df):
+        raise SystemExit("Shard files do not match their manifests' row counts")
+    df = _none_for_nan(df, ["natural_pos", "best_combo_pos"])
+    summary = {"shards": len(manifests), "partition": manifests[0]["partition"],
+               "stats_version": manifests[0]["stats_version"], "rows": len(df)}
+    return df, ex[EXPLANATION_COLS], summary
+
+
+def read_leaderboard_info(engine) -> pd.DataFrame:
+    """The players columns build_leaderboards needs (scopes and info)."""
+    cols = ["player_id", *dict.fromkeys([*SCOPES.values(), *INFO_COLS])]
+    with engine.connect() as con:
+        return pd.read_sql(f"SELECT {', '.join(cols)} FROM players", con)
+
+
+def merge(shard_dir: Path, out: Path, top_k: int = TOP_K, db: bool = True) -> dict:
+    """Merge a shard set into result.csv and (with db) the DB tables, like a single run."""
+    with span("merge_shards") as sp:
+        df, ex, summary = merge_shards(shard_dir)
+        sp.rows = len(df)
+        sp.info.update(shards=summary["shards"])
+    with span("write_csv", rows=len(df)):
+        ppp.save_results(df, out)
+    if db:
+        with span("leaderboards", rows=len(df)) as sp:
+            lb = build_leaderboards(df, read_leaderboard_info(create_db_engine()), top_k)
+            sp.info["entries"] = len(lb)
+        with span("write_db", rows=len(df)) as sp:
+            conn = connect_db()
+            try:
+                summary["snapshot"] = ppp.load_to_db(ppp.to_compat_frame(df), conn, lb, ex,
+                                                     snapshot_version=summary["stats_version"])
+            finally:
+                conn.close()
+            sp.info.update(snapshot=summary["snapshot"]["snapshot"], changed=summary["snapshot"]["changed"])
+    return summary
+
+
+# ────────── Local run ──────────
+def freeze_reference_stats(stats_path: Path, train: bool = True, out_of_core: bool = False) -> str:
+    """Refresh the models (like predict_player_positions.py) and write the frozen stats; returns their version.
+
+    With out_of_core, training streams the players and its streamed reference
+    stats are frozen as they are, so no process ever loads the whole table.
+    """
+    if train:
+        print("Refreshing position models via pos_models.py ...")
+        with span("train_models"):
+            import pos_models
+            pos_models.main(["--out-of-core"] if out_of_core else [])
+    if out_of_core:
+        cached = frozen_feat_info(REFERENCE_STATS)  # written by pos_models.py --out-of-core
+        return save_reference_stats(cached[0], stats_path)
+    with span("read_players") as sp:
+        dm = ppp.read_players(create_db_engine())
+        sp.rows = len(dm)
+    with span("stats", rows=len(dm)):
+        return save_reference_stats(build_feat_info(dm), stats_path)
+
+
+def run_workers(shards: int, partition: str, shard_dir: Path, stats_path: Path, top_n: int = TOP_N) -> None:
+    """Start one worker process per shard (the same command a remote node runs) and wait for all of them."""
+    procs = []
+    for index in range(shards):
+        cmd = [sys.executable, str(Path(__file__).resolve()), "worker", "--shard", f"{index}/{shards}",
+               "--partition", partition, "--shard-dir", str(shard_dir), "--stats", str(stats_path),
+               "--top-contributors", str(top_n)]
+        procs.append(subprocess.Popen(cmd, env=child_env()))  # workers report under this run's id
+    failed = [i for i, p in enumerate(procs) if p.wait() != 0]
+    if failed:
+        raise SystemExit(f"Shard worker(s) {failed} failed")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Sharded position compatibility scoring")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    def common(p, partition: bool = True):
+        p.add_argument("--shard-dir", default=str(DEFAULT_SHARD_DIR), help="Directory for partial outputs")
+        p.add_argument("--stats", default=str(REFERENCE_STATS), help="Frozen reference stats file")
+        if partition:
+            p.add_argument("--partition", choices=PARTITIONS, default="hash")
+            p.add_argument("--top-contributors", type=int, default=TOP_N,
+                           help="Feature contributions kept per player and position")
+
+    def merge_args(p):
+        p.add_argument("--out", default=str(ppp.DEFAULT_OUT))
+        p.add_argument("--top-k", type=int, default=TOP_K, help="Leaderboard size per position and scope")
+        p.add_argument("--no-db", action="store_true", help="Only write result.csv")
+
+    p_run = sub.add_parser("run", help="Train, freeze stats, score N shards in local processes and merge")
+    p_run.add_argument("--shards", type=int, required=True)
+    p_run.add_argument("--skip-train", action="store_true", help="Keep the current feat_*/corr_* artifacts")
+    p_run.add_argument("--out-of-core", action="store_true",
+                       help="Train with pos_models.py --out-of-core and freeze its streamed reference stats")
+    common(p_run)
+    merge_args(p_run)
+
+    p_worker = sub.add_parser("worker", help="Score one shard against frozen reference stats")
+    p_worker.add_argument("--shard", type=parse_shard, required=True, help="<index>/<shards>, e.g. 2/4")
+    common(p_worker)
+
+    p_merge = sub.add_parser("merge", help="Merge a complete shard set")
+    common(p_merge, partition=False)
+    merge_args(p_merge)
+    args = parser.parse_args(argv)
+
+    shard_dir, stats_path = Path(args.shard_dir), Path(args.stats)
+    if args.cmd == "worker":
+        index, shards = args.shard
+        with profiled(f"sharded_scoring_worker_{index}"):
+            manifest = score_shard(index, shards, args.partition, shard_dir, stats_path, args.top_contributors)
+        print(f"OK - shard {index}/{shards}: {manifest['rows']} players scored to {shard_dir}")
+        return 0
+
+    with profiled(f"sharded_scoring_{args.cmd}"):
+        if args.cmd == "run":
+            if args.shards < 1:
+                parser.error("--shards must be at least 1")
+            version = freeze_reference_stats(stats_path, train=not args.skip_train, out_of_core=args.out_of_core)
+            for stale in shard_dir.glob("manifest-*.json"):
+                stale.unlink()  # shards of an earlier run must not be merged with this one
+            with span("score_shards", shards=args.shards):
+                run_workers(args.shards, args.partition, shard_dir, stats_path, args.top_contributors)
+            print(f"OK - {args.shards} shards scored against reference stats {version}")
+        summary = merge(shard_dir, Path(args.out), args.top_k, db=not args.no_db)
+    print(f"OK - {summary['rows']} players from {summary['shards']} shards merged into {args.out}")
+    if not args.no_db:
+        print("OK - combo results also loaded to DB tables "
+              "'position_compatibility', 'position_leaderboards' and 'player_explanations' (club_analytics rebuilt)")
+        ppp.print_snapshot(summary["snapshot"])
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
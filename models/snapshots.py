@@ -0,0 +1,255 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Versioned Compatibility Snapshots
+=================================
+
+Every scoring run that writes position_compatibility (predict_player_positions.py
+in all its modes, sharded_scoring.py merge, data_loader.py) also records a
+snapshot, on the same transaction:
+
+  compatibility_snapshots  id, stats_version (reference_stats.json version of
+                           the run), base_id (previous snapshot), players,
+                           changed, removed, created_at
+  compatibility_deltas     (player_id, snapshot_id) primary key, removed flag
+                           and the SNAPSHOT_COLS of the player
+
+Only delta rows are written: players that are new, that left, or whose row
+differs from their state in the previous snapshot. Scores count as changed
+when they move by more than SCORE_TOLERANCE fit points from the value that is
+stored (not from the previous run), so a materialized version is never off by
+more than the tolerance, however many runs went by; positions and OVR must
+match exactly. The diff runs inside PostgreSQL (INSERT ... SELECT over the
+freshly written table), so no scores travel back to the client.
+
+Reads:
+- state at snapshot S: per player the newest delta with snapshot_id <= S
+  (DISTINCT ON over the primary key), minus removed players
+- a player's fit history: the player's delta rows, one primary-key range scan
+  (also GET /api/players/:id/fit-history)
+
+CLI (S is a snapshot id, a stats version prefix or "latest"):
+  python models/snapshots.py list
+  python models/snapshots.py show S [--out file.csv]
+  python models/snapshots.py history PLAYER_ID
+  python models/snapshots.py restore S    # rollback: position_compatibility,
+                                          # leaderboards and club analytics
+                                          # from S, recorded as a new snapshot
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+
+import pandas as pd
+
+from async_pipeline import frame_to_csv
+from bulk_load import copy_into
+from database import connect_db, create_db_engine
+from instrumentation import profiled, span
+from position_fit import POSITIONS
+
+# ────────── Configuration ──────────
+SCORE_TOLERANCE = 0.05  # fit points; 0 stores every change
+FIT_COLS = [f"{p.lower()}_fit" for p in POSITIONS]
+SCORE_COLS = [*FIT_COLS, "best_fit_score"]
+SNAPSHOT_COLS = ["natural_pos", *FIT_COLS, "best_pos", "best_fit_score", "ovr"]
+SNAPSHOT_INFO_COLS = ["id", "stats_version", "base_id", "players", "changed", "removed", "created_at"]
+
+
+# ────────── SQL (shared by the psycopg2 and asyncpg paths) ──────────
+def state_sql(snapshot_id: int) -> str:
+    """player_id + SNAPSHOT_COLS of every player present at snapshot_id."""
+    return f"""
+        SELECT player_id, {', '.join(SNAPSHOT_COLS)} FROM (
+            SELECT DISTINCT ON (player_id) * FROM compatibility_deltas
+            WHERE snapshot_id <= {int(snapshot_id)}
+            ORDER BY player_id, snapshot_id DESC
+        ) d WHERE NOT removed"""
+
+
+def _changed(col: str, tolerance: float) -> str:
+    if col in SCORE_COLS:  # NaN = NaN in PostgreSQL, NULL vs value and NaN vs value count as changed
+        return f"(p.{col} IS DISTINCT FROM c.{col} AND NOT coalesce(abs(p.{col} - c.{col}) <= {float(tolerance)!r}, false))"
+    return f"p.{col} IS DISTINCT FROM c.{col}"
+
+
+def delta_sql(snapshot_id: int, base_id: int | None, tolerance: float = SCORE_TOLERANCE) -> tuple[str, str]:
+    """(changed/new rows, removed players) INSERT statements of snapshot_id against base_id."""
+    cols = ", ".join(SNAPSHOT_COLS)
+    prev = state_sql(base_id or 0)
+    changed = f"""
+        WITH prev AS ({prev}),
+        cur AS (SELECT DISTINCT ON (player_id) player_id, {cols} FROM position_compatibility
+                ORDER BY player_id, id DESC)
+        INSERT INTO compatibility_deltas (snapshot_id, player_id, removed, {cols})
+        SELECT {int(snapshot_id)}, c.player_id, false, {', '.join(f'c.{col}' for col in SNAPSHOT_COLS)}
+        FROM cur c LEFT JOIN prev p ON p.player_id = c.player_id
+        WHERE p.player_id IS NULL OR {' OR '.join(_changed(col, tolerance) for col in SNAPSHOT_COLS)}"""
+    removed = f"""
+        INSERT INTO compatibility_deltas (snapshot_id, player_id, removed)
+        SELECT {int(snapshot_id)}, p.player_id, true FROM ({prev}) p
+        WHERE NOT EXISTS (SELECT 1 FROM position_compatibility c WHERE c.player_id = p.player_id)"""
+    return changed, removed
+
+
+NEW_SNAPSHOT_SQL = """
+    INSERT INTO compatibility_snapshots (stats_version, base_id, players, changed, removed)
+    SELECT {version}, max(id), (SELECT count(DISTINCT player_id) FROM position_compatibility), 0, 0
+    FROM compatibility_snapshots
+    RETURNING id, base_id, players"""
+COUNTS_SQL = "UPDATE compatibility_snapshots SET changed = {changed}, removed = {removed} WHERE id = {id}"
+LOCK_SQL = "LOCK TABLE compatibility_snapshots IN SHARE ROW EXCLUSIVE MODE"  # one recorder at a time
+
+
+# ────────── Record ──────────
+def record_snapshot(cur, stats_version: str, tolerance: float = SCORE_TOLERANCE) -> dict:
+    """Snapshot the position_compatibility rows written on cur's transaction (the caller commits)."""
+    cur.execute(LOCK_SQL)
+    cur.execute(NEW_SNAPSHOT_SQL.format(version="%s"), (stats_version,))
+    snapshot_id, base_id, players = cur.fetchone()
+    changed_sql, removed_sql = delta_sql(snapshot_id, base_id, tolerance)
+    cur.execute(changed_sql)
+    changed = cur.rowcount
+    cur.execute(removed_sql)
+    removed = cur.rowcount
+    cur.execute(COUNTS_SQL.format(changed=changed, removed=removed, id=snapshot_id))
+    return {"snapshot": snapshot_id, "players": players, "changed": changed, "removed": removed}
+
+
+async def record_snapshot_async(conn, stats_version: str, tolerance: float = SCORE_TOLERANCE) -> dict:
+    """record_snapshot over an asyncpg connection (inside the caller's transaction)."""
+    await conn.execute(LOCK_SQL)
+    row = await conn.fetchrow(NEW_SNAPSHOT_SQL.format(version="$1"), stats_version)
+    changed_sql, removed_sql = delta_sql(row["id"], row["base_id"], tolerance)
+    changed = int((await conn.execute(changed_sql)).split()[-1])  # "INSERT 0 <n>"
+    removed = int((await conn.execute(removed_sql)).split()[-1])
+    await conn.execute(COUNTS_SQL.format(changed=changed, removed=removed, id=row["id"]))
+    return {"snapshot": row["id"], "players": row["players"], "changed": changed, "removed": removed}
+
+
+# ────────── Read ──────────
+def _read(cur, query: str, params=()) -> pd.DataFrame:
+    cur.execute(query, params)
+    return pd.DataFrame(cur.fetchall(), columns=[d[0] for d in cur.description])
+
+
+def list_snapshots(cur) -> pd.DataFrame:
+    frame = _read(cur, f"SELECT {', '.join(SNAPSHOT_INFO_COLS)} FROM compatibility_snapshots ORDER BY id")
+    return frame.astype({"base_id": "Int64"})  # None for the first snapshot
+
+
+def resolve_snapshot(cur, ref: str) -> tuple[int, str]:
+    """(id, stats_version) for a snapshot id, a stats version prefix (its newest snapshot) or "latest"."""
+    row = None
+    if ref == "latest":
+        cur.execute("SELECT id, stats_version FROM compatibility_snapshots ORDER BY id DESC LIMIT 1")
+        row = cur.fetchone()
+    elif ref.isdigit():
+        cur.execute("SELECT id, stats_version FROM compatibility_snapshots WHERE id = %s", (int(ref),))
+        row = cur.fetchone()
+    if row is None and ref != "latest":  # versions are hex, so digits may also be a version prefix
+        cur.execute("SELECT id, stats_version FROM compatibility_snapshots WHERE stats_version LIKE %s "
+                    "ORDER BY id DESC LIMIT 1", (ref.replace("%", r"\%").replace("_", r"\_") + "%",))
+        row = cur.fetchone()
+    if not row:
+        raise SystemExit(f"No snapshot matches {ref!r} (see: python models/snapshots.py list)")
+    return row
+
+
+def materialize(cur, snapshot_id: int) -> pd.DataFrame:
+    """player_id + SNAPSHOT_COLS as of snapshot_id, by player_id."""
+    return _read(cur, state_sql(snapshot_id) + " ORDER BY player_id")
+
+
+def player_history(cur, player_id: int) -> pd.DataFrame:
+    """One row per snapshot in which the player's row changed (or the player appeared / left), oldest first."""
+    return _read(cur, f"""
+        SELECT d.snapshot_id, s.stats_version, s.created_at, d.removed, {', '.join(f'd.{c}' for c in SNAPSHOT_COLS)}
+        FROM compatibility_deltas d JOIN compatibility_snapshots s ON s.id = d.snapshot_id
+        WHERE d.player_id = %s ORDER BY d.snapshot_id""", (player_id,))
+
+
+# ────────── Restore ──────────
+def restore_snapshot(conn, ref: str) -> dict:
+    """Rollback to a snapshot: position_compatibility and position_leaderboards from its state, then
+    club_analytics; the restored state is recorded as a new snapshot (tagged with the restored version).
+
+    player_explanations stays as written by the latest run (the old reference stats are not kept).
+    """
+    import predict_player_positions as ppp
+    from club_analytics import rebuild_club_analytics
+    from leaderboards import build_leaderboards, load_leaderboards
+    from sharded_scoring import read_leaderboard_info
+
+    cur = conn.cursor()
+    try:
+        snapshot_id, version = resolve_snapshot(cur, ref)
+        with span("materialize_snapshot") as sp:
+            state = materialize(cur, snapshot_id)
+            sp.rows = len(state)
+        compat = state.assign(best_fit_pct=state["best_fit_score"])
+        scored = state.rename(columns={f"{p.lower()}_fit": f"{p}_combo" for p in POSITIONS})
+        with span("leaderboards", rows=len(state)):
+            lb = build_leaderboards(scored, read_leaderboard_info(create_db_engine()))
+        with span("write_db", rows=len(state)) as sp:
+            load_leaderboards(lb, cur)
+            cur.execute("TRUNCATE TABLE position_compatibility;")
+            copy_into(cur, "position_compatibility", list(compat.columns),
+                      frame_to_csv(compat, int_cols=["player_id", "ovr"]))
+            summary = record_snapshot(cur, version, tolerance=0)
+        rebuild_club_analytics(cur)
+        conn.commit()
+        sp.info.update(summary)
+    finally:
+        cur.close()
+    return {"restored": snapshot_id, "stats_version": version, **summary}
+
+
+# ────────── CLI ──────────
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Versioned position_compatibility snapshots")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("list", help="All snapshots with their change counts")
+    p_show = sub.add_parser("show", help="Materialize the scores of one snapshot")
+    p_show.add_argument("snapshot", nargs="?", default="latest")
+    p_show.add_argument("--out", default=None, help="CSV file (default: stdout)")
+    p_history = sub.add_parser("history", help="How a player's scores changed across snapshots")
+    p_history.add_argument("player_id", type=int)
+    p_restore = sub.add_parser("restore", help="Roll position_compatibility back to a snapshot")
+    p_restore.add_argument("snapshot")
+    args = parser.parse_args(argv)
+
+    with profiled(f"snapshots_{args.cmd}"):
+        conn = connect_db()
+        try:
+            if args.cmd == "restore":
+                summary = restore_snapshot(conn, args.snapshot)
+                print(f"OK - snapshot {summary['restored']} ({summary['stats_version']}) restored to "
+                      f"'position_compatibility' as snapshot {summary['snapshot']} "
+                      f"({summary['changed']} changed, {summary['removed']} removed)")
+                return 0
+            cur = conn.cursor()
+            if args.cmd == "list":
+                frame = list_snapshots(cur)
+            elif args.cmd == "history":
+                frame = player_history(cur, args.player_id)
+                if frame.empty:
+                    raise SystemExit(f"No snapshot contains player {args.player_id}")
+            else:
+                snapshot_id, _ = resolve_snapshot(cur, args.snapshot)
+                frame = materialize(cur, snapshot_id)
+            cur.close()
+        finally:
+            conn.close()
+    if args.cmd == "show" and args.out:
+        frame.to_csv(args.out, index=False, float_format="%.1f", encoding="utf-8")
+        print(f"OK - snapshot {snapshot_id}: {len(frame)} players saved to {args.out}")
+    else:
+        frame.to_csv(sys.stdout, index=False, float_format="%.1f")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
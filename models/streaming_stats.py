@@ -0,0 +1,166 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+One-pass Streaming Accumulators
+===============================
+
+Statistics for data that arrives in batches and never fits in memory at once
+(pos_models.py --out-of-core). Memory depends on the number of columns, never
+on the number of rows.
+
+- RunningMoments       per-column count / mean / variance, NaN ignored
+- RunningCorrelation   Pearson correlation matrix over pairwise-complete rows
+                       (same definition as DataFrame.corr())
+- BinaryMetrics        holdout AUC (binned), accuracy, precision / recall / F1
+                       and the confusion matrix of a binary classifier
+
+Moments use Welford's update generalised to batches (Chan et al.): each batch
+is summarised around its own mean, then merged with
+
+  delta = mean_b - mean_a,  n = n_a + n_b
+  mean  = mean_a + delta * n_b / n
+  M2    = M2_a + M2_b + delta^2 * n_a * n_b / n
+
+so no sum of squares of raw values is ever formed (no catastrophic
+cancellation on large counts).
+"""
+
+from __future__ import annotations
+
+import numpy as np
+
+
+def _nan_column_means(X: np.ndarray, ok: np.ndarray) -> np.ndarray:
+    counts = ok.sum(axis=0)
+    sums = np.where(ok, X, 0.0).sum(axis=0)
+    return np.divide(sums, counts, out=np.zeros(X.shape[1]), where=counts > 0)
+
+
+class RunningMoments:
+    """Per-column count, mean and M2 of a stream of (n, k) batches; NaN values are skipped."""
+
+    def __init__(self, k: int):
+        self.n = np.zeros(k)
+        self._mean = np.zeros(k)
+        self.m2 = np.zeros(k)
+
+    def update(self, X: np.ndarray) -> None:
+        X = np.asarray(X, dtype=np.float64)
+        if not len(X):
+            return
+        ok = ~np.isnan(X)
+        nb = ok.sum(axis=0).astype(np.float64)
+        mb = _nan_column_means(X, ok)
+        m2b = (np.where(ok, X - mb, 0.0) ** 2).sum(axis=0)
+
+        n = self.n + nb
+        safe = np.where(n > 0, n, 1.0)
+        delta = mb - self._mean
+        self._mean = self._mean + delta * nb / safe
+        self.m2 = self.m2 + m2b + delta ** 2 * self.n * nb / safe
+        self.n = n
+
+    @property
+    def mean(self) -> np.ndarray:
+        """Column means (NaN for columns without values, like pandas)."""
+        return np.where(self.n > 0, self._mean, np.nan)
+
+    @property
+    def std(self) -> np.ndarray:
+        """Sample standard deviation (ddof=1, NaN below two values, like pandas)."""
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(self.n > 1, np.sqrt(self.m2 / (self.n - 1)), np.nan)
+
+
+class RunningCorrelation:
+    """Pearson correlations of k columns, each pair over the rows where both are present.
+
+    Keeps (k, k) counts, means, M2s and co-moments; entry [i, j] of means/M2
+    describes column i over the rows where i and j are both present, so
+    [j, i] holds the same for column j.
+    """
+
+    def __init__(self, k: int):
+        self.n = np.zeros((k, k))
+        self.mean = np.zeros((k, k))
+        self.m2 = np.zeros((k, k))
+        self.comoment = np.zeros((k, k))
+
+    def update(self, X: np.ndarray) -> None:
+        X = np.asarray(X, dtype=np.float64)
+        if not len(X):
+            return
+        ok = ~np.isnan(X)
+        M = ok.astype(np.float64)
+        shift = _nan_column_means(X, ok)  # sums below are taken around the batch means
+        Xc = np.where(ok, X - shift, 0.0)
+
+        nb = M.T @ M
+        safe_b = np.where(nb > 0, nb, 1.0)
+        mb = (Xc.T @ M) / safe_b                      # [i, j]: centred mean of i over the joint rows
+        m2b = (Xc ** 2).T @ M - nb * mb ** 2
+        cb = Xc.T @ Xc - nb * mb * mb.T
+        mb = mb + shift[:, None]
+
+        n = self.n + nb
+        safe = np.where(n > 0, n, 1.0)
+        delta = mb - self.mean
+        w = self.n * nb / safe
+        self.mean = self.mean + delta * nb / safe
+        self.m2 = self.m2 + m2b + delta ** 2 * w
+        self.comoment = self.comoment + cb + delta * delta.T * w
+        self.n = n
+
+    def corr(self) -> np.ndarray:
+        """(k, k) correlation matrix; NaN for pairs with fewer than two rows or a constant column."""
+        with np.errstate(invalid="ignore", divide="ignore"):
+            r = self.comoment / np.sqrt(self.m2 * self.m2.T)
+        r[(self.n < 2) | ~np.isfinite(r)] = np.nan
+        r = np.clip(r, -1.0, 1.0)
+        diag = np.diag(self.m2) > 0
+        r[np.flatnonzero(diag), np.flatnonzero(diag)] = 1.0
+        return r
+
+
+class BinaryMetrics:
+    """Streaming holdout metrics; AUC from per-bin positive/negative counts of the predicted probability."""
+
+    def __init__(self, bins: int = 10_000, threshold: float = 0.5):
+        self.bins = bins
+        self.threshold = threshold
+        self.pos_hist = np.zeros(bins, dtype=np.int64)
+        self.neg_hist = np.zeros(bins, dtype=np.int64)
+        self.confusion = np.zeros((2, 2), dtype=np.int64)  # rows = true (0, 1), cols = predicted (0, 1)
+
+    def update(self, y: np.ndarray, prob: np.ndarray) -> None:
+        y = np.asarray(y).astype(bool)
+        prob = np.asarray(prob, dtype=np.float64)
+        idx = np.clip((prob * self.bins).astype(np.int64), 0, self.bins - 1)
+        self.pos_hist += np.bincount(idx[y], minlength=self.bins)
+        self.neg_hist += np.bincount(idx[~y], minlength=self.bins)
+        pred = prob >= self.threshold
+        self.confusion += np.bincount(2 * y.astype(np.int64) + pred, minlength=4).reshape(2, 2)
+
+    @property
+    def auc(self) -> float:
+        """Probability that a positive outranks a negative (ties within a bin count half)."""
+        n_pos, n_neg = self.pos_hist.sum(), self.neg_hist.sum()
+        if not n_pos or not n_neg:
+            return float("nan")
+        neg_below = np.cumsum(self.neg_hist) - self.neg_hist
+        return float((self.pos_hist * (neg_below + 0.5 * self.neg_hist)).sum() / (n_pos * n_neg))
+
+    @property
+    def accuracy(self) -> float:
+        total = self.confusion.sum()
+        return float(np.trace(self.confusion) / total) if total else float("nan")
+
+    def precision_recall_f1(self) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """Per-class (0, 1) precision, recall, F1 and support; 0 where undefined (zero_division=0)."""
+        tp = np.diag(self.confusion).astype(np.float64)
+        predicted = self.confusion.sum(axis=0)
+        support = self.confusion.sum(axis=1)
+        prec = np.divide(tp, predicted, out=np.zeros(2), where=predicted > 0)
+        rec = np.divide(tp, support, out=np.zeros(2), where=support > 0)
+        f1 = np.divide(2 * prec * rec, prec + rec, out=np.zeros(2), where=(prec + rec) > 0)
+        return prec, rec, f1, support
@@ -0,0 +1,146 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Synthetic Player Generator
+==========================
+
+Generates players with the same column schema as data/players.csv and with
+per-position attribute distributions fitted on the real file:
+- numeric columns are drawn per sub_position from a multivariate normal
+  (mean + covariance of the real players at that position), then clipped to
+  the observed range and rounded (market values are modelled in log space)
+- categorical columns are resampled from the real joint values
+  (club_id/current_club_name, league/team, sub_position/position)
+
+Usage:
+  python models/synthetic_players.py --rows 50000 --out /tmp/players_50k.csv
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+import argparse
+
+import numpy as np
+import pandas as pd
+
+# ────────── Configuration ──────────
+BASE = Path(__file__).resolve().parent
+REFERENCE_CSV = BASE.parent / "data" / "players.csv"
+ID_OFFSET = 10_000_000  # keeps synthetic player_ids clear of real ones
+
+LOG_COLS = ["market_value_in_eur", "highest_market_value_in_eur"]
+SKIP_NUMERIC = {"id", "player_id", "club_id"}
+# columns resampled together so that the generated rows stay consistent
+JOINT_GROUPS = [
+    ["club_id", "current_club_name"],
+    ["league", "team"],
+]
+INDEPENDENT_CATS = ["country_of_citizenship", "foot", "preferred_foot"]
+
+
+def fit_profile(reference_csv: Path = REFERENCE_CSV) -> dict:
+    """Fit per-position distributions from the real players file."""
+    ref = pd.read_csv(reference_csv)
+    ref = ref[ref["sub_position"].notna()]
+    numeric = [c for c in ref.select_dtypes(include="number").columns if c not in SKIP_NUMERIC]
+
+    values = ref[numeric].astype(float)
+    for c in LOG_COLS:
+        if c in values:
+            values[c] = np.log1p(values[c].clip(lower=0))
+
+    positions = {}
+    for pos, grp in values.groupby(ref["sub_position"]):
+        filled = grp.fillna(grp.mean())
+        positions[pos] = {
+            "weight": len(grp) / len(ref),
+            "mean": filled.mean().to_numpy(),
+            "cov": np.nan_to_num(np.cov(filled.to_numpy(), rowvar=False)),
+            "position": ref.loc[grp.index, "position"].mode().iat[0],
+        }
+
+    return {
+        "columns": list(ref.columns),
+        "numeric": numeric,
+        "lo": values.min().to_numpy(),
+        "hi": values.max().to_numpy(),
+        "int_cols": [c for c in numeric if pd.api.types.is_integer_dtype(ref[c])],
+        "missing": ref[numeric].isna().mean().to_dict(),
+        "positions": positions,
+        "joint": {tuple(g): ref[g].drop_duplicates().reset_index(drop=True) for g in JOINT_GROUPS},
+        "cats": {c: ref[c].value_counts(normalize=True, dropna=False) for c in INDEPENDENT_CATS},
+    }
+
+
+def generate_players(n: int, profile: dict | None = None, seed: int = 42) -> pd.DataFrame:
+    """Return n synthetic players with the players.csv schema."""
+    profile = profile or fit_profile()
+    rng = np.random.default_rng(seed)
+    numeric = profile["numeric"]
+
+    pos_names = list(profile["positions"])
+    weights = np.array([profile["positions"][p]["weight"] for p in pos_names])
+    pos_idx = rng.choice(len(pos_names), size=n, p=weights / weights.sum())
+
+    values = np.empty((n, len(numeric)), dtype=np.float64)
+    for i, pos in enumerate(pos_names):
+        mask = pos_idx == i
+        k = int(mask.sum())
+        if k:
+            dist = profile["positions"][pos]
+            values[mask] = rng.multivariate_normal(dist["mean"], dist["cov"], size=k, method="eigh")
+    np.clip(values, profile["lo"], profile["hi"], out=values)
+
+    out = pd.DataFrame(values, columns=numeric)
+    for c in LOG_COLS:
+        if c in out:
+            out[c] = np.expm1(out[c])
+    for c in profile["int_cols"]:
+        out[c] = np.rint(out[c]).astype(np.int64)
+    for c, rate in profile["missing"].items():
+        if rate > 0:
+            out[c] = out[c].astype(float).mask(rng.random(n) < rate)
+
+    out["id"] = np.arange(1, n + 1, dtype=np.int64)
+    out["player_id"] = ID_OFFSET + out["id"]
+    out["name"] = [f"synthetic player {i}" for i in range(1, n + 1)]
+    out["sub_position"] = np.array(pos_names, dtype=object)[pos_idx]
+    out["position"] = np.array([profile["positions"][p]["position"] for p in pos_names], dtype=object)[pos_idx]
+
+    for cols, table in profile["joint"].items():
+        picked = table.iloc[rng.integers(0, len(table), size=n)].reset_index(drop=True)
+        for c in cols:
+            out[c] = picked[c]
+    for c, freq in profile["cats"].items():
+        out[c] = rng.choice(freq.index.to_numpy(dtype=object), size=n, p=freq.to_numpy())
+
+    if "age" in out:
+        birth_year = pd.Timestamp.now().year - out["age"].fillna(25).astype(int)
+        out["date_of_birth"] = (rng.integers(1, 13, size=n).astype(str) + "/"
+                                + rng.integers(1, 29, size=n).astype(str) + "/"
+                                + birth_year.astype(str))
+    out["created_at"] = pd.Timestamp.now(tz="UTC").strftime("%Y-%m-%dT%H:%M:%S.000Z")
+    out["image_url"] = None
+
+    return out[[c for c in profile["columns"] if c in out.columns]]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, required=True, help="Number of players to generate")
+    parser.add_argument("--out", required=True, help="Path to output CSV")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--reference", default=str(REFERENCE_CSV), help="Real players CSV to fit distributions on")
+    args = parser.parse_args()
+
+    df = generate_players(args.rows, fit_profile(Path(args.reference)), seed=args.seed)
+    out_csv = Path(args.out)
+    out_csv.parent.mkdir(parents=True, exist_ok=True)
+    df.to_csv(out_csv, index=False, encoding="utf-8")
+    print(f"OK - {len(df):,} synthetic players saved to {out_csv}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
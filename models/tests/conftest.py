@@ -0,0 +1,30 @@
+"""The models/ scripts import each other as top-level modules; make them importable from the tests.
+
+Tests that need PostgreSQL take db_cursor and are skipped unless $REPOSITION_TEST_DATABASE_URL is set.
+"""
+
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+TEST_DATABASE_URL = "REPOSITION_TEST_DATABASE_URL"
+
+
+@pytest.fixture
+def db_cursor():
+    """psycopg2 cursor on $REPOSITION_TEST_DATABASE_URL, rolled back afterwards; skips when unset."""
+    dsn = os.environ.get(TEST_DATABASE_URL)
+    if not dsn:
+        pytest.skip(f"{TEST_DATABASE_URL} not set")
+    psycopg2 = pytest.importorskip("psycopg2")
+    conn = psycopg2.connect(dsn)
+    try:
+        with conn.cursor() as cur:
+            yield cur
+    finally:
+        conn.rollback()
+        conn.close()
@@ -0,0 +1,125 @@
+import asyncio
+import csv
+import io
+import itertools
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from async_pipeline import NULL, frame_batches, frame_to_csv, rows_to_csv, run_pipeline
+
+
+def _run(coro, timeout=5):
+    """Run a coroutine, failing instead of hanging if a stage never finishes."""
+    return asyncio.run(asyncio.wait_for(coro, timeout))
+
+
+async def _numbers(n=None):
+    for i in itertools.count() if n is None else range(n):
+        yield i
+        await asyncio.sleep(0)
+
+
+def test_frame_to_csv_encodes_nulls_quotes_and_ints():
+    df = pd.DataFrame({
+        "player_id": [1.0, 2.0, np.nan],          # float after a merge: written as 1, 2, NULL
+        "name": ['Sánchez, "Alexis"', "", None],  # "" stays an empty string, None is NULL
+        "fit": [61.25, np.nan, 70.0],
+    })
+    payload = frame_to_csv(df, int_cols=["player_id", "missing"])
+    assert payload == ('1,"Sánchez, ""Alexis""",61.25\n'
+                       '2,,\\N\n'  # unquoted empty is "" under NULL '\\N'
+                       '\\N,\\N,70.0\n').encode("utf-8")
+    rows = list(csv.reader(io.StringIO(payload.decode("utf-8"))))
+    assert rows[0] == ["1", 'Sánchez, "Alexis"', "61.25"] and rows[1][1] == "" and rows[2][:2] == [NULL, NULL]
+    assert df["player_id"].dtype == float  # the caller's frame is not converted in place
+
+
+def test_rows_to_csv_writes_none_as_null():
+    payload = rows_to_csv([(7, "ST", None), (8, 'say "hi"', 0.5)])
+    assert payload == b'7,ST,\\N\n8,"say ""hi""",0.5\n'
+
+
+def test_pipeline_keeps_source_order():
+    df = pd.DataFrame({"x": range(23)})
+    seen = []
+
+    async def sink(batch):
+        seen.append(batch["x"].tolist())
+
+    stats = _run(run_pipeline(frame_batches(df, batch_rows=5), lambda b: b.assign(x=b["x"] * 2), sink))
+    assert seen == [[2 * x for x in range(a, min(a + 5, 23))] for a in range(0, 23, 5)]
+    assert stats["batches"] == 5 and set(stats) == {"batches", "source_s", "work_s", "sink_s", "wall_s"}
+
+
+def test_pipeline_passes_batches_through_without_work():
+    seen = []
+
+    async def sink(batch):
+        seen.append(batch)
+
+    assert _run(run_pipeline(_numbers(3), None, sink))["batches"] == 3
+    assert seen == [0, 1, 2]
+
+
+def test_slow_sink_holds_back_the_source():
+    depth, produced, lead = 2, [], []
+
+    async def source():
+        async for i in _numbers(40):
+            produced.append(i)
+            yield i
+
+    async def sink(i):
+        lead.append(len(produced) - i - 1)  # batches read but not yet written
+        await asyncio.sleep(0.002)
+
+    _run(run_pipeline(source(), None, sink, depth=depth))
+    # two queues of `depth`, plus one batch held by each stage
+    assert max(lead) <= 2 * depth + 3 and len(produced) == 40
+
+
+def test_failing_work_stops_an_endless_source():
+    def work(i):
+        if i == 5:
+            raise ValueError("bad batch")
+        return i
+
+    written = []
+
+    async def sink(i):
+        written.append(i)
+
+    with pytest.raises(ValueError, match="bad batch"):
+        _run(run_pipeline(_numbers(), work, sink, depth=2))
+    assert written == [0, 1, 2, 3, 4]
+
+
+def test_failing_sink_cancels_the_other_stages():
+    produced = []
+
+    async def source():
+        async for i in _numbers():
+            produced.append(i)
+            yield i
+
+    async def sink(i):
+        if i == 3:
+            raise ConnectionError("COPY failed")
+
+    with pytest.raises(ConnectionError):
+        _run(run_pipeline(source(), None, sink, depth=2))
+    assert len(produced) <= 4 + 2 * 2 + 3  # the source stopped within the queued window
+
+
+def test_failing_source_is_raised():
+    async def source():
+        yield 1
+        raise OSError("connection lost")
+
+    async def sink(_):
+        pass
+
+    with pytest.raises(OSError, match="connection lost"):
+        _run(run_pipeline(source(), None, sink))
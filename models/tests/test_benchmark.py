@@ -0,0 +1,66 @@
+import json
+
+from benchmark import MIN_ABS_SECONDS, _report, compare
+
+BASELINE = json.loads("""
+{
+  "results": [
+    {"rows": 5000,  "stage": "score", "seconds": 0.400, "peak_rss_mb": 200.0},
+    {"rows": 5000,  "stage": "load",  "seconds": 0.010, "peak_rss_mb": 150.0},
+    {"rows": 50000, "stage": "score", "seconds": 2.000, "peak_rss_mb": 400.0}
+  ],
+  "startup": [
+    {"name": "import:pos_models", "seconds": 0.300},
+    {"name": "upload_cached", "seconds": 0.500, "budget_s": 1.0}
+  ]
+}
+""")
+
+
+def _results(score_5k=0.4, load_5k=0.01, score_50k=2.0, rss_50k=400.0, startup=0.3, upload=0.5):
+    return {
+        "results": [
+            {"rows": 5000, "stage": "score", "seconds": score_5k, "peak_rss_mb": 200.0},
+            {"rows": 5000, "stage": "load", "seconds": load_5k, "peak_rss_mb": 150.0},
+            {"rows": 50000, "stage": "score", "seconds": score_50k, "peak_rss_mb": rss_50k},
+            {"rows": 500000, "stage": "score", "seconds": 30.0, "peak_rss_mb": 900.0},  # not in the baseline
+        ],
+        "startup": [
+            {"name": "import:pos_models", "seconds": startup},
+            {"name": "upload_cached", "seconds": upload, "budget_s": 1.0},
+        ],
+    }
+
+
+def test_same_numbers_pass():
+    assert compare(_results(), BASELINE) == []
+    assert _report([]) == 0
+
+
+def test_slowdown_past_tolerance_is_flagged():
+    regressions = compare(_results(score_50k=2.6), BASELINE)
+    assert regressions == ["score @ 50,000 rows: 2.000s -> 2.600s (+30%)"]
+    assert compare(_results(score_50k=2.4), BASELINE) == []  # +20% is within the 25% default
+    assert compare(_results(score_50k=2.4), BASELINE, tolerance=0.1) != []
+
+
+def test_timer_noise_on_fast_stages_is_ignored():
+    assert compare(_results(load_5k=0.01 + MIN_ABS_SECONDS / 2), BASELINE) == []  # +250%, but a few ms
+    assert compare(_results(load_5k=0.01 + 2 * MIN_ABS_SECONDS), BASELINE) != []
+
+
+def test_memory_growth_is_flagged():
+    (line,) = compare(_results(rss_50k=520.0), BASELINE)
+    assert line == "score @ 50,000 rows: peak RSS 400.0 MB -> 520.0 MB"
+    assert compare(_results(rss_50k=520.0), BASELINE, mem_tolerance=0.5) == []
+
+
+def test_startup_regressions_and_budget(capsys):
+    assert compare(_results(startup=0.5), BASELINE) == ["startup import:pos_models: 0.300s -> 0.500s"]
+    regressions = compare(_results(upload=1.2), BASELINE)
+    assert regressions == ["startup upload_cached: 0.500s -> 1.200s",
+                           "startup upload_cached: 1.200s exceeds budget 1.000s"]
+    # the budget holds even without a baseline entry
+    assert compare(_results(upload=1.2), {"results": []}) == ["startup upload_cached: 1.200s exceeds budget 1.000s"]
+    assert _report(regressions) == 1
+    assert "2 regression(s)" in capsys.readouterr().out
@@ -0,0 +1,57 @@
+import pytest
+
+from async_pipeline import rows_to_csv
+from bulk_load import replace_table
+
+
+@pytest.fixture
+def tables(db_cursor):
+    """bulk_parent (serial key, plain index) and bulk_child (ON DELETE CASCADE into it), in a rolled-back transaction."""
+    cur = db_cursor
+    cur.execute("""
+        CREATE TABLE bulk_parent (id serial PRIMARY KEY, name text NOT NULL, CHECK (name <> ''));
+        CREATE INDEX bulk_parent_name_idx ON bulk_parent (name);
+        CREATE TABLE bulk_child (id int PRIMARY KEY, parent_id int REFERENCES bulk_parent ON DELETE CASCADE);
+        INSERT INTO bulk_parent (name) VALUES ('a'), ('b'), ('c');
+        INSERT INTO bulk_child VALUES (1, 1), (2, 2), (3, 3)""")
+    return cur
+
+
+def _names(cur, sql, table):
+    cur.execute(sql, (table,))
+    return sorted(name for name, in cur.fetchall())
+
+
+def test_replace_table_swaps_in_an_indexed_copy(tables, capsys):
+    cur = tables
+    rows, info = replace_table(cur, "bulk_parent", ["id", "name"], rows_to_csv([(1, "x"), (3, "z"), (4, "w")]))
+
+    assert rows == 3 and info == {"indexes": 2, "foreign_keys": 1}
+    cur.execute("SELECT id, name FROM bulk_parent ORDER BY id")
+    assert cur.fetchall() == [(1, "x"), (3, "z"), (4, "w")]
+    cur.execute("SELECT id FROM bulk_child ORDER BY id")
+    assert cur.fetchall() == [(1,), (3,)]  # ON DELETE CASCADE for the parent that is gone
+    assert _names(cur, "SELECT relname FROM pg_class WHERE oid IN "
+                       "(SELECT indexrelid FROM pg_index WHERE indrelid = %s::regclass)",
+                  "bulk_parent") == ["bulk_parent_name_idx", "bulk_parent_pkey"]
+    assert _names(cur, "SELECT conname FROM pg_constraint WHERE conrelid = %s::regclass",
+                  "bulk_parent") == ["bulk_parent_name_check", "bulk_parent_pkey"]
+    cur.execute("SELECT pg_get_serial_sequence('bulk_parent', 'id') IS NOT NULL, "
+                "relpersistence FROM pg_class WHERE oid = 'bulk_parent'::regclass")
+    assert cur.fetchone() == (True, "p")
+    assert "⚠️" not in capsys.readouterr().out
+
+
+def test_swap_in_warns_about_grants(tables, capsys):
+    tables.execute("GRANT SELECT ON bulk_parent TO PUBLIC")
+    replace_table(tables, "bulk_parent", ["id", "name"], rows_to_csv([(1, "x")]))
+    assert "grants on bulk_parent" in capsys.readouterr().out
+
+
+def test_swap_in_warns_about_views(tables, capsys):
+    import psycopg2
+
+    tables.execute("CREATE VIEW bulk_parent_names AS SELECT name FROM bulk_parent")
+    with pytest.raises(psycopg2.errors.DependentObjectsStillExist):
+        replace_table(tables, "bulk_parent", ["id", "name"], rows_to_csv([(1, "x")]))
+    assert "views on bulk_parent (bulk_parent_names)" in capsys.readouterr().out
@@ -0,0 +1,75 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from club_analytics import ANALYTICS_COLS, FIT_COLS, build_club_analytics
+from position_fit import POSITIONS
+
+CLUBS = pd.DataFrame({"club_id": [1, 2, 3], "name": ["Alpha FC", "Beta United", "Empty Town"]})
+PLAYERS = pd.DataFrame({
+    "player_id": [1, 2, 3, 4, 5, 6],
+    "club_id": [1, 1, 1, 99, None, 2],  # 99 is not in clubs, 5 has no club_id
+    "current_club_name": ["Alpha (old spelling)", "Alpha FC", "Alpha FC", "Gamma", "Gamma", "Beta United"],
+    "age": [20, 27, 31, 24, None, 29],
+    "market_value_in_eur": [1e6, 3e6, None, 5e5, 2e5, 8e6],
+})
+
+
+def _compat(player_id, best_pos, default, **fits):
+    return {"player_id": player_id, "best_pos": best_pos, **{c: fits.get(c, default) for c in FIT_COLS}}
+
+
+COMPAT = pd.DataFrame([
+    _compat(1, "ST", 60.0, st_fit=80.0, lw_fit=45.0, rw_fit=45.0),
+    _compat(2, "LW", 60.0, cb_fit=70.0, lw_fit=40.0, rw_fit=45.0),
+    # player 3 was not scored
+    _compat(4, "CM", 50.0, cb_fit=np.nan),
+    _compat(6, "ST", 55.0, st_fit=70.0, lb_fit=np.nan),
+])
+
+
+@pytest.fixture(scope="module")
+def clubs():
+    ca = build_club_analytics(PLAYERS, COMPAT, CLUBS)
+    assert list(ca.columns) == ANALYTICS_COLS
+    return {row["club_name"]: row for row in ca.to_dict("records")}
+
+
+def test_squads_join_on_club_id_then_name(clubs):
+    assert sorted(clubs) == ["Alpha FC", "Beta United", "Empty Town", "Gamma"]
+    assert clubs["Alpha FC"]["player_ids"] == [1, 2, 3] and clubs["Alpha FC"]["club_id"] == 1
+    assert clubs["Gamma"]["player_ids"] == [4, 5] and clubs["Gamma"]["club_id"] == 99
+
+
+def test_depth_fits_age_and_value(clubs):
+    alpha = clubs["Alpha FC"]
+    assert alpha["player_count"] == 3
+    assert alpha["depth"] == {pos: int(pos in ("ST", "LW")) for pos in POSITIONS}
+    assert alpha["avg_fit"]["ST"] == 70.0 and alpha["avg_fit"]["LW"] == 42.5 and alpha["avg_fit"]["CB"] == 65.0
+    assert alpha["top_fit"]["ST"] == 80.0 and alpha["top_fit"]["CB"] == 70.0
+    assert alpha["age"] == {"mean": 26.0, "min": 20, "max": 31,
+                            "bands": {"u21": 1, "22-25": 0, "26-29": 1, "30+": 1}}
+    assert alpha["market_value"] == {"total": 4_000_000, "mean": 2_000_000, "median": 2_000_000, "max": 3_000_000}
+
+    gamma = clubs["Gamma"]
+    assert gamma["depth"]["CB"] == 0 and gamma["depth"]["CM"] == 1
+    assert gamma["avg_fit"]["CB"] is None and gamma["top_fit"]["CB"] is None  # nobody scored at CB
+
+
+def test_weakest_slot(clubs):
+    # Alpha: LW and RW both top out at 45; RW has nobody (LW has player 2), so RW is the weakest slot
+    assert (clubs["Alpha FC"]["weakest_pos"], clubs["Alpha FC"]["weakest_fit"]) == ("RW", 45.0)
+    # Beta: LB has no fit at all and is skipped; the other 55s tie on depth, so POSITIONS order decides
+    beta = clubs["Beta United"]
+    first_55 = next(pos for pos in POSITIONS if pos not in ("ST", "LB"))
+    assert (beta["weakest_pos"], beta["weakest_fit"]) == (first_55, 55.0)
+    # Gamma: CB is NaN, not the weakest
+    assert clubs["Gamma"]["weakest_pos"] != "CB" and clubs["Gamma"]["weakest_fit"] == 50.0
+
+
+def test_club_without_players(clubs):
+    empty = clubs["Empty Town"]
+    assert empty["club_id"] == 3 and empty["player_count"] == 0 and empty["player_ids"] == []
+    assert set(empty["depth"].values()) == {0} and set(empty["avg_fit"].values()) == {None}
+    assert empty["market_value"]["total"] is None
+    assert pd.isna(empty["weakest_pos"]) and pd.isna(empty["weakest_fit"])  # NULL once loaded (_rows)
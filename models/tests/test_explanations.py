@@ -0,0 +1,88 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from explanations import build_explanations, top_contributors
+from feature_matrix import FeatureMatrix
+from position_fit import POSITIONS, feature_columns, fit_matrix
+
+FEATS = ["pace", "finishing", "tackling", "heading"]
+STATS = pd.DataFrame({"mu": [60.0, 50.0, 55.0, 65.0], "sigma": [10.0, 8.0, 12.0, 5.0]}, index=FEATS)
+FEAT_INFO = {
+    "ST": {"feats": FEATS, "gains": {"pace": 0.2, "finishing": 0.5, "tackling": 0.1, "heading": 0.2},
+           "signs": {"pace": 1.0, "finishing": 1.0, "tackling": -1.0, "heading": 1.0}, "stats": STATS},
+    "CB": {"feats": ["tackling", "heading", "pace"], "gains": {"tackling": 0.6, "heading": 0.3, "pace": 0.1},
+           "signs": {"tackling": 1.0, "heading": 1.0, "pace": -1.0}, "stats": STATS},
+}
+PLAYERS = pd.DataFrame({
+    "player_id": [1, 2, 3, 4],
+    "pace": [80.0, 45.0, 60.0, 99.0],
+    "finishing": [74.0, 30.0, np.nan, 99.0],  # missing -> z = 0
+    "tackling": [31.0, 85.0, 55.0, 10.0],
+    "heading": [70.0, 78.0, 65.0, 95.0],     # player 4 is far enough out to be clipped at ST
+})
+
+
+def _contributions(pos):
+    """Fit points per feature by the formula: 10 * gain * sign * z / sum(gain)."""
+    meta = FEAT_INFO[pos]
+    gains = np.array([meta["gains"][f] for f in meta["feats"]])
+    signs = np.array([meta["signs"][f] for f in meta["feats"]])
+    z = ((PLAYERS[meta["feats"]] - STATS.loc[meta["feats"], "mu"]) / STATS.loc[meta["feats"], "sigma"]).fillna(0.0)
+    return z.to_numpy() * 10 * gains * signs / gains.sum()
+
+
+@pytest.fixture(scope="module")
+def docs():
+    ex = build_explanations(PLAYERS, FEAT_INFO, top_n=2)
+    assert ex["player_id"].tolist() == PLAYERS["player_id"].tolist()
+    return [json.loads(doc) for doc in ex["contributions"]]
+
+
+def test_only_positions_with_features_are_explained(docs):
+    assert all(set(doc) == {"ST", "CB"} for doc in docs)
+
+
+@pytest.mark.parametrize("pos", ["ST", "CB"])
+def test_contributions_add_up_to_the_fit(docs, pos):
+    fit = fit_matrix(FeatureMatrix.from_frame(PLAYERS, feature_columns(FEAT_INFO)), FEAT_INFO)[:, POSITIONS.index(pos)]
+    unclipped = 50 + _contributions(pos).sum(axis=1)
+    for i, doc in enumerate(docs):
+        entry = doc[pos]
+        assert entry["fit"] == pytest.approx(round(fit[i], 1), abs=1e-9)
+        total = 50 + sum(value for _, value in entry["top"]) + entry["rest"]
+        assert total == pytest.approx(unclipped[i], abs=0.15)  # three values rounded to 0.1
+        if 0 < unclipped[i] < 100:
+            assert total == pytest.approx(fit[i], abs=0.15)
+    if pos == "ST":
+        assert unclipped[3] > 100 and docs[3]["ST"]["fit"] == 100.0  # rest keeps the pre-clip sum
+
+
+@pytest.mark.parametrize("pos", ["ST", "CB"])
+def test_top_is_ordered_by_size_with_signs(docs, pos):
+    feats = FEAT_INFO[pos]["feats"]
+    contrib = _contributions(pos)
+    for i, doc in enumerate(docs):
+        order = np.argsort(-np.abs(contrib[i]), kind="stable")[:2]
+        assert [name for name, _ in doc[pos]["top"]] == [feats[j] for j in order]
+        assert [value for _, value in doc[pos]["top"]] == pytest.approx(np.round(contrib[i, order], 1), abs=1e-9)
+
+
+def test_handmade_player():
+    # player 2 at ST: finishing z = -2.5 (gain 0.5), heading z = +2.6 (gain 0.2), pace z = -1.5 (gain 0.2),
+    # tackling z = +2.5 with a negative sign (gain 0.1); gains sum to 1, so c = 10 * gain * sign * z
+    doc = json.loads(build_explanations(PLAYERS.iloc[[1]], FEAT_INFO, top_n=2)["contributions"].iat[0])
+    assert doc["ST"] == {"fit": 37.2, "top": [["finishing", -12.5], ["heading", 5.2]], "rest": -5.5}
+
+
+def test_top_contributors_keeps_the_rest():
+    contrib = np.array([[1.0, -3.0, 2.0, 0.5], [0.0, 0.0, -0.1, 0.2]])
+    idx, top, rest = top_contributors(contrib, 2)
+    assert idx.tolist() == [[1, 2], [3, 2]]
+    assert top.tolist() == [[-3.0, 2.0], [0.2, -0.1]]
+    np.testing.assert_allclose(rest, [1.5, 0.0])
+
+    idx, top, rest = top_contributors(contrib, 10)  # more than there are features
+    assert idx.shape == (2, 4) and np.allclose(rest, 0.0)
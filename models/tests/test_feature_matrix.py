@@ -0,0 +1,80 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import synthetic_players
+from feature_matrix import FeatureMatrix
+from position_fit import FIT_W, POSITIONS, REL_W, build_feat_info, feature_columns
+from predict_player_positions import score_players
+
+
+@pytest.fixture(scope="module")
+def players() -> pd.DataFrame:
+    df = synthetic_players.generate_players(300, seed=7)
+    df.loc[::17, "dribbling"] = np.nan  # exercise the missing-value mask
+    return df
+
+
+def _score_rows(de: pd.DataFrame, feat_info: dict) -> pd.DataFrame:
+    """The per-row pandas scoring that position_fit.py replaced."""
+    rows = []
+    for _, pl in de.iterrows():
+        fit = {}
+        for pos, meta in feat_info.items():
+            num = den = 0.0
+            for f in meta["feats"]:
+                val, mu, sd = pl.get(f, np.nan), meta["stats"].at[f, "mu"], meta["stats"].at[f, "sigma"]
+                z = 0.0 if pd.isna(val) or sd == 0 else (val - mu) / sd
+                num += meta["gains"][f] * z * meta["signs"][f]
+                den += meta["gains"][f]
+            fit[pos] = float(np.clip(50 + 10 * (num / den), 0, 100)) if den else 50.0
+        fits = np.array([fit[p] for p in POSITIONS])
+        lo, hi = fits.min(), fits.max()
+        rel = 100 * (fits - lo) / (hi - lo) if hi > lo else np.full_like(fits, 50.0)
+        combo = FIT_W * fits + REL_W * rel
+        rec = {"player_id": pl.player_id, **{f"{p}_combo": round(c, 1) for p, c in zip(POSITIONS, combo)}}
+        rec["best_combo_pos"] = POSITIONS[int(np.argmax(combo))]
+        rec["best_combo_score"] = round(float(combo.max()), 1)
+        rows.append(rec)
+    return pd.DataFrame(rows)
+
+
+def test_storage_kinds(players):
+    fm = FeatureMatrix.from_frame(players.assign(ratio=0.5, big=70_000), ["dribbling", "height_in_cm", "ratio", "big"])
+    assert fm.index["dribbling"][0] == "u8"
+    assert fm.index["ratio"][0] == "f32"
+    assert fm.index["big"][0] == "f32"
+    assert fm.player_id.dtype == np.int32
+
+
+def test_columns_match_pandas(players):
+    cols = ["dribbling", "finishing", "height_in_cm", "not_a_column"]
+    fm = FeatureMatrix.from_frame(players, cols)
+    for c in cols:
+        expected = pd.to_numeric(players[c]) if c in players else pd.Series(np.nan, index=players.index)
+        np.testing.assert_array_equal(fm.column(c), expected.to_numpy(dtype=np.float64))
+    np.testing.assert_array_equal(fm.is_missing("dribbling"), players["dribbling"].isna().to_numpy())
+
+
+def test_take_keeps_layout(players):
+    fm = FeatureMatrix.from_frame(players, ["dribbling", "finishing"])
+    rows = np.arange(0, len(players), 3)
+    sub = fm.take(rows)
+    np.testing.assert_array_equal(sub.dense(), fm.dense()[rows])
+    np.testing.assert_array_equal(sub.player_id, fm.player_id[rows])
+
+
+def test_zscore_matches_pandas(players):
+    cols = ["dribbling", "finishing", "crossing"]
+    mu, sigma = np.array([60.0, 55.0, 50.0]), np.array([10.0, 0.0, 12.5])
+    z = FeatureMatrix.from_frame(players, cols).zscore(cols, mu, sigma)
+    expected = ((players[cols] - mu) / np.where(sigma == 0, np.nan, sigma)).fillna(0.0)
+    np.testing.assert_allclose(z, expected.to_numpy(), rtol=0, atol=1e-12)
+
+
+def test_score_players_matches_row_scoring(players):
+    feat_info = build_feat_info(players)
+    assert "dribbling" in feature_columns(feat_info)
+    got = score_players(players, feat_info)
+    expected = _score_rows(players, feat_info)
+    pd.testing.assert_frame_equal(got[expected.columns].reset_index(drop=True), expected, check_dtype=False)
@@ -0,0 +1,84 @@
+import importlib
+import os
+import time
+
+import numpy as np
+import pytest
+
+import instrumentation
+from instrumentation import METRICS_ENV, RUN_ID_ENV, PeakRSS, read_events, span, timed
+
+
+@pytest.fixture
+def sink(tmp_path, monkeypatch):
+    path = tmp_path / "metrics.jsonl"
+    monkeypatch.setenv(METRICS_ENV, str(path))
+    return path
+
+
+def test_span_emits_one_json_line(sink):
+    with span("score", position="ST") as sp:
+        time.sleep(0.05)  # long enough for the rounded wall_s to give rows_per_sec within 0.2%
+        sp.rows = 5000
+
+    (event,) = read_events(sink)
+    assert event["event"] == "span" and event["stage"] == "score" and event["status"] == "ok"
+    assert event["rows"] == 5000 and event["position"] == "ST"
+    assert event["wall_s"] >= 0.05 and event["cpu_s"] < event["wall_s"]
+    assert event["rows_per_sec"] == pytest.approx(5000 / event["wall_s"], rel=0.002)
+    assert event["peak_rss_mb"] > 0
+    assert event["run_id"] == instrumentation.run_id() and event["pid"] == os.getpid()
+
+
+def test_span_records_errors(sink):
+    with pytest.raises(ValueError):
+        with span("load"):
+            raise ValueError("bad row")
+    (event,) = read_events(sink)
+    assert event["status"] == "error" and event["error"] == "ValueError: bad row"
+    assert event["rows"] is None and event["rows_per_sec"] is None
+
+
+def test_timed_counts_rows_of_the_result(sink):
+    @timed("stats", rows=len)
+    def build():
+        return [1, 2, 3]
+
+    assert build() == [1, 2, 3]
+    assert [(e["stage"], e["rows"]) for e in read_events(sink)] == [("stats", 3)]
+
+
+def test_metrics_off(monkeypatch, tmp_path):
+    monkeypatch.setenv(METRICS_ENV, "off")
+    with span("quiet"):
+        pass
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_read_events_skips_noise(tmp_path):
+    path = tmp_path / "mixed.jsonl"
+    path.write_text('{"stage": "a"}\nnot json\n[1, 2]\n\n{"stage": "b"}\n', encoding="utf-8")
+    assert [e["stage"] for e in read_events(path)] == ["a", "b"]
+    assert read_events(tmp_path / "missing.jsonl") == []
+
+
+def test_peak_rss_sees_an_allocation():
+    with PeakRSS(interval=0.001) as mem:
+        block = np.ones(64 * 2**20 // 8)  # 64 MB, touched
+        block.sum()
+    assert mem.peak_mb >= mem.start_mb + 32
+
+
+def test_run_id_is_lazy_and_not_exported(monkeypatch):
+    monkeypatch.delenv(RUN_ID_ENV, raising=False)
+    module = importlib.reload(instrumentation)
+    try:
+        assert RUN_ID_ENV not in os.environ  # importing leaves the environment alone
+        rid = module.run_id()
+        assert rid == module.run_id() and RUN_ID_ENV not in os.environ
+        assert module.child_env(EXTRA="1")[RUN_ID_ENV] == rid
+
+        monkeypatch.setenv(RUN_ID_ENV, "parent-run")
+        assert importlib.reload(instrumentation).run_id() == "parent-run"  # a child joins its parent's run
+    finally:
+        importlib.reload(instrumentation)
@@ -0,0 +1,81 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import synthetic_players
+from leaderboards import LEADERBOARD_COLS, age_band, build_leaderboards, top_k
+from position_fit import POSITIONS
+
+
+def _sorted_top_k(scores, ids, k):
+    """Reference: full sort by (-score, id), finite scores only."""
+    order = sorted((i for i in range(len(scores)) if np.isfinite(scores[i])), key=lambda i: (-scores[i], ids[i]))
+    return np.array(order[:k], dtype=np.int64)
+
+
+@pytest.mark.parametrize("k", [1, 5, 50, 500])
+def test_top_k_matches_full_sort(k):
+    rng = np.random.default_rng(k)
+    scores = np.round(rng.uniform(40, 90, 300), 0)  # rounded: many ties at the cut
+    scores[rng.choice(300, 20, replace=False)] = np.nan
+    ids = rng.permutation(300) + 1000
+    np.testing.assert_array_equal(top_k(scores, ids, k), _sorted_top_k(scores, ids, k))
+
+
+def test_top_k_ties_go_to_lower_id():
+    scores = np.array([70.0, 80.0, 70.0, 70.0])
+    ids = np.array([9, 1, 3, 5])
+    assert top_k(scores, ids, 3).tolist() == [1, 2, 3]
+
+
+def test_top_k_without_finite_scores():
+    assert len(top_k(np.array([np.nan, np.inf]), np.array([1, 2]), 5)) == 0
+
+
+def test_age_band():
+    bands = age_band(pd.Series([18, 21, 22, 25, 26, 29, 30, None]))
+    assert bands[:7].tolist() == ["u21", "u21", "22-25", "22-25", "26-29", "26-29", "30+"]
+    assert pd.isna(bands.iat[7])
+
+
+def test_build_leaderboards_matches_groupby():
+    players = synthetic_players.generate_players(400, seed=11)
+    rng = np.random.default_rng(0)
+    scored = pd.DataFrame({"player_id": players["player_id"]})
+    for pos in POSITIONS:
+        scored[f"{pos}_combo"] = np.round(rng.uniform(30, 90, len(players)), 1)
+
+    k = 10
+    lb = build_leaderboards(scored, players, k)
+    assert list(lb.columns) == LEADERBOARD_COLS
+
+    merged = scored.merge(players[["player_id", "league"]], on="player_id")
+    for pos in ("ST", "CB"):
+        col = f"{pos}_combo"
+        for league, grp in merged.groupby("league"):
+            expected = grp.sort_values([col, "player_id"], ascending=[False, True]).head(k)
+            got = lb[(lb.position == pos) & (lb.scope == "league") & (lb.scope_value == league)]
+            assert got["player_id"].tolist() == expected["player_id"].tolist()
+            assert got["rank"].tolist() == list(range(1, len(expected) + 1))
+            np.testing.assert_allclose(got["score"], expected[col], rtol=1e-6)
+    assert len(lb[(lb.scope == "all")]) == k * len(POSITIONS)
+
+
+@pytest.mark.parametrize("batch_rows", [1, 37, 400])
+def test_merged_batches_match_whole_leaderboards(batch_rows):
+    from predict_player_positions import merge_leaderboards
+
+    players = synthetic_players.generate_players(400, seed=12)
+    rng = np.random.default_rng(1)
+    scored = pd.DataFrame({"player_id": players["player_id"]})
+    for pos in POSITIONS:
+        scored[f"{pos}_combo"] = np.round(rng.uniform(30, 90, len(players)), 0)  # ties across batches
+
+    lb, candidates = None, None
+    for a in range(0, len(players), batch_rows):
+        lb, candidates = merge_leaderboards(candidates, scored.iloc[a:a + batch_rows], players.iloc[a:a + batch_rows],
+                                            k=5)
+    key = ["position", "scope", "scope_value", "rank"]  # group order follows first appearance, rows do not change
+    pd.testing.assert_frame_equal(lb.sort_values(key, ignore_index=True),
+                                  build_leaderboards(scored, players, 5).sort_values(key, ignore_index=True))
+    assert set(candidates[0]["player_id"]) == set(lb["player_id"])
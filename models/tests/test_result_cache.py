@@ -0,0 +1,82 @@
+import numpy as np
+import pytest
+
+from position_fit import POSITIONS
+from result_cache import RECORD, ResultCache, cache_stats, row_keys
+
+
+def _combo(n, seed=0):
+    return np.random.default_rng(seed).uniform(0, 100, (n, len(POSITIONS)))
+
+
+@pytest.fixture
+def path(tmp_path):
+    return tmp_path / "cache.npy"
+
+
+def test_row_keys_depend_on_values_and_column_order():
+    X = np.array([[60.0, 70.0], [70.0, 60.0], [60.0, np.nan], [60.0, 70.0]])
+    keys = row_keys(X)
+    assert keys[0] == keys[3]
+    assert len(set(keys[:3].tolist())) == 3
+
+
+def test_round_trip(path):
+    keys = np.array([5, 1, 9], dtype=np.uint64)
+    combo = _combo(3)
+    cache = ResultCache(path, "v1")
+    assert not cache.get_many(keys)[1].any()
+    cache.put_many(keys, combo)
+    cache.close()
+
+    cache = ResultCache(path, "v1")
+    got, hit = cache.get_many(np.array([9, 2, 5], dtype=np.uint64))
+    cache.close()
+    assert hit.tolist() == [True, False, True]
+    np.testing.assert_array_equal(got[[0, 2]], combo[[2, 0]])
+    assert np.isnan(got[1]).all()
+    stats = cache_stats(path)
+    assert (stats["entries"], stats["hits"], stats["misses"]) == (3, 2, 4)
+
+
+def test_other_version_is_empty(path):
+    cache = ResultCache(path, "v1")
+    cache.put_many(np.array([1], dtype=np.uint64), _combo(1))
+    cache.close()
+    assert not ResultCache(path, "v2").get_many(np.array([1], dtype=np.uint64))[1].any()
+
+
+def test_version_travels_with_the_table(path):
+    """A table swapped in by another version is never read with this version's meta."""
+    old = ResultCache(path, "v1")
+    old.put_many(np.array([1], dtype=np.uint64), _combo(1))
+    old.close()
+    stale_meta = path.with_name(path.name + ".json").read_bytes()
+
+    new = ResultCache(path, "v2")
+    new.put_many(np.array([1], dtype=np.uint64), _combo(1, seed=1))
+    new._merge(np.concatenate(new.pending))  # table replaced, meta not yet written
+    path.with_name(path.name + ".json").write_bytes(stale_meta)
+
+    assert not ResultCache(path, "v1").get_many(np.array([1], dtype=np.uint64))[1].any()
+    assert ResultCache(path, "v2").get_many(np.array([1], dtype=np.uint64))[1].all()
+
+
+def test_untagged_file_is_empty(path):
+    table = np.zeros(1, dtype=RECORD)
+    np.save(path, table)
+    assert not ResultCache(path, "v1").get_many(np.array([0], dtype=np.uint64))[1].any()
+
+
+def test_keeps_most_recently_used_rows(path):
+    cache = ResultCache(path, "v1", max_rows=2)
+    cache.put_many(np.array([1, 2], dtype=np.uint64), _combo(2))
+    cache.close()
+
+    cache = ResultCache(path, "v1", max_rows=2)
+    cache.get_many(np.array([1], dtype=np.uint64))  # 2 is now the least recently used
+    cache.put_many(np.array([3], dtype=np.uint64), _combo(1))
+    cache.close()
+
+    _, hit = ResultCache(path, "v1", max_rows=2).get_many(np.array([1, 2, 3], dtype=np.uint64))
+    assert hit.tolist() == [True, False, True]
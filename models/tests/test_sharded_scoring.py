@@ -0,0 +1,79 @@
+import argparse
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import sharded_scoring
+import synthetic_players
+from explanations import EXPLANATION_COLS, build_explanations
+from position_fit import build_feat_info, save_reference_stats
+from predict_player_positions import save_results, score_players
+
+
+@pytest.fixture(scope="module")
+def players():
+    return synthetic_players.generate_players(500, seed=5)
+
+
+@pytest.fixture
+def frozen(players, tmp_path, monkeypatch):
+    """Frozen stats plus a read_shard that splits the frame the way shard_query splits the table."""
+    stats = tmp_path / "reference_stats.json"
+    save_reference_stats(build_feat_info(players), stats)
+
+    def read_shard(engine, index, shards, partition="hash"):
+        if partition == "hash":
+            shard = (players["player_id"].astype(np.int64) * sharded_scoring.HASH_MULTIPLIER % 2**32) % shards
+            return players[shard == index].reset_index(drop=True)
+        ranks = players["player_id"].rank(method="first").astype(int) - 1
+        return players[ranks * shards // len(players) == index].reset_index(drop=True)
+
+    monkeypatch.setattr(sharded_scoring, "read_shard", read_shard)
+    monkeypatch.setattr(sharded_scoring, "create_db_engine", lambda: None)
+    return stats
+
+
+def _run_shards(stats, shard_dir, shards, partition="hash"):
+    for index in range(shards):
+        sharded_scoring.score_shard(index, shards, partition, shard_dir, stats)
+
+
+@pytest.mark.parametrize("shards,partition", [(1, "hash"), (3, "hash"), (4, "range")])
+def test_merge_matches_single_run(players, frozen, tmp_path, shards, partition):
+    shard_dir = tmp_path / "shards"
+    _run_shards(frozen, shard_dir, shards, partition)
+    summary = sharded_scoring.merge(shard_dir, tmp_path / "merged.csv", db=False)
+    assert summary["rows"] == len(players)
+
+    feat_info = sharded_scoring.frozen_feat_info(frozen)[0]
+    save_results(score_players(players, feat_info), tmp_path / "single.csv")
+    assert (tmp_path / "merged.csv").read_bytes() == (tmp_path / "single.csv").read_bytes()
+
+    _, ex, _ = sharded_scoring.merge_shards(shard_dir)
+    single = build_explanations(players, feat_info).sort_values("player_id", kind="stable", ignore_index=True)
+    pd.testing.assert_frame_equal(ex.reset_index(drop=True), single[EXPLANATION_COLS], check_dtype=False)
+
+
+def test_merge_rejects_incomplete_shard_set(frozen, tmp_path):
+    shard_dir = tmp_path / "shards"
+    _run_shards(frozen, shard_dir, 3)
+    next(shard_dir.glob("manifest-01-*.json")).unlink()
+    with pytest.raises(SystemExit, match="missing \\[1\\]"):
+        sharded_scoring.read_manifests(shard_dir)
+
+
+def test_merge_rejects_modified_shard(frozen, tmp_path):
+    shard_dir = tmp_path / "shards"
+    _run_shards(frozen, shard_dir, 2)
+    scores = next(shard_dir.glob("scores-00-*.csv"))
+    scores.write_text(scores.read_text() + "1,ST,60,1,1,1,1,1,1,1,1,1,ST,1\n")
+    with pytest.raises(SystemExit, match="does not match"):
+        sharded_scoring.read_manifests(shard_dir)
+
+
+def test_parse_shard():
+    assert sharded_scoring.parse_shard("2/4") == (2, 4)
+    for bad in ("4/4", "x/2", "1/0"):
+        with pytest.raises(argparse.ArgumentTypeError):
+            sharded_scoring.parse_shard(bad)
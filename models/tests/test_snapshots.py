@@ -0,0 +1,104 @@
+import pandas as pd
+import pytest
+
+from snapshots import (
+    FIT_COLS, SNAPSHOT_COLS, delta_sql, materialize, player_history, record_snapshot, state_sql,
+)
+
+SCHEMA = f"""
+    CREATE TEMP TABLE compatibility_snapshots (
+        id serial PRIMARY KEY, stats_version text NOT NULL, base_id int, players int NOT NULL,
+        changed int NOT NULL, removed int NOT NULL, created_at timestamp DEFAULT now());
+    CREATE TEMP TABLE compatibility_deltas (
+        snapshot_id int NOT NULL REFERENCES compatibility_snapshots ON DELETE CASCADE, player_id int NOT NULL,
+        removed boolean NOT NULL DEFAULT false, natural_pos text, {', '.join(f'{c} real' for c in FIT_COLS)},
+        best_pos text, best_fit_score real, ovr int, PRIMARY KEY (player_id, snapshot_id));
+    CREATE TEMP TABLE position_compatibility (
+        id serial PRIMARY KEY, player_id int NOT NULL, natural_pos text,
+        {', '.join(f'{c} real' for c in FIT_COLS)}, best_pos text, best_fit_score real, best_fit_pct real, ovr int);
+"""
+
+
+def test_sql_only_takes_integer_ids():
+    assert "snapshot_id <= 7" in state_sql(7)
+    with pytest.raises(ValueError):
+        state_sql("7; DROP TABLE compatibility_deltas")
+    changed, removed = delta_sql(3, None, tolerance=0)
+    assert "snapshot_id <= 0" in changed and "snapshot_id <= 0" in removed  # first snapshot: empty base
+    assert "<= 0.0" in changed
+
+
+@pytest.fixture
+def cur(db_cursor):
+    """Temporary tables shadowing the snapshot tables (temp schema comes first), rolled back afterwards."""
+    db_cursor.execute(SCHEMA)
+    return db_cursor
+
+
+def _row(player_id, fit=60.0, **changes):
+    row = {"player_id": player_id, "natural_pos": "ST", **{c: fit for c in FIT_COLS},
+           "best_pos": "ST", "best_fit_score": fit, "ovr": 70}
+    return {**row, **changes}
+
+
+def _write(cur, rows):
+    """Replace position_compatibility as a scoring run would."""
+    cur.execute("TRUNCATE position_compatibility")
+    for row in rows:
+        cur.execute(f"INSERT INTO position_compatibility ({', '.join(row)}) VALUES ({', '.join(['%s'] * len(row))})",
+                    list(row.values()))
+
+
+def _state(cur, snapshot_id):
+    frame = materialize(cur, snapshot_id)
+    return {r["player_id"]: r for r in frame.to_dict("records")}
+
+
+def test_deltas_and_materialized_states(cur):
+    first = [_row(1), _row(2), _row(3, st_fit=float("nan")), _row(4, lw_fit=None)]
+    _write(cur, first)
+    s1 = record_snapshot(cur, "v1")
+    assert (s1["players"], s1["changed"], s1["removed"]) == (4, 4, 0)
+
+    _write(cur, [
+        _row(1, st_fit=60.01),                   # within SCORE_TOLERANCE: not stored
+        _row(2, cb_fit=61.0),                    # score moved
+        _row(3, st_fit=float("nan")),            # NaN = NaN: unchanged
+        _row(4, lw_fit=55.0, best_pos="LW"),     # NULL -> value
+        _row(5),                                 # new player
+    ])
+    s2 = record_snapshot(cur, "v2")
+    assert (s2["players"], s2["changed"], s2["removed"]) == (5, 3, 0)
+
+    _write(cur, [_row(1, st_fit=60.01), _row(2, cb_fit=61.0), _row(5, ovr=71)])  # 3 and 4 left
+    s3 = record_snapshot(cur, "v3")
+    assert (s3["changed"], s3["removed"]) == (1, 2)
+
+    state1, state2, state3 = (_state(cur, s["snapshot"]) for s in (s1, s2, s3))
+    assert sorted(state1) == [1, 2, 3, 4] and pd.isna(state1[3]["st_fit"]) and pd.isna(state1[4]["lw_fit"])
+    assert state2[1]["st_fit"] == 60.0          # the stored value, within tolerance of the written one
+    assert state2[2]["cb_fit"] == 61.0 and state2[4]["best_pos"] == "LW" and state2[5]["ovr"] == 70
+    assert sorted(state3) == [1, 2, 5] and state3[5]["ovr"] == 71
+
+    history = player_history(cur, 4)
+    assert history["snapshot_id"].tolist() == [s1["snapshot"], s2["snapshot"], s3["snapshot"]]
+    assert history["removed"].tolist() == [False, False, True]
+
+
+def test_small_changes_are_measured_from_the_stored_value(cur):
+    for i, fit in enumerate([60.0, 60.03, 60.06]):  # each step is within tolerance, the sum is not
+        _write(cur, [_row(1, fit=fit)])
+        summary = record_snapshot(cur, f"v{i}")
+    assert summary["changed"] == 1
+    assert _state(cur, summary["snapshot"])[1]["st_fit"] == pytest.approx(60.06, abs=1e-4)
+
+
+def test_unchanged_run_writes_no_deltas(cur):
+    rows = [_row(i, fit=50.0 + i) for i in range(1, 20)]
+    _write(cur, rows)
+    record_snapshot(cur, "v1")
+    _write(cur, rows)
+    assert record_snapshot(cur, "v1")["changed"] == 0
+    cur.execute("SELECT count(*) FROM compatibility_deltas")
+    assert cur.fetchone()[0] == len(rows)
+    assert list(materialize(cur, 2).columns) == ["player_id", *SNAPSHOT_COLS]
@@ -0,0 +1,110 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.metrics import confusion_matrix, precision_recall_fscore_support, roc_auc_score
+
+import synthetic_players
+from streaming_stats import BinaryMetrics, RunningCorrelation, RunningMoments
+
+
+def _batches(X, sizes):
+    edges = np.cumsum([0, *sizes])
+    return [X[a:b] for a, b in zip(edges[:-1], edges[1:])]
+
+
+@pytest.fixture
+def data():
+    """Correlated columns with a large offset (cancellation-prone), NaNs, an all-NaN and a constant column."""
+    rng = np.random.default_rng(7)
+    base = rng.normal(size=(1000, 1))
+    X = np.hstack([1e6 + base + rng.normal(scale=0.5, size=(1000, 3)), rng.normal(size=(1000, 2)),
+                   np.full((1000, 1), np.nan), np.full((1000, 1), 3.0)])
+    X[rng.random(X.shape) < 0.15] = np.nan
+    X[:400, 3] = np.nan  # column missing from the first batches
+    return X
+
+
+@pytest.mark.parametrize("sizes", [[1000], [1, 399, 0, 600], [100] * 10])
+def test_running_moments_match_numpy(data, sizes):
+    m = RunningMoments(data.shape[1])
+    for batch in _batches(data, sizes):
+        m.update(batch)
+    frame = pd.DataFrame(data)
+    np.testing.assert_allclose(m.mean, frame.mean().to_numpy(), rtol=1e-12, equal_nan=True)
+    np.testing.assert_allclose(m.std, frame.std().to_numpy(), rtol=1e-9, atol=1e-12, equal_nan=True)
+    np.testing.assert_array_equal(m.n, (~np.isnan(data)).sum(axis=0))
+
+
+@pytest.mark.parametrize("sizes", [[1000], [1, 399, 0, 600], [100] * 10])
+def test_running_correlation_matches_pandas(data, sizes):
+    c = RunningCorrelation(data.shape[1])
+    for batch in _batches(data, sizes):
+        c.update(batch)
+    np.testing.assert_allclose(c.corr(), pd.DataFrame(data).corr().to_numpy(), atol=1e-9, equal_nan=True)
+
+
+def test_binary_metrics_match_sklearn():
+    rng = np.random.default_rng(3)
+    y = rng.random(5000) < 0.3
+    prob = np.clip(0.35 * y + rng.normal(0.35, 0.2, 5000), 0, 1)
+    m = BinaryMetrics()
+    for yb, pb in zip(np.array_split(y, 7), np.array_split(prob, 7)):
+        m.update(yb, pb)
+    pred = prob >= 0.5
+    assert m.auc == pytest.approx(roc_auc_score(y, prob), abs=1e-3)  # binned
+    np.testing.assert_array_equal(m.confusion, confusion_matrix(y, pred))
+    assert m.accuracy == pytest.approx((y == pred).mean())
+    for ours, theirs in zip(m.precision_recall_f1(), precision_recall_fscore_support(y, pred, zero_division=0)):
+        np.testing.assert_allclose(ours, theirs)
+
+
+def test_binary_metrics_without_both_classes():
+    m = BinaryMetrics()
+    m.update(np.zeros(10), np.linspace(0, 1, 10))
+    assert np.isnan(m.auc)
+    assert m.precision_recall_f1()[0].tolist() == [1.0, 0.0]
+
+
+def test_out_of_core_features_come_from_the_whole_stream(tmp_path):
+    pytest.importorskip("xgboost")
+    import pos_models
+
+    players = synthetic_players.generate_players(600, seed=5)
+    players = players[players["sub_position"].notna()].reset_index(drop=True)
+    later = players.index >= 200  # the first two batches have neither column
+    players["late_stat"] = np.where(later, np.arange(len(players)) % 50, np.nan)
+    players["scout_note"] = np.where(later, "watch", None)
+    source = tmp_path / "players.csv"
+    players.to_csv(source, index=False)
+
+    pos_models.train_out_of_core(str(source), tmp_path, batch_rows=100)
+
+    expected = pos_models.select_features(players)
+    assert "late_stat" in expected and "scout_note" not in expected
+    used = pd.read_csv(tmp_path / "corr_ST_with_target.csv", index_col=0).columns.drop("is_ST")
+    assert list(used) == expected
+
+
+def test_streamed_pass_matches_in_memory_training_inputs():
+    import pos_models
+
+    players = synthetic_players.generate_players(900, seed=11)
+    players = players[players["sub_position"].notna()].reset_index(drop=True)
+
+    def batches():
+        for a in range(0, len(players), 128):
+            yield players.iloc[a:a + 128]
+
+    streamed = pos_models._stream_stats(batches)
+    fm, sub_position = pos_models.compact_training_data(players)
+    assert streamed["features"] == list(fm.columns)
+    assert streamed["n_rows"] == len(players)
+    assert streamed["n_pos"].tolist() == [int((sub_position == pos).sum()) for pos in pos_models.POSITIONS]
+
+    k = len(fm.columns)
+    for p, (pos, corr) in enumerate(pos_models._label_correlations(fm, sub_position).items()):
+        idx = [*range(k), k + p]
+        np.testing.assert_allclose(streamed["corr"][np.ix_(idx, idx)], corr.to_numpy(), atol=1e-12)
+        group = players.loc[sub_position == pos, fm.columns]
+        np.testing.assert_allclose(streamed["stats"][pos]["mu"], group.mean(), rtol=1e-12)
+        np.testing.assert_allclose(streamed["stats"][pos]["sigma"], group.std(), rtol=1e-9)
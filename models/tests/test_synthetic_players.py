@@ -0,0 +1,84 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import synthetic_players
+from synthetic_players import REFERENCE_CSV, fit_profile, generate_players
+
+CLOCK_COLS = ["created_at", "date_of_birth"]  # stamped from the current time
+
+
+@pytest.fixture(scope="module")
+def reference(tmp_path_factory):
+    """Small handmade players file: three positions, a missing-value column and a log-scaled one."""
+    rng = np.random.default_rng(0)
+    n = 60
+    sub = np.repeat(["Centre-Forward", "Centre-Back", "Goalkeeper"], n // 3)
+    ref = pd.DataFrame({
+        "id": np.arange(1, n + 1),
+        "player_id": np.arange(101, n + 101),
+        "name": [f"player {i}" for i in range(n)],
+        "sub_position": sub,
+        "position": pd.Series(sub).map({"Centre-Forward": "Attack", "Centre-Back": "Defender",
+                                         "Goalkeeper": "Goalkeeper"}),
+        "club_id": np.tile([1, 2, 3], n // 3),
+        "current_club_name": np.tile(["Alpha FC", "Beta United", "Gamma"], n // 3),
+        "league": np.tile(["L1", "L2"], n // 2),
+        "team": np.tile(["T1", "T2"], n // 2),
+        "country_of_citizenship": rng.choice(["Spain", "Brazil"], n),
+        "foot": rng.choice(["right", "left", None], n),
+        "preferred_foot": rng.choice(["Right", "Left"], n),
+        "date_of_birth": "1/1/2000",
+        "age": rng.integers(17, 38, n),
+        "finishing": np.where(sub == "Centre-Forward", rng.integers(60, 95, n), rng.integers(10, 50, n)),
+        "height_in_cm": np.where(rng.random(n) < 0.25, np.nan, rng.normal(182, 6, n).round()),
+        "market_value_in_eur": rng.integers(1, 200, n) * 250_000,
+        "highest_market_value_in_eur": rng.integers(200, 400, n) * 250_000,
+        "created_at": "2024-01-01T00:00:00.000Z",
+        "image_url": None,
+    })
+    path = tmp_path_factory.mktemp("reference") / "players.csv"
+    ref.to_csv(path, index=False)
+    return ref, fit_profile(path)
+
+
+def test_same_seed_same_players(reference):
+    _, profile = reference
+    a, b = generate_players(500, profile, seed=3), generate_players(500, profile, seed=3)
+    pd.testing.assert_frame_equal(a.drop(columns=CLOCK_COLS), b.drop(columns=CLOCK_COLS))
+    assert not generate_players(500, profile, seed=4)["finishing"].equals(a["finishing"])
+
+
+def test_rows_columns_and_dtypes(reference):
+    ref, profile = reference
+    df = generate_players(250, profile, seed=1)
+    assert len(df) == 250 and list(df.columns) == list(ref.columns)
+    for c in ["id", "player_id", "club_id", "age", "finishing", "market_value_in_eur"]:
+        assert pd.api.types.is_integer_dtype(df[c]), c
+    assert df["height_in_cm"].dtype == float  # missing values need a float column
+    assert df["player_id"].tolist() == (synthetic_players.ID_OFFSET + np.arange(1, 251)).tolist()
+    assert df["player_id"].is_unique
+
+
+def test_values_stay_in_the_observed_range(reference):
+    ref, profile = reference
+    df = generate_players(2000, profile, seed=2)
+    for c in ["age", "finishing", "height_in_cm", "market_value_in_eur", "highest_market_value_in_eur"]:
+        assert ref[c].min() <= df[c].min() and df[c].max() <= ref[c].max(), c
+    assert df["height_in_cm"].isna().mean() == pytest.approx(ref["height_in_cm"].isna().mean(), abs=0.05)
+    assert set(df["sub_position"]) == set(ref["sub_position"])
+    # joint columns come from real rows, position follows sub_position
+    assert set(zip(df["club_id"], df["current_club_name"])) <= set(zip(ref["club_id"], ref["current_club_name"]))
+    assert (df.groupby("sub_position")["position"].nunique() == 1).all()
+    # per-position distributions: forwards finish better than everyone else
+    by_pos = df.groupby("sub_position")["finishing"].mean()
+    assert by_pos["Centre-Forward"] > by_pos.drop("Centre-Forward").max()
+
+
+@pytest.mark.skipif(not REFERENCE_CSV.exists(), reason="data/players.csv not present")
+def test_real_profile_keeps_the_players_schema():
+    real = pd.read_csv(REFERENCE_CSV, nrows=200)
+    df = generate_players(100, seed=9)
+    assert list(df.columns) == list(real.columns)
+    numeric = real.select_dtypes(include="number").columns.drop(["id", "player_id", "club_id"])
+    assert all(pd.api.types.is_numeric_dtype(df[c]) for c in numeric)
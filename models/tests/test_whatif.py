@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+
+import synthetic_players
+from feature_matrix import FeatureMatrix
+from position_fit import POSITIONS, build_feat_info, combo_frame, feature_columns
+from whatif import MAX_SCENARIOS, RATING_MAX, delta_grid, development_curve, simulate
+
+
+@pytest.fixture(scope="module")
+def players():
+    return synthetic_players.generate_players(200, seed=3)
+
+
+@pytest.fixture(scope="module")
+def feat_info(players):
+    return build_feat_info(players)
+
+
+def test_delta_grid_is_the_cartesian_product():
+    grid = delta_grid({"sprint_speed": [0, 5], "crossing": [0, 4, 8]})
+    assert list(grid.columns) == ["sprint_speed", "crossing"]
+    assert grid.to_numpy().tolist() == [[0, 0], [0, 4], [0, 8], [5, 0], [5, 4], [5, 8]]
+
+
+def test_delta_grid_rejects_oversized_grid_before_building_it():
+    axes = {f"attr_{i}": list(range(10)) for i in range(12)}  # 10**12 scenarios
+    with pytest.raises(ValueError, match="scenarios"):
+        delta_grid(axes)
+    assert len(delta_grid({"a": list(range(MAX_SCENARIOS))})) == MAX_SCENARIOS
+
+
+def test_development_curve_needs_aligned_steps():
+    assert development_curve({"finishing": [1, 2, 3], "stamina": [0, 1, 2]}).shape == (3, 2)
+    with pytest.raises(ValueError, match="same number of steps"):
+        development_curve({"finishing": [1, 2, 3], "stamina": [0, 1]})
+
+
+def test_zero_delta_matches_batch_scoring(players, feat_info):
+    player = players.iloc[0].to_dict()
+    surface = simulate(player, delta_grid({}), feat_info)
+    cols = feature_columns(feat_info)
+    expected = combo_frame(FeatureMatrix.from_frame(players.iloc[[0]], cols), feat_info)
+    combos = [f"{p}_combo" for p in POSITIONS]
+    np.testing.assert_allclose(np.round(surface[combos].to_numpy(), 1), expected[combos].to_numpy())
+    assert surface["best_combo_pos"].iat[0] == expected["best_combo_pos"].iat[0]
+
+
+def test_ratings_are_clipped(players, feat_info):
+    player = players.iloc[0].to_dict()
+    clipped = simulate(player, delta_grid({"finishing": [RATING_MAX - player["finishing"]]}), feat_info)
+    beyond = simulate(player, delta_grid({"finishing": [500]}), feat_info)
+    fits = [f"{p}_fit" for p in POSITIONS]
+    np.testing.assert_array_equal(beyond[fits].to_numpy(), clipped[fits].to_numpy())
+
+
+def test_unknown_attribute_is_rejected(players, feat_info):
+    with pytest.raises(ValueError, match="pac"):
+        simulate(players.iloc[0].to_dict(), delta_grid({"pac": [5]}), feat_info)
@@ -0,0 +1,152 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+What-if Attribute Simulation for position fit
+=============================================
+
+Scores many variants of one player in a single vectorized pass against the
+cached reference stats (see position_fit.REFERENCE_STATS):
+- delta_grid({"sprint_speed": [0, 5], "crossing": [0, 4, 8]})  -> every combination (6 scenarios)
+- development_curve({"finishing": [1, 2, 3], "stamina": [0, 1, 2]}) -> one scenario per step
+
+Ratings stay within 1..99 after a delta is applied; height/weight are only
+kept non-negative. A missing attribute stays missing (z = 0) whatever the delta.
+
+CLI (JSON on stdin, JSON on stdout - used by POST /api/players/:id/whatif):
+  echo '{"player": {...}, "grid": {"sprint_speed": [0, 5, 10]}}' | python models/whatif.py
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+import argparse
+import itertools
+import json
+import math
+import sys
+from typing import Mapping
+
+import numpy as np
+import pandas as pd
+
+from feature_matrix import FeatureMatrix
+from instrumentation import span
+from position_fit import (
+    POSITIONS, REFERENCE_STATS, best_positions, combo_matrix, feature_columns, fit_matrix, load_reference_stats,
+)
+
+# ────────── Configuration ──────────
+RATING_MIN, RATING_MAX = 1, 99
+UNBOUNDED = {"height_in_cm", "weight_in_kg"}  # not ratings: only clipped at 0
+MAX_SCENARIOS = 100_000
+
+
+def delta_grid(axes: Mapping[str, list[float]]) -> pd.DataFrame:
+    """Cartesian product of per-attribute deltas, one row per scenario."""
+    names = list(axes)
+    size = math.prod(len(axes[n]) for n in names)  # checked before the product is materialized
+    if size > MAX_SCENARIOS:
+        raise ValueError(f"grid has {size:,} scenarios (max {MAX_SCENARIOS:,})")
+    rows = list(itertools.product(*(axes[n] for n in names)))
+    return pd.DataFrame(rows, columns=names, dtype=np.float64)
+
+
+def development_curve(steps: Mapping[str, list[float]]) -> pd.DataFrame:
+    """Aligned per-attribute deltas (e.g. one entry per season), one row per step."""
+    lengths = {len(v) for v in steps.values()}
+    if len(lengths) > 1:
+        raise ValueError("all attributes of a development curve need the same number of steps")
+    if lengths and lengths.pop() > MAX_SCENARIOS:
+        raise ValueError(f"curve has more than {MAX_SCENARIOS:,} steps")
+    return pd.DataFrame({k: list(v) for k, v in steps.items()}, dtype=np.float64)
+
+
+def simulate(player: Mapping, deltas: pd.DataFrame, feat_info: dict[str, dict]) -> pd.DataFrame:
+    """Fit and combo per position for every delta scenario of one player.
+
+    Returns the delta columns followed by <POS>_fit, <POS>_combo,
+    best_combo_pos and best_combo_score (unrounded), one row per scenario.
+    """
+    cols = feature_columns(feat_info)
+    unknown = set(deltas.columns) - set(cols)
+    if unknown:
+        raise ValueError(f"attributes not used by any position model: {', '.join(sorted(unknown))}")
+
+    base = pd.to_numeric(pd.Series([player.get(c) for c in cols], dtype=object), errors="coerce")
+    values = np.repeat(base.to_numpy(dtype=np.float64, na_value=np.nan)[None, :], len(deltas), axis=0)
+    for c in deltas.columns:
+        j = cols.index(c)
+        v = values[:, j] + deltas[c].to_numpy()
+        values[:, j] = np.clip(v, 0, None) if c in UNBOUNDED else np.clip(v, RATING_MIN, RATING_MAX)
+
+    fm = FeatureMatrix.from_frame(pd.DataFrame(values, columns=cols), cols)
+    fit = fit_matrix(fm, feat_info)
+    combo = combo_matrix(fit)
+    best_pos, best_score = best_positions(combo)
+
+    out = deltas.reset_index(drop=True).copy()
+    for p, pos in enumerate(POSITIONS):
+        out[f"{pos}_fit"] = fit[:, p]
+    for p, pos in enumerate(POSITIONS):
+        out[f"{pos}_combo"] = combo[:, p]
+    out["best_combo_pos"] = best_pos
+    out["best_combo_score"] = best_score
+    return out
+
+
+def surface_json(surface: pd.DataFrame, attributes: list[str], version: str | None) -> dict:
+    """Compact JSON layout: one matrix per quantity, rows aligned with deltas."""
+    return {
+        "version": version,
+        "positions": POSITIONS,
+        "attributes": attributes,
+        "deltas": surface[attributes].to_numpy().tolist(),
+        "fit": np.round(surface[[f"{p}_fit" for p in POSITIONS]].to_numpy(), 1).tolist(),
+        "combo": np.round(surface[[f"{p}_combo" for p in POSITIONS]].to_numpy(), 1).tolist(),
+        "best_pos": surface["best_combo_pos"].tolist(),
+        "best_score": np.round(surface["best_combo_score"].to_numpy(), 1).tolist(),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--stats", default=str(REFERENCE_STATS), help="Reference stats cache")
+    args = parser.parse_args()
+
+    request = json.load(sys.stdin)
+    player = request.get("player") or {}
+    try:
+        if "grid" in request:
+            deltas = delta_grid(request["grid"])
+        elif "curve" in request:
+            deltas = development_curve(request["curve"])
+        else:
+            raise ValueError("request needs a 'grid' or a 'curve'")
+
+        stats_path = Path(args.stats)
+        cached = load_reference_stats(stats_path)
+        if cached is None:
+            from predict_from_csv import reference_feat_info  # DB fallback, refreshes the cache
+            cached = reference_feat_info(stats_path)
+        feat_info, version = cached
+
+        with span("whatif", rows=len(deltas)):
+            surface = simulate(player, deltas, feat_info)
+            base = simulate(player, delta_grid({}), feat_info)
+    except ValueError as e:
+        json.dump({"error": str(e)}, sys.stdout)
+        return 2
+
+    doc = surface_json(surface, list(deltas.columns), version)
+    doc["base"] = {
+        "fit": np.round(base[[f"{p}_fit" for p in POSITIONS]].to_numpy()[0], 1).tolist(),
+        "combo": np.round(base[[f"{p}_combo" for p in POSITIONS]].to_numpy()[0], 1).tolist(),
+        "best_pos": base["best_combo_pos"].iat[0],
+        "best_score": round(float(base["best_combo_score"].iat[0]), 1),
+    }
+    json.dump(doc, sys.stdout)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -34,10 +34,14 @@ const { mockStorage } = vi.hoisted(() => {
     createPositionCompatibility: vi.fn(),
     updatePositionCompatibility: vi.fn(),
     bulkCreatePositionCompatibility: vi.fn(),
+    getPositionLeaderboard: vi.fn(),
+    getPlayerExplanation: vi.fn(),
+    getPlayerFitHistory: vi.fn(),
     addPlayerToFavorites: vi.fn(),
     removePlayerFromFavorites: vi.fn(),
     getUserFavorites: vi.fn(),
     isPlayerFavorited: vi.fn(),
+    getClubAnalytics: vi.fn(),
     getTeamAnalytics: vi.fn(),
     getGlobalStats: vi.fn(),
   };
@@ -63,6 +67,15 @@ vi.mock("./db", () => ({
   pool: {},
 }));
 
+const { spawnMock } = vi.hoisted(() => ({ spawnMock: vi.fn() }));
+
+vi.mock("child_process", async (importOriginal) => ({
+  ...(await importOriginal<typeof import("child_process")>()),
+  spawn: spawnMock,
+}));
+
+import { EventEmitter } from "events";
+import { PassThrough } from "stream";
 import express from "express";
 import request from "supertest";
 import { registerRoutes } from "./routes";
@@ -173,6 +186,103 @@ describe("GET /api/players/:id/compatibility", () => {
   });
 });
 
+describe("GET /api/players/:id/explanation", () => {
+  it("returns the precomputed contributions", async () => {
+    const explanation = {
+      player_id: 100,
+      contributions: { CM: { fit: 75.3, top: [["short_passing", 6.2], ["interceptions", -1.4]], rest: 3.1 } },
+    };
+    vi.mocked(mockStorage.getPlayerExplanation).mockResolvedValue(explanation as any);
+
+    const res = await request(app).get("/api/players/100/explanation");
+    expect(res.status).toBe(200);
+    expect(res.body.contributions.CM.top[0]).toEqual(["short_passing", 6.2]);
+    expect(mockStorage.getPlayerExplanation).toHaveBeenCalledWith(100);
+    expect(mockStorage.getPlayerByPlayerId).not.toHaveBeenCalled();
+  });
+
+  it("returns 404 when the player has no explanation", async () => {
+    vi.mocked(mockStorage.getPlayerExplanation).mockResolvedValue(undefined);
+
+    const res = await request(app).get("/api/players/999/explanation");
+    expect(res.status).toBe(404);
+    expect(res.body.error).toContain("Explanation not found");
+  });
+
+  it("returns 400 for non-numeric id", async () => {
+    const res = await request(app).get("/api/players/abc/explanation");
+    expect(res.status).toBe(400);
+    expect(mockStorage.getPlayerExplanation).not.toHaveBeenCalled();
+  });
+});
+
+describe("GET /api/players/:id/fit-history", () => {
+  it("returns the player's snapshot deltas", async () => {
+    const history = [
+      { snapshot_id: 1, player_id: 100, removed: false, cm_fit: 71.2, best_pos: "CM", stats_version: "3f9a" },
+      { snapshot_id: 4, player_id: 100, removed: false, cm_fit: 75.3, best_pos: "CM", stats_version: "b2c7" },
+    ];
+    vi.mocked(mockStorage.getPlayerFitHistory).mockResolvedValue(history as any);
+
+    const res = await request(app).get("/api/players/100/fit-history");
+    expect(res.status).toBe(200);
+    expect(res.body).toHaveLength(2);
+    expect(res.body[1].cm_fit).toBe(75.3);
+    expect(mockStorage.getPlayerFitHistory).toHaveBeenCalledWith(100);
+  });
+
+  it("returns 404 when the player is in no snapshot", async () => {
+    vi.mocked(mockStorage.getPlayerFitHistory).mockResolvedValue([]);
+
+    const res = await request(app).get("/api/players/999/fit-history");
+    expect(res.status).toBe(404);
+    expect(res.body.error).toContain("Fit history not found");
+  });
+
+  it("returns 400 for non-numeric id", async () => {
+    const res = await request(app).get("/api/players/abc/fit-history");
+    expect(res.status).toBe(400);
+    expect(mockStorage.getPlayerFitHistory).not.toHaveBeenCalled();
+  });
+});
+
+describe("POST /api/players/:id/whatif", () => {
+  it("returns 400 for non-numeric id", async () => {
+    const res = await request(app).post("/api/players/abc/whatif").send({ grid: { crossing: [0, 5] } });
+    expect(res.status).toBe(400);
+    expect(res.body.error).toBe("Invalid player ID");
+  });
+
+  it("returns 400 without a grid or curve", async () => {
+    const res = await request(app).post("/api/players/100/whatif").send({ deltas: { crossing: [5] } });
+    expect(res.status).toBe(400);
+    expect(mockStorage.getPlayerByPlayerId).not.toHaveBeenCalled();
+  });
+
+  it("returns 400 for too many attributes", async () => {
+    const curve = Object.fromEntries(Array.from({ length: 41 }, (_, i) => [`attr_${i}`, [1]]));
+    const res = await request(app).post("/api/players/100/whatif").send({ curve });
+    expect(res.status).toBe(400);
+    expect(mockStorage.getPlayerByPlayerId).not.toHaveBeenCalled();
+  });
+
+  it("returns 400 for an oversized grid", async () => {
+    const steps = Array.from({ length: 100 }, (_, i) => i);
+    const grid = { crossing: steps, finishing: steps, dribbling: steps };
+    const res = await request(app).post("/api/players/100/whatif").send({ grid });
+    expect(res.status).toBe(400);
+    expect(mockStorage.getPlayerByPlayerId).not.toHaveBeenCalled();
+  });
+
+  it("returns 404 when player not found", async () => {
+    vi.mocked(mockStorage.getPlayerByPlayerId).mockResolvedValue(undefined);
+
+    const res = await request(app).post("/api/players/999/whatif").send({ curve: { crossing: [1, 2, 3] } });
+    expect(res.status).toBe(404);
+    expect(res.body.error).toBe("Player not found");
+  });
+});
+
 // ----- Club Routes -----
 
 describe("GET /api/clubs", () => {
@@ -322,6 +432,120 @@ describe("GET /api/stats", () => {
   });
 });
 
+// ----- Leaderboard Routes -----
+
+describe("GET /api/leaderboards/:position", () => {
+  it("returns the overall leaderboard by default", async () => {
+    const entries = [{ position: "CB", scope: "all", scope_value: "", rank: 1, player_id: 100, score: 90.1 }];
+    vi.mocked(mockStorage.getPositionLeaderboard).mockResolvedValue(entries as any);
+
+    const res = await request(app).get("/api/leaderboards/cb");
+    expect(res.status).toBe(200);
+    expect(res.body).toEqual(entries);
+    expect(mockStorage.getPositionLeaderboard).toHaveBeenCalledWith("CB", "all", "", 20);
+  });
+
+  it("passes scope, value and limit", async () => {
+    vi.mocked(mockStorage.getPositionLeaderboard).mockResolvedValue([]);
+
+    const res = await request(app).get("/api/leaderboards/ST?scope=league&value=Serie%20A&limit=5");
+    expect(res.status).toBe(200);
+    expect(mockStorage.getPositionLeaderboard).toHaveBeenCalledWith("ST", "league", "Serie A", 5);
+  });
+
+  it("returns 400 for unknown position", async () => {
+    const res = await request(app).get("/api/leaderboards/GK");
+    expect(res.status).toBe(400);
+    expect(res.body.error).toBe("Invalid position");
+  });
+
+  it("returns 400 when a scoped leaderboard has no value", async () => {
+    const res = await request(app).get("/api/leaderboards/CB?scope=country");
+    expect(res.status).toBe(400);
+    expect(mockStorage.getPositionLeaderboard).not.toHaveBeenCalled();
+  });
+
+  it("returns 400 for limit above the stored top-K", async () => {
+    const res = await request(app).get("/api/leaderboards/CB?limit=500");
+    expect(res.status).toBe(400);
+  });
+});
+
+// ----- CSV Upload Routes -----
+
+// predict_from_csv.py stand-in: prints rows as NDJSON, then exits with exitCode
+function fakePython(rows: object[], exitCode: number) {
+  const py: any = new EventEmitter();
+  py.stdin = new PassThrough();
+  py.stdout = new PassThrough();
+  py.exitCode = null;
+  py.kill = vi.fn();
+  py.stdin.resume();
+  setImmediate(() => {
+    for (const row of rows) py.stdout.write(`${JSON.stringify(row)}\n`);
+    py.stdout.end();
+    py.exitCode = exitCode;
+    py.emit("close", exitCode);
+  });
+  return py;
+}
+
+describe("POST /api/compatibility/upload", () => {
+  const rows = [
+    { player_id: 1, name: "A", natural_pos: "ST", best_pos: "ST", best_fit_score: 71.2 },
+    { player_id: 2, name: "B", natural_pos: "CB", best_pos: "CB", best_fit_score: 64.0 },
+  ];
+  const upload = () =>
+    request(app).post("/api/compatibility/upload").attach("csvFile", Buffer.from("player_id\n1\n2\n"), "players.csv");
+
+  it("returns 400 without a csvFile", async () => {
+    const res = await request(app).post("/api/compatibility/upload");
+    expect(res.status).toBe(400);
+    expect(res.body.error).toBe("CSV file is required under field 'csvFile'");
+  });
+
+  it("streams every result when Python succeeds", async () => {
+    spawnMock.mockReturnValueOnce(fakePython(rows, 0));
+
+    const res = await upload();
+    expect(res.status).toBe(200);
+    expect(res.body.count).toBe(2);
+    expect(res.body.results.map((r: any) => r.player_id)).toEqual([1, 2]);
+    expect(res.body.error).toBeUndefined();
+  });
+
+  it("ends the JSON body with an error when Python fails mid-stream", async () => {
+    spawnMock.mockReturnValueOnce(fakePython(rows.slice(0, 1), 1));
+
+    const res = await upload();
+    expect(res.status).toBe(200); // headers went out with the first result
+    expect(res.body.count).toBe(1);
+    expect(res.body.results).toHaveLength(1);
+    expect(res.body.error).toBe("Failed to process CSV: Python exited with code 1");
+  });
+
+  it("ends the NDJSON stream with an error line when Python fails mid-stream", async () => {
+    spawnMock.mockReturnValueOnce(fakePython(rows, 1));
+
+    const res = await upload().set("Accept", "application/x-ndjson").buffer(true).parse((r, done) => {
+      let text = "";
+      r.on("data", (chunk: Buffer) => (text += chunk.toString()));
+      r.on("end", () => done(null, text));
+    });
+    const lines = (res.body as string).trim().split("\n").map((line) => JSON.parse(line));
+    expect(lines.map((line) => line.player_id)).toEqual([1, 2, undefined]);
+    expect(lines[2]).toEqual({ error: "Failed to process CSV: Python exited with code 1" });
+  });
+
+  it("returns 500 when Python fails before any result", async () => {
+    spawnMock.mockReturnValueOnce(fakePython([], 1));
+
+    const res = await upload();
+    expect(res.status).toBe(500);
+    expect(res.body.error).toBe("Failed to process CSV: Python exited with code 1");
+  });
+});
+
 // ----- Favorites Routes -----
 
 describe("POST /api/favorites/:playerId", () => {
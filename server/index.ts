@@ -1,6 +1,7 @@
 import express, { type Request, Response, NextFunction } from "express";
 import { registerRoutes } from "./routes";
 import { setupVite, serveStatic, log } from "./vite";
+import { pool } from "./db";
 import path from "path";
 import { spawn } from "child_process";
 
@@ -80,6 +81,12 @@ app.use((req, res, next) => {
   const shouldBootstrap = process.env.BOOTSTRAP_ON_START !== "false";
   if (shouldBootstrap && process.env.DATABASE_URL) {
     try {
+      // the trigram indexes in shared/schema.ts need pg_trgm before drizzle-kit can create them
+      try {
+        await pool.query("CREATE EXTENSION IF NOT EXISTS pg_trgm");
+      } catch (e: any) {
+        log(`DataBootstrap: could not create extension pg_trgm: ${e?.message || e}`);
+      }
       log("DataBootstrap: ensuring database schema (drizzle-kit push)...");
       // RDS uses a cert that Node treats as self-signed; allow for this subprocess only
       const pushEnv = { ...process.env, NODE_TLS_REJECT_UNAUTHORIZED: "0" };
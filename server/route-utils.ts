@@ -1,64 +1,25 @@
 import { searchFiltersSchema } from "@shared/schema";
 
-export function parseCsvHeader(csvText: string): Record<string, number> {
-  const lines = csvText.split(/\r?\n/).filter(l => l.trim().length > 0);
-  const header = lines[0].split(",").map(h => h.trim());
-  const map: Record<string, number> = {};
-  header.forEach((h, idx) => (map[h] = idx));
-  return map;
-}
-
-export function buildFallbackData(csvText: string): Record<number, { name?: string | null; natural_pos?: string | null }> {
-  const lines = csvText.split(/\r?\n/).filter(l => l.trim().length > 0);
-  const inMap = parseCsvHeader(csvText);
-  const inputById: Record<number, { name?: string | null; natural_pos?: string | null }> = {};
-
-  if (inMap["player_id"] !== undefined) {
-    for (const line of lines.slice(1)) {
-      const cols = line.split(",");
-      const pid = parseInt((cols[inMap["player_id"]] || "").trim());
-      if (!Number.isNaN(pid)) {
-        inputById[pid] = {
-          name: inMap["name"] !== undefined ? (cols[inMap["name"]] || null) : null,
-          natural_pos: inMap["sub_position"] !== undefined ? (cols[inMap["sub_position"]] || null) : null,
-        };
-      }
-    }
+const FIT_COLUMNS = ["st_fit", "lw_fit", "rw_fit", "cm_fit", "cdm_fit", "cam_fit", "lb_fit", "rb_fit", "cb_fit"] as const;
+
+// One NDJSON row from predict_from_csv.py --format ndjson -> upload result entry
+export function toUploadResult(row: Record<string, any>) {
+  const num = (v: unknown) => (typeof v === "number" && Number.isFinite(v) ? v : null);
+  const compatibility: Record<string, string | number | null> = {
+    best_pos: row.best_pos || null,
+    best_fit_score: num(row.best_fit_score),
+  };
+  for (const col of FIT_COLUMNS) {
+    compatibility[col] = num(row[col]);
   }
-  return inputById;
-}
-
-export function parseCompatibilityResults(csvOut: string, inputById: Record<number, any>) {
-  const lines = csvOut.split(/\r?\n/).filter(l => l.trim().length > 0);
-  const map = parseCsvHeader(csvOut);
-
-  return lines.slice(1).map(line => {
-    const cols = line.split(",");
-    const pid = parseInt((cols[map["player_id"]] || "0").trim());
-    const nameOut = map["name"] !== undefined ? (cols[map["name"]] || null) : null;
-    const natOut = map["natural_pos"] !== undefined ? (cols[map["natural_pos"]] || null) : null;
-    const fallback = inputById[pid] || {};
 
-    return {
-      player_id: pid,
-      name: nameOut || fallback.name || null,
-      natural_pos: natOut || fallback.natural_pos || null,
-      status: "ok" as const,
-      compatibility: {
-        best_pos: cols[map["best_pos"]] || null,
-        best_fit_score: cols[map["best_fit_score"]] ? parseFloat(cols[map["best_fit_score"]]) : null,
-        st_fit: cols[map["st_fit"]] ? parseFloat(cols[map["st_fit"]]) : null,
-        lw_fit: cols[map["lw_fit"]] ? parseFloat(cols[map["lw_fit"]]) : null,
-        rw_fit: cols[map["rw_fit"]] ? parseFloat(cols[map["rw_fit"]]) : null,
-        cm_fit: cols[map["cm_fit"]] ? parseFloat(cols[map["cm_fit"]]) : null,
-        cdm_fit: cols[map["cdm_fit"]] ? parseFloat(cols[map["cdm_fit"]]) : null,
-        cam_fit: cols[map["cam_fit"]] ? parseFloat(cols[map["cam_fit"]]) : null,
-        lb_fit: cols[map["lb_fit"]] ? parseFloat(cols[map["lb_fit"]]) : null,
-        rb_fit: cols[map["rb_fit"]] ? parseFloat(cols[map["rb_fit"]]) : null,
-        cb_fit: cols[map["cb_fit"]] ? parseFloat(cols[map["cb_fit"]]) : null,
-      }
-    };
-  });
+  return {
+    player_id: Number(row.player_id),
+    name: row.name || null,
+    natural_pos: row.natural_pos || null,
+    status: "ok" as const,
+    compatibility,
+  };
 }
 
 export function parsePlayerId(params: { playerId?: string; id?: string }): number | null {
@@ -1,11 +1,9 @@
 import type { Express as ExpressApp } from "express";
 import { createServer, type Server } from "http";
 import { storage } from "./storage";
-import { type Club } from "@shared/schema";
+import { type Club, POSITIONS, leaderboardQuerySchema, whatIfRequestSchema } from "@shared/schema";
 import {
-  parseCsvHeader,
-  buildFallbackData,
-  parseCompatibilityResults,
+  toUploadResult,
   parsePlayerId as _parsePlayerId,
   parseFilters as _parseFilters,
 } from "./route-utils";
@@ -105,6 +103,105 @@ export async function registerRoutes(app: ExpressApp): Promise<Server> {
     }
   });
 
+  // Top feature contributions behind each fit score (one primary-key read of player_explanations)
+  app.get("/api/players/:id/explanation", async (req, res) => {
+    try {
+      const playerId = parsePlayerId(req);
+      if (!playerId) {
+        return res.status(400).json({ error: "Invalid player ID" });
+      }
+
+      const explanation = await storage.getPlayerExplanation(playerId);
+      if (!explanation) {
+        return res.status(404).json({
+          error: "Explanation not found. Please run full analysis first."
+        });
+      }
+
+      sendSuccess(res, explanation);
+    } catch (error) {
+      handleError(res, error, "Failed to fetch player explanation");
+    }
+  });
+
+  // Compatibility scores of a player across scoring runs (snapshot deltas, see models/snapshots.py)
+  app.get("/api/players/:id/fit-history", async (req, res) => {
+    try {
+      const playerId = parsePlayerId(req);
+      if (!playerId) {
+        return res.status(400).json({ error: "Invalid player ID" });
+      }
+
+      const history = await storage.getPlayerFitHistory(playerId);
+      if (history.length === 0) {
+        return res.status(404).json({
+          error: "Fit history not found. Please run full analysis first."
+        });
+      }
+
+      sendSuccess(res, history);
+    } catch (error) {
+      handleError(res, error, "Failed to fetch player fit history");
+    }
+  });
+
+  // whatif.py reads one JSON request on stdin and answers on stdout (exit code 2 = invalid request)
+  const runPythonWhatIf = async (payload: unknown): Promise<{ code: number; body: any }> => {
+    const { spawn } = await import("child_process");
+    const path = await import("path");
+    const py = spawn(process.platform === "win32" ? "python" : "python3", [
+      path.join(process.cwd(), "models", "whatif.py"),
+    ], { stdio: ["pipe", "pipe", "inherit"] });
+
+    let out = "";
+    py.stdout.setEncoding("utf-8");
+    py.stdout.on("data", (chunk) => { out += chunk; });
+    py.stdin.end(JSON.stringify(payload));
+
+    return new Promise((resolve, reject) => {
+      py.on("close", (code) => {
+        if (code !== 0 && code !== 2) {
+          return reject(new Error(`Python exited with code ${code}`));
+        }
+        try {
+          resolve({ code, body: JSON.parse(out) });
+        } catch (error) {
+          reject(error);
+        }
+      });
+      py.on("error", reject);
+    });
+  };
+
+  // Score attribute what-if scenarios (grid or development curve) in one batch
+  app.post("/api/players/:id/whatif", async (req, res) => {
+    try {
+      const playerId = parsePlayerId(req);
+      if (!playerId) {
+        return res.status(400).json({ error: "Invalid player ID" });
+      }
+
+      const parsed = whatIfRequestSchema.safeParse(req.body);
+      if (!parsed.success) {
+        return res.status(400).json({ error: "Body must contain either 'grid' or 'curve' of attribute deltas" });
+      }
+
+      const player = await validatePlayer(playerId);
+      const { code, body } = await runPythonWhatIf({ player, ...parsed.data });
+      if (code !== 0) {
+        return res.status(400).json(body);
+      }
+
+      sendSuccess(res, body);
+    } catch (error) {
+      if (error instanceof Error && error.message === "Player not found") {
+        res.status(404).json({ error: "Player not found" });
+      } else {
+        handleError(res, error, "Failed to simulate player attributes");
+      }
+    }
+  });
+
   // === Club Routes ===
   
   // Get all clubs
@@ -225,26 +322,49 @@ export async function registerRoutes(app: ExpressApp): Promise<Server> {
     }
   });
 
+  // === Leaderboard Routes ===
+
+  // Top players for a position, overall or within a league / country / age band (precomputed)
+  app.get("/api/leaderboards/:position", async (req, res) => {
+    try {
+      const position = req.params.position.toUpperCase();
+      if (!(POSITIONS as readonly string[]).includes(position)) {
+        return res.status(400).json({ error: "Invalid position" });
+      }
+
+      const parsed = leaderboardQuerySchema.safeParse(req.query);
+      if (!parsed.success) {
+        return res.status(400).json({ error: "Invalid leaderboard parameters" });
+      }
+      const { scope, value, limit } = parsed.data;
+      if (scope !== "all" && !value) {
+        return res.status(400).json({ error: `Parameter 'value' is required for scope '${scope}'` });
+      }
+
+      const entries = await storage.getPositionLeaderboard(position, scope, scope === "all" ? "" : value!, limit);
+      sendSuccess(res, entries);
+    } catch (error) {
+      handleError(res, error, "Failed to fetch leaderboard");
+    }
+  });
+
   // === CSV Upload Routes ===
 
-  const runPythonPrediction = async (inputPath: string, outputPath: string): Promise<void> => {
+  // predict_from_csv.py reads the upload on stdin and writes one JSON result per player to stdout,
+  // flushed chunk by chunk, so nothing touches the disk and the response starts before the last row is scored
+  const spawnPythonPrediction = async () => {
     const { spawn } = await import("child_process");
     const path = await import("path");
-    const py = spawn(process.platform === "win32" ? "python" : "python3", [
+    return spawn(process.platform === "win32" ? "python" : "python3", [
       path.join(process.cwd(), "models", "predict_from_csv.py"),
-      "--input", inputPath,
-      "--out", outputPath,
-    ], { stdio: "inherit" });
-
-    return new Promise<void>((resolve, reject) => {
-      py.on("exit", (code) => {
-        if (code === 0) resolve(); else reject(new Error(`Python exited with code ${code}`));
-      });
-      py.on("error", reject);
-    });
+      "--input", "-",
+      "--out", "-",
+      "--format", "ndjson",
+    ], { stdio: ["pipe", "pipe", "inherit"] });
   };
 
   // Upload CSV of player data and return position compatibility for each player_id
+  // (streamed as {"results": [...], "count": N}, or one result per line with Accept: application/x-ndjson)
   app.post("/api/compatibility/upload", upload.single("csvFile"), async (req, res) => {
     try {
       const file = (req as any).file as Express.Multer.File | undefined;
@@ -252,29 +372,51 @@ export async function registerRoutes(app: ExpressApp): Promise<Server> {
         return res.status(400).json({ error: "CSV file is required under field 'csvFile'" });
       }
 
-      // Setup temp files
-      const fs = await import("fs/promises");
-      const os = await import("os");
-      const path = await import("path");
-      
-      const tmpDir = await fs.mkdtemp(path.join(os.tmpdir(), "upload-"));
-      const inPath = path.join(tmpDir, "input.csv");
-      const outPath = path.join(tmpDir, "output.csv");
-      await fs.writeFile(inPath, file.buffer);
-
-      // Build fallback data from input
-      const inputCsvText = file.buffer.toString("utf-8");
-      const inputById = buildFallbackData(inputCsvText);
-
-      // Run Python prediction
-      await runPythonPrediction(inPath, outPath);
+      const { createInterface } = await import("readline");
+      const py = await spawnPythonPrediction();
+      const ndjson = req.accepts(["application/json", "application/x-ndjson"]) === "application/x-ndjson";
+      const exited = new Promise<number | null>((resolve, reject) => {
+        py.on("close", resolve);
+        py.on("error", reject);
+      });
+      exited.catch(() => {}); // observed below; keeps a spawn failure from surfacing as unhandled
+      res.on("close", () => {
+        if (py.exitCode === null) py.kill(); // client went away
+      });
 
-      // Parse results
-      const csvOut = await fs.readFile(outPath, "utf-8");
-      const results = parseCompatibilityResults(csvOut, inputById);
+      py.stdin.on("error", () => {}); // EPIPE when Python exits before reading the whole upload
+      py.stdin.end(file.buffer);
+
+      let count = 0;
+      for await (const line of createInterface({ input: py.stdout, crlfDelay: Infinity })) {
+        if (!line.trim()) continue;
+        const result = JSON.stringify(toUploadResult(JSON.parse(line)));
+        if (count === 0) {
+          res.type(ndjson ? "application/x-ndjson" : "application/json");
+          if (!ndjson) res.write('{"results":[');
+        }
+        res.write(ndjson ? `${result}\n` : count === 0 ? result : `,${result}`);
+        count++;
+      }
 
-      sendSuccess(res, { count: results.length, results });
+      const code = await exited.catch((error: Error) => error);
+      const failure = code === 0 ? null : code instanceof Error ? code : new Error(`Python exited with code ${code}`);
+      if (count === 0) {
+        // nothing sent yet: a regular error (or empty) response is still possible
+        if (failure) throw failure;
+        return sendSuccess(res, { count: 0, results: [] });
+      }
+      if (failure) console.error("Failed to process CSV", failure);
+      if (ndjson) {
+        res.end(failure ? `${JSON.stringify({ error: `Failed to process CSV: ${failure.message}` })}\n` : undefined);
+      } else {
+        res.end(`],"count":${count}${failure ? `,"error":${JSON.stringify(`Failed to process CSV: ${failure.message}`)}` : ""}}`);
+      }
     } catch (error) {
+      if (res.headersSent) {
+        console.error("Failed to process CSV", error);
+        return res.end();
+      }
       handleError(res, error, "Failed to process CSV");
     }
   });
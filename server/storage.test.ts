@@ -282,6 +282,65 @@ describe("DatabaseStorage", () => {
     });
   });
 
+  describe("getPositionLeaderboard", () => {
+    it("returns entries with their players in rank order", async () => {
+      const player = { id: 1, player_id: 100, name: "Player1" };
+      mockOrderBy.mockResolvedValueOnce([
+        { entry: { position: "CB", scope: "league", scope_value: "Premier League", rank: 1, player_id: 100, score: 91.2 }, player },
+      ]);
+
+      const result = await storage.getPositionLeaderboard("CB", "league", "Premier League", 10);
+      expect(result).toHaveLength(1);
+      expect(result[0].rank).toBe(1);
+      expect(result[0].player).toEqual(player);
+    });
+
+    it("returns empty array on error", async () => {
+      mockOrderBy.mockRejectedValueOnce(new Error("DB error"));
+
+      const result = await storage.getPositionLeaderboard("CB", "all", "", 10);
+      expect(result).toEqual([]);
+    });
+  });
+
+  describe("getPlayerExplanation", () => {
+    it("returns the stored contributions", async () => {
+      const explanation = { player_id: 100, contributions: { CB: { fit: 23.4, top: [["heading", -8.1]], rest: -2.5 } } };
+      mockWhere.mockResolvedValueOnce([explanation]);
+
+      const result = await storage.getPlayerExplanation(100);
+      expect(result).toEqual(explanation);
+    });
+
+    it("returns undefined on error", async () => {
+      mockWhere.mockRejectedValueOnce(new Error("DB error"));
+
+      const result = await storage.getPlayerExplanation(100);
+      expect(result).toBeUndefined();
+    });
+  });
+
+  describe("getPlayerFitHistory", () => {
+    it("flattens each delta with its snapshot's stats version", async () => {
+      const created = new Date("2026-01-01T00:00:00Z");
+      mockOrderBy.mockResolvedValueOnce([
+        { delta: { snapshot_id: 2, player_id: 100, removed: false, cb_fit: 23.4 }, snapshot: { id: 2, stats_version: "3f9a", created_at: created } },
+      ]);
+
+      const result = await storage.getPlayerFitHistory(100);
+      expect(result).toEqual([
+        { snapshot_id: 2, player_id: 100, removed: false, cb_fit: 23.4, stats_version: "3f9a", snapshot_created_at: created },
+      ]);
+    });
+
+    it("returns empty array on error", async () => {
+      mockOrderBy.mockRejectedValueOnce(new Error("DB error"));
+
+      const result = await storage.getPlayerFitHistory(100);
+      expect(result).toEqual([]);
+    });
+  });
+
   describe("isPlayerFavorited", () => {
     it("returns false when player not found in DB", async () => {
       mockWhere.mockResolvedValueOnce([]);
@@ -292,11 +351,28 @@ describe("DatabaseStorage", () => {
   });
 
   describe("getTeamAnalytics", () => {
-    it("returns player count for a club", async () => {
-      mockWhere.mockResolvedValueOnce([
-        { id: 1, name: "Player1" },
-        { id: 2, name: "Player2" },
-      ]);
+    const row = {
+      club_name: "Barcelona", club_id: 131, player_count: 2, player_ids: [100, 200],
+      depth: { ST: 1, CB: 1 }, weakest_pos: "LB", weakest_fit: 61.2,
+    };
+
+    it("returns the precomputed club analytics without squad ids", async () => {
+      mockWhere.mockResolvedValueOnce([row]);
+
+      const analytics = await storage.getTeamAnalytics("Barcelona");
+      expect(analytics.playerCount).toBe(2);
+      expect(analytics.weakest_pos).toBe("LB");
+      expect(analytics).not.toHaveProperty("player_ids");
+      expect(mockWhere).toHaveBeenCalledTimes(1);
+    });
+
+    it("returns player count for a club without analytics", async () => {
+      mockWhere
+        .mockResolvedValueOnce([])
+        .mockResolvedValueOnce([
+          { id: 1, name: "Player1" },
+          { id: 2, name: "Player2" },
+        ]);
 
       const analytics = await storage.getTeamAnalytics("Barcelona");
       expect(analytics.playerCount).toBe(2);
@@ -304,11 +380,48 @@ describe("DatabaseStorage", () => {
 
     it("returns zero for unknown club", async () => {
       mockWhere
+        .mockResolvedValueOnce([])
         .mockResolvedValueOnce([])
         .mockResolvedValueOnce([]);
 
       const analytics = await storage.getTeamAnalytics("Unknown FC");
       expect(analytics.playerCount).toBe(0);
     });
+
+    it("falls back to name matching when the analytics lookup fails", async () => {
+      mockWhere
+        .mockRejectedValueOnce(new Error("relation \"club_analytics\" does not exist"))
+        .mockResolvedValueOnce([{ id: 1, name: "Player1" }]);
+
+      const analytics = await storage.getTeamAnalytics("Barcelona");
+      expect(analytics.playerCount).toBe(1);
+    });
+  });
+
+  describe("getPlayersByClub", () => {
+    it("fetches the precomputed squad by player id", async () => {
+      const squad = [{ id: 1, player_id: 100 }, { id: 2, player_id: 200 }];
+      mockWhere
+        .mockResolvedValueOnce([{ club_name: "Barcelona", player_ids: [100, 200] }])
+        .mockResolvedValueOnce(squad);
+
+      const result = await storage.getPlayersByClub("Barcelona");
+      expect(result).toEqual(squad);
+      expect(mockWhere).toHaveBeenCalledTimes(2);
+    });
+
+    it("returns empty array for a club with an empty squad", async () => {
+      mockWhere.mockResolvedValueOnce([{ club_name: "AC Carpi", player_ids: [] }]);
+
+      const result = await storage.getPlayersByClub("AC Carpi");
+      expect(result).toEqual([]);
+      expect(mockWhere).toHaveBeenCalledTimes(1);
+    });
+
+    it("returns empty array for an empty club name", async () => {
+      const result = await storage.getPlayersByClub("");
+      expect(result).toEqual([]);
+      expect(mockSelect).not.toHaveBeenCalled();
+    });
   });
 });
@@ -8,6 +8,11 @@ import {
   clubs, 
   competitions, 
   position_compatibility, 
+  position_leaderboards,
+  player_explanations,
+  compatibility_snapshots,
+  compatibility_deltas,
+  club_analytics,
   player_favorites,
   type User,
   type InsertUser,
@@ -15,6 +20,10 @@ import {
   type Club, 
   type Competition, 
   type PositionCompatibility, 
+  type PositionLeaderboardEntry,
+  type PlayerExplanation,
+  type FitHistoryEntry,
+  type ClubAnalytics,
   type InsertPlayer, 
   type InsertClub, 
   type InsertCompetition, 
@@ -28,6 +37,9 @@ import { eq, and, or, like, gte, lte, desc, asc, sql, isNotNull, inArray } from
 import { getTableColumns } from "drizzle-orm";
 import unidecode from "unidecode";
 
+/** Team page analytics: the precomputed club_analytics row (without the squad ids) when there is one */
+export type TeamAnalytics = { playerCount: number } & Partial<Omit<ClubAnalytics, "player_ids">>;
+
 /**
  * Storage interface defining all database operations
  */
@@ -76,6 +88,12 @@ export interface IStorage {
   createPositionCompatibility(compatibility: InsertPositionCompatibility): Promise<PositionCompatibility>;
   updatePositionCompatibility(playerId: number, compatibility: Partial<InsertPositionCompatibility>): Promise<PositionCompatibility | undefined>;
   bulkCreatePositionCompatibility(compatibilities: InsertPositionCompatibility[]): Promise<PositionCompatibility[]>;
+  /** Precomputed top players for a position within a scope (rank order) */
+  getPositionLeaderboard(position: string, scope: string, scopeValue: string, limit: number): Promise<Array<PositionLeaderboardEntry & { player: Player | null }>>;
+  /** Precomputed top feature contributions behind a player's fit scores */
+  getPlayerExplanation(playerId: number): Promise<PlayerExplanation | undefined>;
+  /** How a player's compatibility scores changed across scoring runs (oldest first) */
+  getPlayerFitHistory(playerId: number): Promise<FitHistoryEntry[]>;
 
   /** User favorites management */
   addPlayerToFavorites(userId: number, playerId: number): Promise<PlayerFavorite>;
@@ -84,9 +102,9 @@ export interface IStorage {
   isPlayerFavorited(userId: number, playerId: number): Promise<boolean>;
 
   /** Analytics and statistics */
-  getTeamAnalytics(clubName: string): Promise<{
-    playerCount: number;
-  }>;
+  /** Precomputed squad analytics (club_analytics, keyed by clubs.name) */
+  getClubAnalytics(clubName: string): Promise<ClubAnalytics | undefined>;
+  getTeamAnalytics(clubName: string): Promise<TeamAnalytics>;
   getGlobalStats(): Promise<{
     totalPlayers: number;
     totalTeams: number;
@@ -258,8 +276,9 @@ export class DatabaseStorage implements IStorage {
   private buildSearchConditions(filters: SearchFilters): any[] {
       const conditions = [] as any[];
 
+      // ILIKE (not LOWER() LIKE) so the players_*_trgm_idx trigram indexes apply
       if (filters.name) {
-        conditions.push(sql`LOWER(${players.name}) LIKE LOWER(${'%' + filters.name + '%'})`);
+        conditions.push(sql`${players.name} ILIKE ${'%' + filters.name + '%'}`);
       }
 
       if (filters.position) {
@@ -272,7 +291,7 @@ export class DatabaseStorage implements IStorage {
       }
 
       if (filters.team) {
-        conditions.push(sql`LOWER(${players.current_club_name}) LIKE LOWER(${'%' + filters.team + '%'})`);
+        conditions.push(sql`${players.current_club_name} ILIKE ${'%' + filters.team + '%'}`);
       }
 
       if (filters.country) {
@@ -439,7 +458,8 @@ export class DatabaseStorage implements IStorage {
   }
 
   /**
-   * Get players by club name with fuzzy matching
+   * Get players by club name: the squad precomputed in club_analytics,
+   * falling back to fuzzy name matching for clubs without a row
    * @param clubName - Club name to search for
    * @returns Array of players in the club
    */
@@ -447,21 +467,38 @@ export class DatabaseStorage implements IStorage {
     if (!clubName) return [];
     
     try {
-    const normalizedClubName = unidecode(clubName);
-      
+      const analytics = await this.getClubAnalytics(clubName);
+      if (!analytics) return await this.matchPlayersByClubName(clubName);
+      if (analytics.player_ids.length === 0) return [];
+      return await db.select().from(players).where(inArray(players.player_id, analytics.player_ids));
+    } catch (error) {
+      console.error(`Error getting players for club ${clubName}:`, error);
+      return [];
+    }
+  }
+
+  /**
+   * Fuzzy club name match on players.current_club_name (exact ILIKE, then partial)
+   * @param clubName - Club name to search for
+   * @returns Array of players in the club
+   */
+  private async matchPlayersByClubName(clubName: string): Promise<Player[]> {
+    try {
+      const normalizedClubName = unidecode(clubName);
+
       // Exact match first
-    let result = await db.select().from(players).where(
-      sql`${players.current_club_name} ILIKE ${normalizedClubName}`
-    );
-      
-      // Partial match if exact match fails
-    if (result.length === 0) {
-      result = await db.select().from(players).where(
-        sql`${players.current_club_name} ILIKE ${'%' + normalizedClubName + '%'}`
+      let result = await db.select().from(players).where(
+        sql`${players.current_club_name} ILIKE ${normalizedClubName}`
       );
-    }
-      
-    return result;
+
+      // Partial match if exact match fails
+      if (result.length === 0) {
+        result = await db.select().from(players).where(
+          sql`${players.current_club_name} ILIKE ${'%' + normalizedClubName + '%'}`
+        );
+      }
+
+      return result;
     } catch (error) {
       console.error(`Error getting players for club ${clubName}:`, error);
       return [];
@@ -632,6 +669,73 @@ export class DatabaseStorage implements IStorage {
     }
   }
 
+  /**
+   * Get the precomputed leaderboard for a position (index lookup on position_leaderboards)
+   * @param position - Position code (e.g. "CB")
+   * @param scope - all, league, country or age_band
+   * @param scopeValue - League, country or age band ("" for scope "all")
+   * @param limit - Number of entries (ranks 1..limit)
+   * @returns Leaderboard entries in rank order with their player rows
+   */
+  async getPositionLeaderboard(position: string, scope: string, scopeValue: string, limit: number): Promise<Array<PositionLeaderboardEntry & { player: Player | null }>> {
+    try {
+      const rows = await db
+        .select({ entry: position_leaderboards, player: players })
+        .from(position_leaderboards)
+        .leftJoin(players, eq(players.player_id, position_leaderboards.player_id))
+        .where(and(
+          eq(position_leaderboards.position, position),
+          eq(position_leaderboards.scope, scope),
+          eq(position_leaderboards.scope_value, scopeValue),
+          lte(position_leaderboards.rank, limit),
+        ))
+        .orderBy(asc(position_leaderboards.rank));
+      return rows.map(({ entry, player }: any) => ({ ...entry, player }));
+    } catch (error) {
+      console.error(`Error getting ${position} leaderboard for ${scope} ${scopeValue}:`, error);
+      return [];
+    }
+  }
+
+  /**
+   * Get the precomputed fit explanation of a player (primary-key lookup on player_explanations)
+   * @param playerId - Player ID
+   * @returns Explanation or undefined if the player has not been scored
+   */
+  async getPlayerExplanation(playerId: number): Promise<PlayerExplanation | undefined> {
+    try {
+      return await this.getByColumn<PlayerExplanation>(player_explanations, player_explanations.player_id, playerId);
+    } catch (error) {
+      console.error(`Error getting explanation for player ${playerId}:`, error);
+      return undefined;
+    }
+  }
+
+  /**
+   * Get the fit history of a player: the snapshot deltas of compatibility_deltas
+   * (primary-key range scan on player_id), each with its run's stats version
+   * @param playerId - Player ID
+   * @returns One entry per scoring run that changed the player's scores, oldest first
+   */
+  async getPlayerFitHistory(playerId: number): Promise<FitHistoryEntry[]> {
+    try {
+      const rows = await db
+        .select({ delta: compatibility_deltas, snapshot: compatibility_snapshots })
+        .from(compatibility_deltas)
+        .innerJoin(compatibility_snapshots, eq(compatibility_snapshots.id, compatibility_deltas.snapshot_id))
+        .where(eq(compatibility_deltas.player_id, playerId))
+        .orderBy(asc(compatibility_deltas.snapshot_id));
+      return rows.map(({ delta, snapshot }: any) => ({
+        ...delta,
+        stats_version: snapshot.stats_version,
+        snapshot_created_at: snapshot.created_at,
+      }));
+    } catch (error) {
+      console.error(`Error getting fit history for player ${playerId}:`, error);
+      return [];
+    }
+  }
+
   // === User Favorites Operations ===
   
   /**
@@ -714,17 +818,36 @@ export class DatabaseStorage implements IStorage {
 
   // === Analytics Operations ===
   
+  /**
+   * Get the precomputed analytics row of a club
+   * @param clubName - Club name (clubs.name)
+   * @returns Club analytics or undefined if the club has no row
+   */
+  async getClubAnalytics(clubName: string): Promise<ClubAnalytics | undefined> {
+    try {
+      return await this.getByColumn<ClubAnalytics>(club_analytics, club_analytics.club_name, clubName);
+    } catch (error) {
+      // e.g. club_analytics not populated yet: callers fall back to name matching
+      console.error(`Error getting analytics for club ${clubName}:`, error);
+      return undefined;
+    }
+  }
+
   /**
    * Get team analytics for a club
    * @param clubName - Club name
-   * @returns Team analytics object with player count
+   * @returns Precomputed squad analytics, or just the player count for clubs without a row
    */
-  async getTeamAnalytics(clubName: string): Promise<{
-    playerCount: number;
-  }> {
-    const teamPlayers = await this.getPlayersByClub(clubName);
-      return {
-        playerCount: teamPlayers.length,
+  async getTeamAnalytics(clubName: string): Promise<TeamAnalytics> {
+    const analytics = await this.getClubAnalytics(clubName);
+    if (analytics) {
+      const { player_ids, ...rest } = analytics;
+      return { playerCount: analytics.player_count, ...rest };
+    }
+
+    const teamPlayers = await this.matchPlayersByClubName(clubName);
+    return {
+      playerCount: teamPlayers.length,
     };
   }
 
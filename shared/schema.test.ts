@@ -5,6 +5,7 @@ import {
   registerSchema,
   insertPlayerSchema,
   insertClubSchema,
+  whatIfRequestSchema,
 } from "./schema";
 
 describe("searchFiltersSchema", () => {
@@ -177,3 +178,27 @@ describe("insertClubSchema", () => {
     expect(() => insertClubSchema.parse({ club_id: 1 })).toThrow();
   });
 });
+
+describe("whatIfRequestSchema", () => {
+  it("accepts a delta grid", () => {
+    const result = whatIfRequestSchema.parse({ grid: { sprint_speed: [0, 5, 10], crossing: [0, 4, 8] } });
+    expect(result).toEqual({ grid: { sprint_speed: [0, 5, 10], crossing: [0, 4, 8] } });
+  });
+
+  it("accepts a development curve", () => {
+    const result = whatIfRequestSchema.parse({ curve: { stamina: [1, 2, 3] } });
+    expect(result).toEqual({ curve: { stamina: [1, 2, 3] } });
+  });
+
+  it("rejects both grid and curve", () => {
+    expect(() => whatIfRequestSchema.parse({ grid: { pac: [1] }, curve: { pac: [1] } })).toThrow();
+  });
+
+  it("rejects non-numeric deltas", () => {
+    expect(() => whatIfRequestSchema.parse({ grid: { crossing: ["5"] } })).toThrow();
+  });
+
+  it("rejects empty delta lists", () => {
+    expect(() => whatIfRequestSchema.parse({ grid: { crossing: [] } })).toThrow();
+  });
+});
@@ -12,6 +12,8 @@ import {
   serial,
   integer,
   real,
+  boolean,
+  primaryKey,
 } from "drizzle-orm/pg-core";
 import { createInsertSchema } from "drizzle-zod";
 import { z } from "zod";
@@ -89,7 +91,11 @@ export const players = pgTable("players", {
   age: integer("age"),
   image_url: text("image_url"),
   created_at: timestamp("created_at").defaultNow(),
-});
+}, (table) => ({
+  // trigram indexes for the ILIKE '%...%' name/team searches (needs the pg_trgm extension)
+  name_trgm: index("players_name_trgm_idx").using("gin", table.name.op("gin_trgm_ops")),
+  current_club_name_trgm: index("players_current_club_name_trgm_idx").using("gin", table.current_club_name.op("gin_trgm_ops")),
+}));
 
 /** Football competitions and leagues */
 export const competitions = pgTable("competitions", {
@@ -125,7 +131,10 @@ export const clubs = pgTable("clubs", {
   net_transfer_record: text("net_transfer_record"),
   coach_name: text("coach_name"),
   last_season: integer("last_season"),
-});
+}, (table) => ({
+  name_lookup: index("clubs_name_idx").on(table.name),
+  competition_lookup: index("clubs_domestic_competition_id_idx").on(table.domestic_competition_id),
+}));
 
 /** ML-generated position compatibility scores for players */
 export const position_compatibility = pgTable("position_compatibility", {
@@ -146,6 +155,87 @@ export const position_compatibility = pgTable("position_compatibility", {
   best_fit_pct: real("best_fit_pct"),
   ovr: integer("ovr"),
   created_at: timestamp("created_at").defaultNow(),
+}, (table) => ({
+  player_lookup: index("position_compatibility_player_id_idx").on(table.player_id),
+}));
+
+/** One row per scoring run of position_compatibility (see models/snapshots.py) */
+export const compatibility_snapshots = pgTable("compatibility_snapshots", {
+  id: serial("id").primaryKey(),
+  stats_version: text("stats_version").notNull(), // reference_stats.json version the run scored with
+  base_id: integer("base_id"), // previous snapshot the deltas are taken against
+  players: integer("players").notNull(),
+  changed: integer("changed").notNull(), // delta rows written (new or changed players)
+  removed: integer("removed").notNull(),
+  created_at: timestamp("created_at").defaultNow(),
+});
+
+/** Rows of a snapshot that differ from the previous one; a version is the newest delta per player up to it */
+export const compatibility_deltas = pgTable("compatibility_deltas", {
+  snapshot_id: integer("snapshot_id").notNull().references(() => compatibility_snapshots.id, { onDelete: "cascade" }),
+  player_id: integer("player_id").notNull(), // References players.player_id
+  removed: boolean("removed").notNull().default(false), // player no longer scored (score columns null)
+  natural_pos: text("natural_pos"),
+  st_fit: real("st_fit"),
+  lw_fit: real("lw_fit"),
+  rw_fit: real("rw_fit"),
+  cm_fit: real("cm_fit"),
+  cdm_fit: real("cdm_fit"),
+  cam_fit: real("cam_fit"),
+  lb_fit: real("lb_fit"),
+  rb_fit: real("rb_fit"),
+  cb_fit: real("cb_fit"),
+  best_pos: text("best_pos"),
+  best_fit_score: real("best_fit_score"),
+  ovr: integer("ovr"),
+}, (table) => ({
+  pk: primaryKey({ columns: [table.player_id, table.snapshot_id] }),
+}));
+
+/** Precomputed top-K players per position and scope (all, league, country, age_band), refreshed by each scoring run */
+export const position_leaderboards = pgTable("position_leaderboards", {
+  id: serial("id").primaryKey(),
+  position: text("position").notNull(),
+  scope: text("scope").notNull(),
+  scope_value: text("scope_value").notNull(), // "" for scope "all"
+  rank: integer("rank").notNull(),
+  player_id: integer("player_id").notNull(), // References players.player_id
+  score: real("score").notNull(),
+  ovr: integer("ovr"),
+  age: integer("age"),
+  market_value_in_eur: integer("market_value_in_eur"),
+}, (table) => ({
+  leaderboard_lookup: index("position_leaderboards_lookup_idx").on(table.position, table.scope, table.scope_value, table.rank),
+}));
+
+/** Top feature contributions per position for one player, as stored by models/explanations.py */
+export type PlayerContributions = Record<string, {
+  fit: number | null; // fit score (0-100) before combining with the relative fit
+  top: Array<[string, number]>; // [feature, fit points], largest |contribution| first
+  rest: number; // summed contribution of the remaining features
+}>;
+
+/** Per-player fit explanations, precomputed by each scoring run */
+export const player_explanations = pgTable("player_explanations", {
+  player_id: integer("player_id").primaryKey(), // References players.player_id
+  contributions: jsonb("contributions").$type<PlayerContributions>().notNull(),
+  created_at: timestamp("created_at").defaultNow(),
+});
+
+/** Squad analytics per club, precomputed by models/club_analytics.py after each data load */
+export const club_analytics = pgTable("club_analytics", {
+  club_name: text("club_name").primaryKey(), // clubs.name, as sent by the team page
+  club_id: integer("club_id"),
+  player_count: integer("player_count").notNull(),
+  player_ids: integer("player_ids").array().notNull(), // players.player_id of the squad
+  depth: jsonb("depth").$type<Record<string, number>>().notNull(), // players per best_pos
+  avg_fit: jsonb("avg_fit").$type<Record<string, number | null>>().notNull(),
+  top_fit: jsonb("top_fit").$type<Record<string, number | null>>().notNull(),
+  age: jsonb("age").$type<{ mean: number | null; min: number | null; max: number | null; bands: Record<string, number> }>().notNull(),
+  market_value: jsonb("market_value").$type<{ total: number | null; mean: number | null; median: number | null; max: number | null }>().notNull(),
+  weakest_pos: text("weakest_pos"),
+  weakest_fit: real("weakest_fit"),
+  updated_at: timestamp("updated_at").defaultNow(),
 });
 
 /** User's favorite players - many-to-many relationship */
@@ -212,6 +302,13 @@ export type InsertClub = z.infer<typeof insertClubSchema>;
 export type Club = typeof clubs.$inferSelect;
 export type InsertPositionCompatibility = z.infer<typeof insertPositionCompatibilitySchema>;
 export type PositionCompatibility = typeof position_compatibility.$inferSelect;
+export type PositionLeaderboardEntry = typeof position_leaderboards.$inferSelect;
+export type CompatibilitySnapshot = typeof compatibility_snapshots.$inferSelect;
+export type CompatibilityDelta = typeof compatibility_deltas.$inferSelect;
+/** A player's row as it changed in one snapshot (GET /api/players/:id/fit-history) */
+export type FitHistoryEntry = CompatibilityDelta & { stats_version: string; snapshot_created_at: Date | null };
+export type PlayerExplanation = typeof player_explanations.$inferSelect;
+export type ClubAnalytics = typeof club_analytics.$inferSelect;
 export type InsertPlayerFavorite = z.infer<typeof insertPlayerFavoriteSchema>;
 export type PlayerFavorite = typeof player_favorites.$inferSelect;
 
@@ -234,3 +331,36 @@ export const searchFiltersSchema = z.object({
 });
 
 export type SearchFilters = z.infer<typeof searchFiltersSchema>;
+
+/** Leaderboard lookup: scope "all" ignores value */
+export const LEADERBOARD_SCOPES = ["all", "league", "country", "age_band"] as const;
+
+export const leaderboardQuerySchema = z.object({
+  scope: z.enum(LEADERBOARD_SCOPES).default("all"),
+  value: z.string().optional(),
+  limit: z.coerce.number().int().min(1).max(50).default(20),
+});
+
+export type LeaderboardQuery = z.infer<typeof leaderboardQuerySchema>;
+
+/** What-if simulation: attribute deltas as a grid (every combination) or a development curve (aligned steps) */
+export const WHATIF_MAX_ATTRIBUTES = 40; // the position models use ~30 attributes
+export const WHATIF_MAX_SCENARIOS = 100_000; // MAX_SCENARIOS in models/whatif.py
+
+const attributeDeltasSchema = z
+  .record(z.string(), z.array(z.number()).min(1).max(100))
+  .refine((o) => Object.keys(o).length <= WHATIF_MAX_ATTRIBUTES, {
+    message: `At most ${WHATIF_MAX_ATTRIBUTES} attributes`,
+  });
+
+export const whatIfRequestSchema = z.union([
+  z.object({
+    grid: attributeDeltasSchema.refine(
+      (o) => Object.values(o).reduce((n, v) => n * v.length, 1) <= WHATIF_MAX_SCENARIOS,
+      { message: `A grid may have at most ${WHATIF_MAX_SCENARIOS} scenarios` },
+    ),
+  }).strict(),
+  z.object({ curve: attributeDeltasSchema }).strict(),
+]);
+
+export type WhatIfRequest = z.infer<typeof whatIfRequestSchema>;